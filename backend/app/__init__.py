@@ -0,0 +1,4 @@
+import time
+
+# When the ``app`` package started importing, for the startup timing report.
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,80 @@
+import time
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.responses import STREAMED_MEDIA_TYPES
+from app.services.metrics import get_metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Records HTTP request latency per method, route template and status.
+
+    Timed until the last body chunk is sent, so streamed responses count
+    their full duration.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            get_metrics().request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
+
+
+class CompressionMiddleware:
+    """
+    Gzip responses of at least ``minimum_size`` bytes for clients that accept
+    it, with Starlette's ``GZipMiddleware``. Streamed responses (NDJSON, SSE)
+    are recognized by the content type of their start message and sent around
+    the compressor as is, so each record reaches the client as soon as it is
+    written.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def app(scope: Scope, receive: Receive, compress: Send) -> None:
+            target = compress
+
+            async def route(message: Message) -> None:
+                nonlocal target
+                if message["type"] == "http.response.start":
+                    content_type = Headers(raw=message["headers"]).get("content-type", "")
+                    if content_type.startswith(STREAMED_MEDIA_TYPES):
+                        target = send
+                await target(message)
+
+            await self.app(scope, receive, route)
+
+        gzip = GZipMiddleware(app, self.minimum_size, self.compresslevel)
+        await gzip(scope, receive, send)
@@ -0,0 +1,36 @@
+from typing import Any, Dict, Sequence
+
+from starlette.responses import Response
+
+from app.core.json import encode_json
+
+# ``?format=`` of list endpoints: one object per row, or parallel column arrays.
+ROWS = "rows"
+COLUMNS = "columns"
+FORMAT_PATTERN = f"^({ROWS}|{COLUMNS})$"
+# Responses that flush record by record; compressing them would hold records back.
+STREAMED_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded straight from plain data (see ``encode_json``),
+    without FastAPI's ``jsonable_encoder`` pass or response model validation.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def columnar(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    ``rows`` as ``{"count": n, "columns": {name: [value of each row]}}``, with
+    the names of the first row: every key is written once instead of per row.
+    """
+    names = list(rows[0]) if rows else []
+    return {
+        "count": len(rows),
+        "columns": {name: [row.get(name) for row in rows] for name in names},
+    }
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.deps import get_provider
+from app.schemas.backtest import BacktestRequest, BacktestResponse
+from app.schemas.screener import filter_spec
+from app.services.backtest import run_backtest
+from app.services.data_providers.base import MarketDataProvider
+from app.services.filters.base import InvalidFilterError
+
+router = APIRouter(prefix="/api/backtest", tags=["backtest"])
+
+
+@router.post("", response_model=BacktestResponse)
+def backtest(payload: BacktestRequest, provider: MarketDataProvider = Depends(get_provider)):
+    filter_sets = [
+        {"name": s.name, "filters": filter_spec(s.filters, s.expression)}
+        for s in payload.filter_sets
+    ]
+    try:
+        return run_backtest(
+            provider, filter_sets, payload.horizons, payload.start, payload.end
+        )
+    except InvalidFilterError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
@@ -1,11 +1,13 @@
 from fastapi import APIRouter
+from starlette.responses import Response
 
 from app.schemas.filters import FilterDefinition
-from app.services.filters.registry import get_filter_definitions
+from app.services.filters.registry import get_filter_manifest
 
 router = APIRouter(prefix="/api/filters", tags=["filters"])
 
 
 @router.get("", response_model=list[FilterDefinition])
 def list_filters():
-    return get_filter_definitions()
+    """Served from the encoded manifest (see ``registry.get_filter_manifest``)."""
+    return Response(get_filter_manifest(), media_type="application/json")
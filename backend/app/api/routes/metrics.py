@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import get_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of the screener metrics."""
+    return PlainTextResponse(
+        get_metrics().render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
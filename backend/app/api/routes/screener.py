@@ -1,17 +1,210 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from contextlib import aclosing
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
 
-from app.deps import get_provider
-from app.schemas.screener import ScreenerRunRequest
-from app.services.data_providers.base import MarketDataProvider
-from app.services.screener import run_screener
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from app.api.responses import FORMAT_PATTERN, ROWS, columnar
+from app.core.config import get_settings
+from app.core.json import encode_json
+from app.deps import get_async_provider, get_live_screener, get_provider
+from app.schemas.screener import ScreenerRunRequest, filter_spec
+from app.services.data_providers.base import AsyncMarketDataProvider, MarketDataProvider
+from app.services.filters.base import InvalidFilterError
+from app.services.cache.cache import TTLCache
+from app.services.filters.plan import FilterSpec, compile_plan
+from app.services.live import LiveScreener
+from app.services.metrics import get_metrics, profile_call
+from app.services.screener import (
+    run_screener,
+    run_screener_cached_async,
+    stream_screener_async,
+)
 
 router = APIRouter(prefix="/api/screener", tags=["screener"])
 
 
+@lru_cache()
+def get_body_cache() -> TTLCache:
+    """Encoded ``/run`` bodies by ETag, so they do not crowd out screen results."""
+    settings = get_settings()
+    cache = TTLCache(
+        settings.screen_cache_ttl_seconds, max_entries=settings.screen_body_cache_max_entries
+    )
+    get_metrics().register_cache("screen_body", cache)
+    return cache
+
+
 @router.post("/run")
-def run_screen(
+async def run_screen(
     payload: ScreenerRunRequest,
-    provider: MarketDataProvider = Depends(get_provider),
+    request: Request,
+    profile: bool = Query(False),
+    format: str = Query(ROWS, pattern=FORMAT_PATTERN),
+    provider: AsyncMarketDataProvider = Depends(get_async_provider),
+    sync_provider: MarketDataProvider = Depends(get_provider),
+):
+    """
+    Matches of the screen, as a list of result objects or, with
+    ``format=columns``, as parallel arrays (see ``responses.columnar``).
+    """
+    filters = filter_spec(payload.filters, payload.expression)
+    if profile:
+        return await _profile_screen(sync_provider, filters, payload)
+    try:
+        digest, results = await run_screener_cached_async(
+            provider, filters, payload.sort_by, payload.limit
+        )
+    except InvalidFilterError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Market data provider timed out")
+    etag = f'"{digest}"' if format == ROWS else f'"{digest}-{format}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    # The ETag identifies the body, so repeated screens reuse the encoded bytes.
+    body = await asyncio.to_thread(
+        get_body_cache().get_or_load,
+        etag,
+        lambda: encode_json(results if format == ROWS else columnar(results)),
+    )
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+async def _profile_screen(
+    provider: MarketDataProvider,
+    filters: FilterSpec,
+    payload: ScreenerRunRequest,
+) -> PlainTextResponse:
+    """
+    Run the screen uncached under cProfile, in one worker thread so the whole
+    computation is captured, and return the profile summary.
+    """
+    if not get_settings().profiling_enabled:
+        raise HTTPException(status_code=403, detail="Profiling is disabled")
+    try:
+        results, summary = await asyncio.to_thread(
+            profile_call, run_screener, provider, filters, payload.sort_by, payload.limit
+        )
+    except InvalidFilterError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return PlainTextResponse(summary, headers={"X-Result-Count": str(len(results))})
+
+
+@router.post("/stream")
+async def stream_screen(
+    payload: ScreenerRunRequest,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|sse)$"),
+    provider: AsyncMarketDataProvider = Depends(get_async_provider),
+):
+    """
+    Stream matches as NDJSON (default) or Server-Sent Events as they are found,
+    ending with a summary record. SSE is also selected by
+    ``Accept: text/event-stream``.
+    """
+    filters = filter_spec(payload.filters, payload.expression)
+    try:
+        compile_plan(filters).ranking(payload.sort_by, payload.limit)
+    except InvalidFilterError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    sse = format == "sse" or (
+        format is None and "text/event-stream" in request.headers.get("accept", "")
+    )
+    return StreamingResponse(
+        _encode_stream(
+            request,
+            stream_screener_async(provider, filters, payload.sort_by, payload.limit),
+            sse,
+        ),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/live")
+async def live_screen(
+    websocket: WebSocket, live: LiveScreener = Depends(get_live_screener)
 ):
-    filters = [{"id": f.id, "params": f.params} for f in payload.filters]
-    return run_screener(provider, filters)
+    """
+    Live screening. The client sends one ``{filters, expression}`` message and
+    gets a ``snapshot`` of the current matches, then an ``entered``/``left``
+    ``diff`` whenever provider updates change them. ``sort_by``/``limit`` do
+    not apply.
+    """
+    await websocket.accept()
+    try:
+        payload = ScreenerRunRequest.model_validate(await websocket.receive_json())
+        filters = filter_spec(payload.filters, payload.expression)
+        subscription = await live.subscribe(filters)
+    except ValueError as exc:
+        # Malformed JSON, an invalid payload or an invalid filter set.
+        await websocket.send_text(
+            _encode_record({"type": "error", "data": {"detail": str(exc)}}, sse=False)
+        )
+        await websocket.close(code=1008)
+        return
+    except WebSocketDisconnect:
+        return
+
+    async def forward() -> None:
+        await websocket.send_text(
+            _encode_record({"type": "snapshot", "data": subscription.initial}, sse=False)
+        )
+        while True:
+            diff = await subscription.queue.get()
+            await websocket.send_text(_encode_record({"type": "diff", "data": diff}, sse=False))
+
+    async def watch() -> None:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(watch())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        live.unsubscribe(subscription)
+
+
+async def _encode_stream(
+    request: Request, records: AsyncIterator[Dict[str, Any]], sse: bool
+) -> AsyncIterator[str]:
+    # Closing ``records`` on exit stops the remaining screening work when the
+    # client goes away.
+    async with aclosing(records):
+        try:
+            async for record in records:
+                yield _encode_record(record, sse)
+                if await request.is_disconnected():
+                    return
+        except asyncio.TimeoutError:
+            error = {"type": "error", "data": {"detail": "Market data provider timed out"}}
+            yield _encode_record(error, sse)
+
+
+def _encode_record(record: Dict[str, Any], sse: bool) -> str:
+    if sse:
+        data = encode_json(record["data"]).decode("utf-8")
+        return f"event: {record['type']}\ndata: {data}\n\n"
+    return encode_json(record).decode("utf-8") + "\n"
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
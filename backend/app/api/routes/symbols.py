@@ -1,25 +1,48 @@
-from typing import List
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
+from app.api.responses import FORMAT_PATTERN, ROWS, FastJSONResponse, columnar
+from app.db.search import decode_cursor, encode_cursor, symbol_search_clause
 from app.db.session import get_db
 from app.models.symbol import Symbol
-from app.schemas.symbol import SymbolResponse
+from app.schemas.symbol import SymbolColumns, SymbolResponse
 
 router = APIRouter(prefix="/api/symbols", tags=["symbols"])
 
+# Selected as plain columns: rows are encoded without loading ORM objects or
+# validating them again through the response model.
+_FIELDS = list(SymbolResponse.model_fields)
 
-@router.get("", response_model=List[SymbolResponse])
+
+@router.get("", response_model=Union[List[SymbolResponse], SymbolColumns])
 def list_symbols(
     search: str = Query(default=""),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None),
+    format: str = Query(default=ROWS, pattern=FORMAT_PATTERN),
     db: Session = Depends(get_db),
 ):
-    query = db.query(Symbol)
+    """
+    Symbols ordered by id. Pass the ``X-Next-Cursor`` response header back as
+    ``cursor`` for keyset pagination; ``page`` is kept for offset-based clients.
+    ``format=columns`` returns parallel arrays (see ``responses.columnar``).
+    """
+    query = db.query(*(getattr(Symbol, name) for name in _FIELDS)).order_by(Symbol.id)
     if search:
-        query = query.filter(Symbol.symbol.contains(search))
-    offset = (page - 1) * page_size
-    symbols = query.offset(offset).limit(page_size).all()
-    return symbols
+        query = query.filter(symbol_search_clause(db.get_bind().dialect.name, search))
+    if cursor:
+        try:
+            query = query.filter(Symbol.id > decode_cursor(cursor))
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+    elif page > 1:
+        query = query.offset((page - 1) * page_size)
+    symbols = [dict(zip(_FIELDS, row)) for row in query.limit(page_size + 1).all()]
+    headers = {}
+    if len(symbols) > page_size:
+        symbols = symbols[:page_size]
+        headers["X-Next-Cursor"] = encode_cursor(symbols[-1]["id"])
+    return FastJSONResponse(symbols if format == ROWS else columnar(symbols), headers=headers)
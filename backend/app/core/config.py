@@ -1,12 +1,53 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     app_name: str = "bestamoozscreener"
     database_url: str = "sqlite:///./app.db"
     mock_data_file: str = "backend/seed/symbols_seed.json"
+    # Binary candle file (see data_providers/binary_format.py); used instead of
+    # mock_data_file when set.
+    market_data_binary_file: Optional[str] = None
     cache_ttl_seconds: int = 60
+    cache_max_entries: int = 4096
+    indicator_cache_max_entries: int = 10_000
+    screen_cache_ttl_seconds: int = 30
+    screen_cache_max_entries: int = 256
+    # Encoded /api/screener/run bodies by ETag, kept apart from the results;
+    # they expire with screen_cache_ttl_seconds.
+    screen_body_cache_max_entries: int = 32
+    # Worker processes for sharded screening; 0 or 1 keeps the serial path.
+    screener_workers: int = 0
+    screener_shard_size: int = 250
+    # Rows evaluated per chunk by the streaming endpoint (serial path).
+    screener_stream_chunk_size: int = 100
+    # Bulk fetches through the async provider protocol.
+    provider_concurrency: int = 8
+    provider_timeout_seconds: float = 10.0
+    provider_batch_size: int = 100
+    # Replay the mock history as a live feed (one date per interval); 0 disables.
+    live_replay_interval_seconds: float = 0.0
+    live_replay_warmup: int = 30
+    # Windows (daily candles) of the rolling volume/value statistics the
+    # market data store keeps up to date as candles arrive.
+    rolling_windows: List[int] = [5, 10, 20, 60]
+    # Re-sync the symbols table from the provider every N seconds; 0 disables.
+    symbol_sync_interval_seconds: float = 0.0
+    # Gzip responses of at least this many bytes when the client accepts it;
+    # 0 disables compression.
+    gzip_minimum_size: int = 1024
+    # Allow ``?profile=1`` on POST /api/screener/run to return a cProfile summary.
+    profiling_enabled: bool = False
+    # JSON file caching the /api/filters manifest across processes, rebuilt when
+    # a filter module changes; unset keeps it in memory only.
+    filter_manifest_file: Optional[str] = None
+    # Seed the symbols table from the provider at startup; turn off for faster
+    # worker boot when the table is already filled (or kept current by sync).
+    seed_on_startup: bool = True
+    # Log a warning when a process takes longer than this to start; 0 disables.
+    startup_budget_seconds: float = 0.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,47 @@
+import json
+import math
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    UTF-8 JSON of dicts, lists, strings, numbers, datetimes (ISO 8601, as
+    ``jsonable_encoder`` writes them) and NumPy scalars; with orjson when it
+    is installed. NaN and infinities are written as ``null`` either way.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        _finite(content),
+        ensure_ascii=False,
+        separators=(",", ":"),
+        allow_nan=False,
+        default=_default,
+    ).encode("utf-8")
+
+
+def _finite(value: Any) -> Any:
+    """``value`` with non-finite floats replaced by ``None``, as orjson writes them."""
+    if isinstance(value, (float, np.floating)):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
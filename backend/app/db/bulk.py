@@ -0,0 +1,48 @@
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.symbol import Symbol
+
+SYMBOL_COLUMNS = (
+    "symbol",
+    "company_name",
+    "last_price",
+    "volume",
+    "trade_value",
+    "percent_change",
+    "last_updated",
+)
+_DIALECT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def symbol_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {column: item[column] for column in SYMBOL_COLUMNS}
+
+
+def upsert_symbols(
+    session: Session, items: Iterable[Dict[str, Any]], batch_size: int = 500
+) -> int:
+    """
+    Insert or update symbols keyed on ``symbol`` with multi-row statements.
+
+    Does not commit, so callers control the transaction. Returns the number of
+    rows written.
+    """
+    rows = [symbol_row(item) for item in items]
+    dialect_insert = _DIALECT_INSERTS.get(session.get_bind().dialect.name)
+    for start in range(0, len(rows), batch_size):
+        batch: List[Dict[str, Any]] = rows[start : start + batch_size]
+        if dialect_insert is None:
+            session.execute(insert(Symbol), batch)
+            continue
+        stmt = dialect_insert(Symbol).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Symbol.symbol],
+            set_={column: stmt.excluded[column] for column in SYMBOL_COLUMNS[1:]},
+        )
+        session.execute(stmt)
+    return len(rows)
@@ -0,0 +1,70 @@
+import base64
+import json
+
+from sqlalchemy import column, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.symbol import Symbol
+
+# Trigram FTS5 index over symbol and company_name, kept in sync with the
+# symbols table by triggers. Trigrams need at least three characters.
+FTS_TABLE = "symbols_fts"
+FTS_MIN_QUERY = 3
+
+_FTS_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        symbol, company_name, content='symbols', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON symbols BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, symbol, company_name)
+        VALUES (new.id, new.symbol, new.company_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON symbols BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, symbol, company_name)
+        VALUES ('delete', old.id, old.symbol, old.company_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF symbol, company_name ON symbols BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, symbol, company_name)
+        VALUES ('delete', old.id, old.symbol, old.company_name);
+        INSERT INTO {FTS_TABLE}(rowid, symbol, company_name)
+        VALUES (new.id, new.symbol, new.company_name);
+    END""",
+)
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """Create the FTS index and triggers on SQLite. Returns False elsewhere."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first()
+        for statement in _FTS_DDL:
+            conn.exec_driver_sql(statement)
+        if not exists:
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def symbol_search_clause(dialect_name: str, search: str) -> ColumnElement:
+    if dialect_name == "sqlite" and len(search) >= FTS_MIN_QUERY:
+        phrase = '"' + search.replace('"', '""') + '"'
+        matches = text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q")
+        return Symbol.id.in_(matches.bindparams(q=phrase).columns(column("rowid")))
+    return or_(Symbol.symbol.contains(search), Symbol.company_name.contains(search))
+
+
+def encode_cursor(last_id: int) -> str:
+    payload = json.dumps({"id": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Raises ValueError for malformed cursors."""
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["id"])
+    except (KeyError, TypeError, json.JSONDecodeError, UnicodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import get_settings
@@ -10,6 +10,27 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+SQLITE_PRAGMAS = {
+    # Readers no longer block on the writer (and vice versa).
+    "journal_mode": "WAL",
+    # Durable at checkpoints; safe with WAL and much cheaper than FULL.
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64_000,  # KiB
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5_000,  # ms
+}
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
 
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.db.bulk import upsert_symbols
+from app.models.symbol import Symbol
+from app.services.data_providers.base import MarketDataProvider
+from app.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncStats:
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+
+
+def sync_symbols(
+    session: Session, provider: MarketDataProvider, batch_size: int = 500
+) -> SyncStats:
+    """
+    Bring the symbols table in line with ``provider.list_symbols()``.
+
+    Rows are diffed by ``last_updated``: new and changed symbols are upserted
+    in batches and symbols the provider no longer lists are deleted, all in
+    one transaction, so readers see either the previous table or the synced
+    one. Unchanged rows are not written.
+    """
+    started = time.perf_counter()
+    items = provider.list_symbols()
+    rows = session.execute(select(Symbol.symbol, Symbol.last_updated)).all()
+    stored: Dict[str, Any] = {symbol: last_updated for symbol, last_updated in rows}
+    stats = SyncStats()
+    changed = []
+    for item in items:
+        symbol = item["symbol"]
+        if symbol not in stored:
+            stats.inserted += 1
+        elif stored[symbol] != item["last_updated"]:
+            stats.updated += 1
+        else:
+            stats.unchanged += 1
+            continue
+        changed.append(item)
+    listed = {item["symbol"] for item in items}
+    stale: List[str] = [symbol for symbol in stored if symbol not in listed]
+    stats.deleted = len(stale)
+
+    try:
+        upsert_symbols(session, changed, batch_size)
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start : start + batch_size]
+            session.execute(delete(Symbol).where(Symbol.symbol.in_(batch)))
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    stats.seconds = time.perf_counter() - started
+
+    metrics = get_metrics()
+    metrics.sync_seconds.observe(stats.seconds)
+    for action in ("inserted", "updated", "deleted"):
+        metrics.sync_rows.inc(getattr(stats, action), action=action)
+    return stats
+
+
+async def run_symbol_sync(
+    session_factory: Callable[[], Session], provider: MarketDataProvider, interval: float
+) -> None:
+    """Sync the symbols table every ``interval`` seconds until cancelled."""
+
+    def sync_once() -> SyncStats:
+        with session_factory() as session:
+            return sync_symbols(session, provider)
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stats = await asyncio.to_thread(sync_once)
+        except Exception:
+            # Keep the schedule; the next run retries the whole diff.
+            logger.exception("Symbol sync failed")
+            continue
+        logger.info(
+            "Synced symbols in %.3fs: %d inserted, %d updated, %d deleted, %d unchanged",
+            stats.seconds,
+            stats.inserted,
+            stats.updated,
+            stats.deleted,
+            stats.unchanged,
+        )
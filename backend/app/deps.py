@@ -1,9 +1,25 @@
 from functools import lru_cache
 
-from app.services.data_providers.base import MarketDataProvider
+from app.core.config import get_settings
+from app.services.data_providers.base import AsyncMarketDataProvider, MarketDataProvider
+from app.services.data_providers.memmap_provider import MemmapMarketDataProvider
 from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.data_providers.sync_adapter import SyncProviderAdapter
+from app.services.live import LiveScreener
 
 
 @lru_cache()
 def get_provider() -> MarketDataProvider:
+    if get_settings().market_data_binary_file:
+        return MemmapMarketDataProvider()
     return MockMarketDataProvider()
+
+
+@lru_cache()
+def get_async_provider() -> AsyncMarketDataProvider:
+    return SyncProviderAdapter(get_provider())
+
+
+@lru_cache()
+def get_live_screener() -> LiveScreener:
+    return LiveScreener(get_provider())
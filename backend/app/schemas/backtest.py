@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from app.schemas.filters import FilterExpression, SelectedFilter
+
+
+class BacktestFilterSet(BaseModel):
+    name: Optional[str] = None
+    filters: List[SelectedFilter] = Field(default_factory=list)
+    expression: Optional[FilterExpression] = None
+
+
+class BacktestRequest(BaseModel):
+    filter_sets: List[BacktestFilterSet] = Field(min_length=1)
+    # Forward-return horizons, in candles.
+    horizons: List[Annotated[int, Field(ge=1)]] = Field(default_factory=lambda: [1, 5, 20])
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+class HorizonStats(BaseModel):
+    horizon: int
+    count: int
+    mean_return: Optional[float] = None
+    hit_rate: Optional[float] = None
+    excess_return: Optional[float] = None
+
+
+class FilterSetResult(BaseModel):
+    name: Optional[str] = None
+    signals: int
+    signal_days: int
+    horizons: List[HorizonStats]
+
+
+class BacktestResponse(BaseModel):
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    dates: int
+    symbols: int
+    baseline: List[HorizonStats]
+    results: List[FilterSetResult]
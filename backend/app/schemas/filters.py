@@ -1,5 +1,5 @@
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class FilterParameter(BaseModel):
@@ -7,6 +7,11 @@ class FilterParameter(BaseModel):
     type: str
     description: str
     default: Optional[Any] = None
+    # Allowed values, when the parameter is one of a fixed set.
+    choices: Optional[List[Any]] = None
+    # Inclusive bounds of numeric parameters.
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
 
 
 class FilterDefinition(BaseModel):
@@ -19,3 +24,38 @@ class FilterDefinition(BaseModel):
 class SelectedFilter(BaseModel):
     id: str
     params: Dict[str, Any] = Field(default_factory=dict)
+    # Multiplier of this filter's score in the composite ``score``.
+    weight: float = 1.0
+
+
+class FilterExpression(BaseModel):
+    """
+    A boolean filter expression: either a selected filter (``id``, ``params``,
+    ``weight``) or exactly one of ``and``/``or`` (a list of expressions) and
+    ``not`` (one expression).
+    """
+
+    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+
+    id: Optional[str] = None
+    params: Dict[str, Any] = Field(default_factory=dict)
+    weight: float = 1.0
+    and_: Optional[List["FilterExpression"]] = Field(default=None, alias="and", min_length=1)
+    or_: Optional[List["FilterExpression"]] = Field(default=None, alias="or", min_length=1)
+    not_: Optional["FilterExpression"] = Field(default=None, alias="not")
+
+    @model_validator(mode="after")
+    def _one_kind(self) -> "FilterExpression":
+        kinds = [self.id, self.and_, self.or_, self.not_]
+        if sum(kind is not None for kind in kinds) != 1:
+            raise ValueError("Give exactly one of id, and, or, not")
+        return self
+
+    def to_spec(self) -> Dict[str, Any]:
+        """The expression as ``compile_plan`` takes it."""
+        if self.id is not None:
+            return {"id": self.id, "params": self.params, "weight": self.weight}
+        if self.not_ is not None:
+            return {"not": self.not_.to_spec()}
+        op, operands = ("and", self.and_) if self.and_ is not None else ("or", self.or_)
+        return {op: [operand.to_spec() for operand in operands]}
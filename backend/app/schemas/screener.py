@@ -1,8 +1,26 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, Field
 
-from app.schemas.filters import SelectedFilter
+from app.schemas.filters import FilterExpression, SelectedFilter
+
+
+def filter_spec(
+    filters: List[SelectedFilter], expression: Optional[FilterExpression]
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """``filters`` AND-ed with ``expression``, in the form ``compile_plan`` takes."""
+    selections = [f.model_dump() for f in filters]
+    if expression is None:
+        return selections
+    if not selections:
+        return expression.to_spec()
+    return {"and": [*selections, expression.to_spec()]}
 
 
 class ScreenerRunRequest(BaseModel):
     filters: List[SelectedFilter] = Field(default_factory=list)
+    # Boolean combination of filters, AND-ed with ``filters`` when both are given.
+    expression: Optional[FilterExpression] = None
+    # A selected filter id, or "score" for the weighted composite; results are
+    # ranked best first. Without it (and without limit) they stay in row order.
+    sort_by: Optional[str] = None
+    limit: Optional[int] = Field(default=None, ge=1)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 
 
@@ -20,6 +20,13 @@ class SymbolResponse(SymbolBase):
         from_attributes = True
 
 
+class SymbolColumns(BaseModel):
+    """Symbols in the ``format=columns`` form: one array of values per field."""
+
+    count: int
+    columns: Dict[str, List[Any]]
+
+
 class ScreenerResult(BaseModel):
     symbol: str
     company_name: str
@@ -0,0 +1,124 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.data_providers.base import MarketDataProvider
+from app.services.data_providers.panel import HistoryPanel
+from app.services.data_providers.timeframes import DAILY
+from app.services.filters.base import FilterBase
+from app.services.filters.chain import evaluate_filter, universe_symbol_data
+from app.services.filters.plan import FilterPlan, compile_plan
+
+DEFAULT_HORIZONS = (1, 5, 20)
+
+
+def run_backtest(
+    provider: MarketDataProvider,
+    filter_sets: Sequence[Dict[str, Any]],
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Backtest each ``{"name", "filters"}`` set over the provider's stored
+    history; ``filters`` is a selection list or expression (see ``compile_plan``).
+
+    Every filter set is turned into a (dates x symbols) signal matrix in one
+    pass, then scored against the forward close-to-close return over each
+    horizon. Statistics cover signal dates between ``start`` and ``end``; the
+    history before ``start`` still warms the indicators up. The baseline is
+    every symbol on every date, for comparison.
+    """
+    plans = [compile_plan(s["filters"]) for s in filter_sets]
+    panel = provider.get_panel()
+    in_range = np.ones(len(panel), dtype=bool)
+    if start is not None:
+        in_range &= panel.dates >= np.datetime64(start, "us")
+    if end is not None:
+        in_range &= panel.dates <= np.datetime64(end, "us")
+    returns = {h: forward_returns(panel.history["close"], h) for h in horizons}
+    baseline = _horizon_stats(~np.isnan(panel.history["close"]), returns, in_range)
+
+    results = []
+    for filter_set, plan in zip(filter_sets, plans):
+        signals = signal_matrix(panel, plan) & in_range[:, None]
+        stats = _horizon_stats(signals, returns, in_range)
+        for horizon, base in zip(stats, baseline):
+            if horizon["mean_return"] is not None and base["mean_return"] is not None:
+                horizon["excess_return"] = horizon["mean_return"] - base["mean_return"]
+        results.append(
+            {
+                "name": filter_set.get("name"),
+                "signals": int(signals.sum()),
+                "signal_days": int(signals.any(axis=1).sum()),
+                "horizons": stats,
+            }
+        )
+
+    dates = panel.dates[in_range]
+    return {
+        "start": dates[0].astype(datetime) if len(dates) else None,
+        "end": dates[-1].astype(datetime) if len(dates) else None,
+        "dates": int(in_range.sum()),
+        "symbols": len(panel.symbols),
+        "baseline": baseline,
+        "results": results,
+    }
+
+
+def signal_matrix(panel: HistoryPanel, plan: FilterPlan) -> np.ndarray:
+    """
+    AND of every filter's pass mask (or the plan's expression over them); only
+    symbols with a candle on a date can signal.
+    """
+    signals = ~np.isnan(panel.history["close"])
+    if plan.expression is not None:
+        leaves = plan.expression.leaves
+        return signals & plan.expression.masks(lambda c: history_signals(leaves[c], panel))
+    for instance in plan.instances:
+        if not signals.any():
+            break
+        signals &= history_signals(instance, panel)
+    return signals
+
+
+def history_signals(instance: FilterBase, panel: HistoryPanel) -> np.ndarray:
+    if instance.supports_history() and instance.timeframe == DAILY:
+        return instance.evaluate_history(panel)
+    # Fallback: screen the universe as it was on each date.
+    lookback = instance.history_lookback()
+    frames = {} if instance.timeframe == DAILY else {instance.timeframe: lookback}
+    signals = np.zeros((len(panel), len(panel.symbols)), dtype=bool)
+    for t in range(len(panel)):
+        universe = panel.universe_at(t, 0 if frames else lookback, frames)
+        signals[t] = evaluate_filter(instance, universe, universe_symbol_data).passed
+    return signals
+
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """Return from the close of each date to the close ``horizon`` dates later."""
+    result = np.full(close.shape, np.nan)
+    if 0 < horizon < len(close):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+def _horizon_stats(
+    signals: np.ndarray, returns: Dict[int, np.ndarray], in_range: np.ndarray
+) -> List[Dict[str, Any]]:
+    stats = []
+    for horizon, forward in returns.items():
+        picked = forward[signals & in_range[:, None] & ~np.isnan(forward)]
+        stats.append(
+            {
+                "horizon": horizon,
+                "count": int(picked.size),
+                "mean_return": float(picked.mean()) if picked.size else None,
+                "hit_rate": float((picked > 0).mean()) if picked.size else None,
+                "excess_return": None,
+            }
+        )
+    return stats
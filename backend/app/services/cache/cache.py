@@ -1,24 +1,185 @@
+import sys
+import threading
 import time
-from typing import Any, Dict, Tuple
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
 
 
 class TTLCache:
-    def __init__(self, ttl_seconds: int = 60):
+    """
+    Thread-safe TTL cache with LRU eviction.
+
+    Bounded by ``max_entries`` and/or ``max_bytes`` (sizes from ``sizeof``).
+    Expired entries are dropped on access and by a full sweep at most once per
+    TTL period, amortized over writes. ``get_or_load`` runs one loader per key
+    at a time; concurrent callers for the same key wait for its result.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
         self.ttl_seconds = ttl_seconds
-        self.store: Dict[str, Tuple[float, Any]] = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or estimate_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes = 0
+        self._store: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._remove(key)
+            self._store[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self.bytes += size
+            self._enforce_bounds()
+            self._maybe_sweep()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._lookup_locked(key)
+            if value is not _MISSING:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
 
-    def get(self, key: str) -> Any:
-        record = self.store.get(key)
-        if not record:
-            return None
-        timestamp, value = record
-        if time.time() - timestamp > self.ttl_seconds:
-            self.store.pop(key, None)
-            return None
-        return value
+        try:
+            flight.value = loader()
+            self.set(key, flight.value)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+        return flight.value
 
-    def set(self, key: str, value: Any) -> None:
-        self.store[key] = (time.time(), value)
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._store)
 
     def clear(self) -> None:
-        self.store.clear()
+        with self._lock:
+            self._store.clear()
+            self.bytes = 0
+
+    def sweep(self) -> int:
+        """Drop every expired entry and return how many were removed."""
+        with self._lock:
+            return self._sweep_locked()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._store),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "inflight": len(self._inflight),
+        }
+
+    def _lookup(self, key: Hashable, count: bool = True) -> Any:
+        with self._lock:
+            return self._lookup_locked(key, count)
+
+    def _lookup_locked(self, key: Hashable, count: bool = True) -> Any:
+        record = self._store.get(key)
+        if record is not None and record[0] < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            record = None
+        if record is None:
+            if count:
+                self.misses += 1
+            return _MISSING
+        self._store.move_to_end(key)
+        if count:
+            self.hits += 1
+        return record[2]
+
+    def _remove(self, key: Hashable) -> None:
+        record = self._store.pop(key, None)
+        if record is not None:
+            self.bytes -= record[1]
+
+    def _enforce_bounds(self) -> None:
+        while self._store and (
+            (self.max_entries is not None and len(self._store) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._store.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def _maybe_sweep(self) -> None:
+        if time.monotonic() - self._last_sweep >= self.ttl_seconds:
+            self._sweep_locked()
+
+    def _sweep_locked(self) -> int:
+        now = time.monotonic()
+        self._last_sweep = now
+        expired = [key for key, record in self._store.items() if record[0] < now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint, counting NumPy buffers and one container level."""
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(
+            sys.getsizeof(item)
+            + (sum(sys.getsizeof(v) for v in item.values()) if isinstance(item, dict) else 0)
+            for item in value
+        )
+    return size
@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.data_providers.universe import UniverseBatch
+from app.services.metrics import get_metrics
+
+IndicatorKey = Tuple[str, str, Tuple[Tuple[str, Any], ...]]
+
+
+class IndicatorCache:
+    """
+    LRU memo of indicator results shared by all filters and requests.
+
+    Entries are keyed on (symbol, indicator name, normalized params) and tagged
+    with the symbol's data version. A lookup with a newer version is a miss and
+    replaces the stale entry, so ingesting candles invalidates results without
+    any explicit call.
+    """
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[IndicatorKey, Tuple[Hashable, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(symbol: str, name: str, params: Dict[str, Any]) -> IndicatorKey:
+        return symbol, name, tuple(sorted(params.items()))
+
+    def get(self, key: IndicatorKey, version: Hashable) -> Optional[Any]:
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None or record[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return record[1]
+
+    def set(self, key: IndicatorKey, version: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(
+        self,
+        symbol: str,
+        name: str,
+        params: Dict[str, Any],
+        version: Hashable,
+        compute: Callable[[], Any],
+    ) -> Any:
+        key = self.make_key(symbol, name, params)
+        value = self.get(key, version)
+        if value is None:
+            value = compute()
+            self.set(key, version, value)
+        return value
+
+    def invalidate(self, symbol: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == symbol]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache()
+def get_indicator_cache() -> IndicatorCache:
+    cache = IndicatorCache(get_settings().indicator_cache_max_entries)
+    get_metrics().register_cache("indicator", cache)
+    return cache
+
+
+def cached_indicator(
+    symbol_data: Dict[str, Any],
+    name: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Any],
+) -> Any:
+    """Memoize ``compute`` for a symbol when its data version is known."""
+    version = symbol_data.get("data_version")
+    if version is None or "symbol" not in symbol_data:
+        return compute()
+    return get_indicator_cache().get_or_compute(
+        symbol_data["symbol"], name, params, version, compute
+    )
+
+
+def cached_rows(
+    universe: UniverseBatch,
+    rows: np.ndarray,
+    name: str,
+    params: Dict[str, Any],
+    compute: Callable[[np.ndarray], Sequence[Any]],
+) -> List[Any]:
+    """
+    Batch counterpart of ``cached_indicator``: look up one result per row and
+    call ``compute`` once with the rows that missed. Rows share entries with the
+    per-symbol path through a ``length`` param (the number of real candles).
+    """
+    if universe.versions is None:
+        return list(compute(rows))
+    cache = get_indicator_cache()
+    results: List[Any] = [None] * len(rows)
+    keys = []
+    missing = []
+    for j, row in enumerate(rows):
+        key = cache.make_key(
+            universe.symbols[row], name, {**params, "length": int(universe.lengths[row])}
+        )
+        keys.append(key)
+        results[j] = cache.get(key, (universe.source, int(universe.versions[row])))
+        if results[j] is None:
+            missing.append(j)
+    if missing:
+        computed = compute(rows[missing])
+        for j, value in zip(missing, computed):
+            cache.set(keys[j], (universe.source, int(universe.versions[rows[j]])), value)
+            results[j] = value
+    return results
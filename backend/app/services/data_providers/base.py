@@ -1,8 +1,27 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.data_providers.market_store import HISTORY_FIELDS, history_arrays
+from app.services.data_providers.panel import HistoryPanel
+from app.services.data_providers.timeframes import DAILY, PERIOD_DAYS, rollup
+from app.services.data_providers.universe import UniverseBatch
+from app.services.metrics import get_metrics
+
+# History of a symbol loaded without candles (snapshot-only universes).
+EMPTY_HISTORY: Dict[str, np.ndarray] = {name: np.zeros(0) for name in HISTORY_FIELDS}
 
 
 class MarketDataProvider(ABC):
+    def __init__(self) -> None:
+        # Subscribers are added from the event loop and notified from the
+        # threads that ingest candles.
+        self._subscribers: List[Callable[[str], None]] = []
+        self._subscribers_lock = threading.Lock()
+
     @abstractmethod
     def list_symbols(self) -> List[Dict[str, Any]]:
         ...
@@ -12,5 +31,178 @@ class MarketDataProvider(ABC):
         ...
 
     @abstractmethod
-    def get_history(self, symbol: str, lookback: int = 60) -> List[Dict[str, Any]]:
+    def get_history(self, symbol: str, lookback: int = 60) -> Sequence[Dict[str, Any]]:
+        """The last ``lookback`` candles as ``{date, close, volume}`` dicts."""
         ...
+
+    def get_history_arrays(
+        self, symbol: str, lookback: int = 60, timeframe: str = DAILY
+    ) -> Dict[str, np.ndarray]:
+        """
+        Columnar history: float64 arrays keyed by ``close``, ``volume`` and ``value``,
+        of the last ``lookback`` daily candles or ``timeframe`` bars.
+
+        Providers backed by a columnar store should override this to return views
+        without building per-candle dicts. This default rolls bars up from daily
+        candles on every call.
+        """
+        if timeframe != DAILY:
+            candles = self.get_history(symbol, lookback * PERIOD_DAYS[timeframe])
+            bars = rollup(history_arrays(list(candles)), timeframe)
+            return {name: bars[name][-lookback:] for name in HISTORY_FIELDS}
+        history = self.get_history(symbol, lookback)
+        close = np.array([float(h.get("close", 0)) for h in history], dtype=np.float64)
+        volume = np.array([float(h.get("volume", 0)) for h in history], dtype=np.float64)
+        return {"close": close, "volume": volume, "value": close * volume}
+
+    def data_version(self, symbol: str) -> Optional[Hashable]:
+        """
+        Version of a symbol's data that changes whenever new candles are ingested.
+
+        ``None`` means the provider does not track versions and results derived
+        from its data must not be memoized.
+        """
+        return None
+
+    def universe_version(self) -> Optional[Hashable]:
+        """Version of the whole universe; changes whenever any symbol's data does."""
+        return None
+
+    def get_universe(
+        self,
+        lookback: int = 60,
+        symbols: Optional[Sequence[str]] = None,
+        frames: Optional[Dict[str, int]] = None,
+    ) -> UniverseBatch:
+        """
+        Load every listed symbol (or only ``symbols``, in that order) into a
+        batch for vectorized filter evaluation. ``lookback`` 0 loads snapshots
+        only. ``frames`` maps other timeframes to the number of their bars to
+        load alongside (see ``UniverseBatch.frames``).
+        """
+        metrics = get_metrics()
+        with metrics.stage("list_symbols"):
+            if symbols is None:
+                snapshots = self.list_symbols()
+            else:
+                snapshots = [self.get_snapshot(symbol) for symbol in symbols]
+        with metrics.stage("history"):
+            if lookback > 0:
+                histories = [self.get_history_arrays(s["symbol"], lookback) for s in snapshots]
+            else:
+                histories = [EMPTY_HISTORY] * len(snapshots)
+            universe = UniverseBatch.from_arrays(snapshots, histories, lookback)
+            for timeframe, bars in (frames or {}).items():
+                universe.add_frame(
+                    timeframe,
+                    [self.get_history_arrays(s["symbol"], bars, timeframe) for s in snapshots],
+                    bars,
+                )
+        return universe
+
+    def get_panel(self, days: Optional[int] = None) -> HistoryPanel:
+        """
+        Date-aligned history of every listed symbol (the last ``days`` candles,
+        or all of them), for backtesting.
+        """
+        symbols = [s["symbol"] for s in self.list_symbols()]
+        lookback = days if days is not None else 1_000_000
+        histories = [history_arrays(self.get_history(s, lookback)) for s in symbols]
+        return HistoryPanel.from_histories(symbols, histories)
+
+    def subscribe(self, callback: Callable[[str], None]) -> Callable[[], None]:
+        """
+        Call ``callback(symbol)`` after every update to a symbol's data.
+
+        Callbacks run synchronously on the updating thread. Returns a function
+        that removes the subscription.
+        """
+        with self._subscribers_lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._subscribers_lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def publish_update(self, symbol: str) -> None:
+        """Notify subscribers that ``symbol`` changed; providers call this on ingest."""
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(symbol)
+
+
+class AsyncMarketDataProvider(ABC):
+    """
+    Async provider protocol with bulk methods, for network-backed adapters.
+
+    ``get_universe`` fans symbol chunks out concurrently, bounded by a
+    semaphore, with a timeout on every bulk call.
+    """
+
+    @abstractmethod
+    async def list_symbols(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_snapshots(self, symbols: Sequence[str]) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_histories(
+        self, symbols: Sequence[str], lookback: int = 60, timeframe: str = DAILY
+    ) -> List[Dict[str, np.ndarray]]:
+        """Columnar histories (see ``MarketDataProvider.get_history_arrays``)."""
+        ...
+
+    def universe_version(self) -> Optional[Hashable]:
+        return None
+
+    async def get_universe(
+        self,
+        lookback: int = 60,
+        concurrency: int = 8,
+        timeout: Optional[float] = None,
+        batch_size: int = 100,
+        symbols: Optional[Sequence[str]] = None,
+        frames: Optional[Dict[str, int]] = None,
+    ) -> UniverseBatch:
+        if symbols is None:
+            symbols = [s["symbol"] for s in await self.list_symbols()]
+        frames = frames or {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def no_history(chunk: List[str]) -> List[Dict[str, np.ndarray]]:
+            return [EMPTY_HISTORY] * len(chunk)
+
+        async def fetch(chunk: List[str]):
+            histories = (
+                self.get_histories(chunk, lookback) if lookback > 0 else no_history(chunk)
+            )
+            bars = [
+                self.get_histories(chunk, count, timeframe=timeframe)
+                for timeframe, count in frames.items()
+            ]
+            async with semaphore:
+                return await asyncio.wait_for(
+                    asyncio.gather(self.get_snapshots(chunk), histories, *bars), timeout
+                )
+
+        chunks = [symbols[i : i + batch_size] for i in range(0, len(symbols), batch_size)]
+        snapshots: List[Dict[str, Any]] = []
+        histories: List[Dict[str, np.ndarray]] = []
+        frame_histories: List[List[Dict[str, np.ndarray]]] = [[] for _ in frames]
+        for chunk_snapshots, chunk_histories, *chunk_bars in await asyncio.gather(
+            *(fetch(chunk) for chunk in chunks)
+        ):
+            snapshots.extend(chunk_snapshots)
+            histories.extend(chunk_histories)
+            for loaded, bars in zip(frame_histories, chunk_bars):
+                loaded.extend(bars)
+        universe = UniverseBatch.from_arrays(snapshots, histories, lookback)
+        for (timeframe, count), loaded in zip(frames.items(), frame_histories):
+            universe.add_frame(timeframe, loaded, count)
+        return universe
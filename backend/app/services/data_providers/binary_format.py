@@ -0,0 +1,152 @@
+"""
+Compact on-disk candle format, read through ``np.memmap``.
+
+Layout (little-endian, every section 8-byte aligned)::
+
+    header    magic "BSCH", schema version u32, symbols u64, candles u64,
+              metadata length u64
+    metadata  UTF-8 JSON: symbol, company_name and last_updated per row
+    offsets   int64[symbols + 1], candle range of each symbol
+    snapshot  float64[symbols] per SNAPSHOT_FIELDS column
+    history   int64[candles] dates (datetime64[us]), then float64[candles] per
+              HISTORY_FIELDS column
+
+Convert the JSON seed with::
+
+    python -m app.services.data_providers.binary_format seed/symbols_seed.json seed/symbols.bin
+"""
+
+import argparse
+import hashlib
+import json
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Union
+
+import numpy as np
+
+from app.services.data_providers.market_store import (
+    HISTORY_FIELDS,
+    SNAPSHOT_FIELDS,
+    MarketDataStore,
+    history_arrays,
+)
+
+MAGIC = b"BSCH"
+SCHEMA_VERSION = 1
+_HEADER = struct.Struct("<4sIQQQ")
+
+
+def write_binary(records: Iterable[Dict[str, Any]], path: Union[str, Path]) -> None:
+    records = list(records)
+    histories = [history_arrays(r.get("history", [])) for r in records]
+    lengths = np.array([len(h["close"]) for h in histories], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    metadata = json.dumps(
+        [
+            {
+                "symbol": r["symbol"],
+                "company_name": r["company_name"],
+                "last_updated": r["last_updated"],
+            }
+            for r in records
+        ],
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    with Path(path).open("wb") as f:
+        f.write(
+            _HEADER.pack(
+                MAGIC, SCHEMA_VERSION, len(records), int(offsets[-1]), len(metadata)
+            )
+        )
+        f.write(metadata + b"\0" * _padding(len(metadata)))
+        f.write(offsets.tobytes())
+        for field in SNAPSHOT_FIELDS:
+            column = np.array([float(r.get(field) or 0) for r in records], dtype="<f8")
+            f.write(column.tobytes())
+        dates = [h["date"].astype("datetime64[us]").astype("<i8") for h in histories]
+        f.write(_concat(dates, "<i8").tobytes())
+        for field in HISTORY_FIELDS:
+            f.write(_concat([h[field] for h in histories], "<f8").tobytes())
+
+
+def read_binary(path: Union[str, Path]) -> MarketDataStore:
+    """
+    Map a binary candle file into a ``MarketDataStore``. Histories are views
+    into the read-only mapping; appending a candle copies that symbol's buffer.
+    """
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    header = _HEADER.unpack_from(raw[: _HEADER.size])
+    magic, version, n_symbols, n_candles, meta_len = header
+    if magic != MAGIC:
+        raise ValueError(f"Not a binary candle file: {path}")
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported candle file schema version {version}: {path}")
+
+    position = _HEADER.size
+    metadata = json.loads(bytes(raw[position : position + meta_len]).decode("utf-8"))
+    position += meta_len + _padding(meta_len)
+
+    def section(dtype: str, count: int) -> np.ndarray:
+        nonlocal position
+        size = np.dtype(dtype).itemsize * count
+        array = raw[position : position + size].view(dtype)
+        position += size
+        return array
+
+    offsets = section("<i8", n_symbols + 1)
+    columns = {field: section("<f8", n_symbols) for field in SNAPSHOT_FIELDS}
+    dates = section("<i8", n_candles).view("datetime64[us]")
+    history_columns = {field: section("<f8", n_candles) for field in HISTORY_FIELDS}
+
+    histories: List[Dict[str, np.ndarray]] = []
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        series = {"date": dates[start:stop]}
+        series.update({field: col[start:stop] for field, col in history_columns.items()})
+        histories.append(series)
+    return MarketDataStore(
+        symbols=[m["symbol"] for m in metadata],
+        company_names=[m["company_name"] for m in metadata],
+        last_updated=[datetime.fromisoformat(m["last_updated"]) for m in metadata],
+        # Snapshot columns are small; copy them so the store can update them.
+        snapshot_columns={field: np.array(col) for field, col in columns.items()},
+        histories=histories,
+        # Identified by the file rather than by hashing its contents, so
+        # mapping it stays cheap.
+        uid=_file_uid(Path(path)),
+    )
+
+
+def _file_uid(path: Path) -> str:
+    stat = path.stat()
+    source = f"{path.resolve()}\0{stat.st_mtime_ns}\0{stat.st_size}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+def _concat(arrays: List[np.ndarray], dtype: str) -> np.ndarray:
+    if not arrays:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(arrays).astype(dtype)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert the JSON seed to the binary candle format"
+    )
+    parser.add_argument("source", help="JSON seed file (list of symbols with history)")
+    parser.add_argument("target", help="output .bin file")
+    args = parser.parse_args()
+    with open(args.source, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    write_binary(records, args.target)
+    print(f"Wrote {len(records)} symbols to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
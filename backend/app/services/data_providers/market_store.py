@@ -0,0 +1,351 @@
+import hashlib
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+import numpy as np
+
+from app.services.data_providers.rolling import ROLLING_WINDOWS, RollingStats
+from app.services.data_providers.timeframes import DAILY, period_keys, rollup
+
+SNAPSHOT_FIELDS = ("last_price", "volume", "trade_value", "percent_change")
+HISTORY_FIELDS = ("close", "volume", "value")
+# Keys of the per-candle dicts of the record form of history.
+RECORD_FIELDS = ("date", "close", "volume")
+
+
+class MarketDataStore:
+    """
+    Columnar in-memory market data.
+
+    Snapshot fields are kept as one float64 column per field, indexed by row. Each
+    symbol's history is held as contiguous float64 arrays (close, volume and
+    value = close * volume) plus a datetime64 column, so callers get zero-copy
+    views instead of one dict per candle. History buffers grow geometrically so
+    appending a candle is amortized O(1); every append bumps the symbol's
+    ``versions`` entry and the store-wide ``version``.
+
+    Weekly and monthly bars (see ``timeframes``) are rolled up from a symbol's
+    candles the first time they are read and then kept up to date on every
+    append: a candle in the period of the last bar updates that bar in place,
+    any other starts a new bar.
+
+    Rolling volume and value statistics (see ``rolling``) are likewise
+    computed for every symbol on first read and then updated by each append.
+
+    ``uid`` identifies the data the store was loaded from and, with
+    ``version``, goes into data versions and ETags, so it must be the same in
+    every process loading that data. It defaults to a hash of the contents.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        company_names: Sequence[str],
+        last_updated: Sequence[datetime],
+        snapshot_columns: Dict[str, np.ndarray],
+        histories: Sequence[Dict[str, np.ndarray]],
+        uid: Optional[str] = None,
+    ) -> None:
+        self.symbols: List[str] = list(symbols)
+        self.company_names: List[str] = list(company_names)
+        self.last_updated: List[datetime] = list(last_updated)
+        self.columns: Dict[str, np.ndarray] = snapshot_columns
+        self.index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        self.versions = np.zeros(len(self.symbols), dtype=np.int64)
+        self.version = 0
+        self._buffers: List[Dict[str, np.ndarray]] = list(histories)
+        self._lengths: List[int] = [len(h["close"]) for h in histories]
+        self.uid = uid or self._content_hash()
+        # Per row: rolled-up bar buffers and their lengths, by timeframe.
+        self._rollups: List[Dict[str, Dict[str, np.ndarray]]] = [{} for _ in histories]
+        self._rollup_lengths: List[Dict[str, int]] = [{} for _ in histories]
+        self.rolling_windows: Tuple[int, ...] = ROLLING_WINDOWS
+        self._rolling: Optional[RollingStats] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "MarketDataStore":
+        records = list(records)
+        columns = {
+            field: np.array([float(r.get(field) or 0) for r in records], dtype=np.float64)
+            for field in SNAPSHOT_FIELDS
+        }
+        histories = [history_arrays(r.get("history", [])) for r in records]
+        return cls(
+            symbols=[r["symbol"] for r in records],
+            company_names=[r["company_name"] for r in records],
+            last_updated=[datetime.fromisoformat(r["last_updated"]) for r in records],
+            snapshot_columns=columns,
+            histories=histories,
+        )
+
+    def _content_hash(self) -> str:
+        digest = hashlib.sha256()
+        for row, symbol in enumerate(self.symbols):
+            updated = self.last_updated[row].isoformat()
+            digest.update(f"{symbol}\0{self.company_names[row]}\0{updated}\0".encode("utf-8"))
+        for name in SNAPSHOT_FIELDS:
+            digest.update(np.ascontiguousarray(self.columns[name]).tobytes())
+        for row in range(len(self.symbols)):
+            for name, values in sorted(self.series(row).items()):
+                digest.update(name.encode("utf-8"))
+                digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()[:32]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def row(self, symbol: str) -> int:
+        try:
+            return self.index[symbol]
+        except KeyError:
+            raise ValueError(f"Symbol not found: {symbol}") from None
+
+    def snapshot(self, row: int) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbols[row],
+            "company_name": self.company_names[row],
+            "last_price": float(self.columns["last_price"][row]),
+            "volume": float(self.columns["volume"][row]),
+            "trade_value": float(self.columns["trade_value"][row]),
+            "percent_change": float(self.columns["percent_change"][row]),
+            "last_updated": self.last_updated[row],
+        }
+
+    def series(self, row: int, timeframe: str = DAILY) -> Dict[str, np.ndarray]:
+        """Views over the full stored history of a symbol, in ``timeframe`` bars."""
+        if timeframe == DAILY:
+            buffers, length = self._buffers[row], self._lengths[row]
+        else:
+            if timeframe not in self._rollups[row]:
+                bars = rollup(self.series(row), timeframe)
+                self._rollups[row][timeframe] = bars
+                self._rollup_lengths[row][timeframe] = len(bars["close"])
+            buffers = self._rollups[row][timeframe]
+            length = self._rollup_lengths[row][timeframe]
+        return {name: values[:length] for name, values in buffers.items()}
+
+    def history(
+        self, row: int, lookback: Optional[int] = None, timeframe: str = DAILY
+    ) -> Dict[str, np.ndarray]:
+        """Return views over the last ``lookback`` candles (or bars) of a symbol."""
+        series = self.series(row, timeframe)
+        if lookback is None:
+            return series
+        if lookback <= 0:
+            return {name: values[:0] for name, values in series.items()}
+        return {name: values[-lookback:] for name, values in series.items()}
+
+    def history_length(self, row: int, timeframe: str = DAILY) -> int:
+        if timeframe == DAILY:
+            return self._lengths[row]
+        return len(self.series(row, timeframe)["close"])
+
+    def set_rolling_windows(self, windows: Sequence[int]) -> None:
+        """Windows of ``rolling_stats``; recomputed on the next read."""
+        self.rolling_windows = tuple(sorted({int(w) for w in windows if int(w) > 0}))
+        self._rolling = None
+
+    def rolling_stats(self, rows: Optional[Sequence[int]] = None) -> RollingStats:
+        """Copy of the rolling statistics of ``rows`` (all symbols by default)."""
+        if self._rolling is None:
+            self._rolling = RollingStats.from_histories(
+                [self.series(row) for row in range(len(self.symbols))], self.rolling_windows
+            )
+        return self._rolling.take(np.arange(len(self.symbols)) if rows is None else rows)
+
+    def append_candle(self, row: int, date: Any, close: float, volume: float) -> None:
+        date = np.datetime64(date, "us")
+        buffers = self._buffers[row]
+        self._lengths[row] = _append(buffers, self._lengths[row], date, close, volume)
+        lengths = self._rollup_lengths[row]
+        for timeframe, bars in self._rollups[row].items():
+            length = lengths[timeframe]
+            last = length - 1
+            if length and _same_period(bars["date"][last], date, timeframe):
+                bars["date"][last] = date
+                bars["close"][last] = close
+                bars["volume"][last] += volume
+                bars["value"][last] += close * volume
+            else:
+                lengths[timeframe] = _append(bars, length, date, close, volume)
+        if self._rolling is not None:
+            self._rolling.push(row, self.series(row))
+        self.versions[row] += 1
+        self.version += 1
+
+    def truncate(self, row: int, length: int) -> None:
+        """Keep only the first ``length`` candles of a symbol (copied, so writable)."""
+        length = max(0, min(length, self._lengths[row]))
+        self._buffers[row] = {
+            name: np.array(values[:length]) for name, values in self._buffers[row].items()
+        }
+        self._lengths[row] = length
+        self._rollups[row].clear()
+        self._rollup_lengths[row].clear()
+        if self._rolling is not None:
+            self._rolling.refresh(row, self.series(row))
+        self.versions[row] += 1
+        self.version += 1
+
+    def set_snapshot(
+        self, row: int, values: Dict[str, float], last_updated: Optional[datetime] = None
+    ) -> None:
+        for name, value in values.items():
+            if name not in SNAPSHOT_FIELDS:
+                raise ValueError(f"Unknown snapshot field: {name}")
+            self.columns[name][row] = value
+        if last_updated is not None:
+            self.last_updated[row] = last_updated
+        self.versions[row] += 1
+        self.version += 1
+
+    def matrix(
+        self,
+        field: str,
+        lookback: int,
+        rows: Optional[Sequence[int]] = None,
+        timeframe: str = DAILY,
+    ) -> np.ndarray:
+        """
+        Stack the last ``lookback`` values of ``field`` into a (symbols x lookback)
+        float64 matrix. Rows are right-aligned on the latest candle (or
+        ``timeframe`` bar) and left-padded with NaN for symbols with shorter
+        history.
+        """
+        if field not in HISTORY_FIELDS:
+            raise ValueError(f"Unknown history field: {field}")
+        rows = range(len(self.symbols)) if rows is None else rows
+        out = np.full((len(rows), max(lookback, 0)), np.nan, dtype=np.float64)
+        if lookback <= 0:
+            return out
+        for i, row in enumerate(rows):
+            values = self.history(row, lookback, timeframe)[field]
+            if len(values):
+                out[i, lookback - len(values) :] = values
+        return out
+
+
+def _append(
+    buffers: Dict[str, np.ndarray],
+    length: int,
+    date: np.datetime64,
+    close: float,
+    volume: float,
+) -> int:
+    """Write a candle after the first ``length`` of ``buffers``, growing them; new length."""
+    if length == len(buffers["close"]):
+        capacity = max(16, length * 2)
+        for name, values in buffers.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:length] = values[:length]
+            buffers[name] = grown
+    buffers["date"][length] = date
+    buffers["close"][length] = close
+    buffers["volume"][length] = volume
+    buffers["value"][length] = close * volume
+    return length + 1
+
+
+def _same_period(first: np.datetime64, second: np.datetime64, timeframe: str) -> bool:
+    keys = period_keys(np.array([first, second], dtype="datetime64[us]"), timeframe)
+    return bool(keys[0] == keys[1])
+
+
+def history_arrays(history: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    close = np.array([float(h.get("close", 0)) for h in history], dtype=np.float64)
+    volume = np.array([float(h.get("volume", 0)) for h in history], dtype=np.float64)
+    return {
+        "date": np.array([h["date"] for h in history], dtype="datetime64[us]"),
+        "close": close,
+        "volume": volume,
+        "value": close * volume,
+    }
+
+
+def history_records(series: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Expand array history back into the ``{date, close, volume}`` dict form."""
+    return list(HistoryView(series))
+
+
+class HistoryView(Sequence[Dict[str, Any]]):
+    """
+    History in the ``{date, close, volume}`` record form, as a read-only view
+    over the arrays of ``series``.
+
+    Candle dicts are built only when accessed, and slicing (``view[-n:]``)
+    returns another view over the same arrays, so handing out any lookback
+    copies nothing. ``fields`` picks the keys of each candle. Like the array
+    views, a view keeps showing the candles it was created over after new ones
+    are appended to the store.
+    """
+
+    __slots__ = ("_columns", "_length")
+
+    def __init__(
+        self, series: Dict[str, np.ndarray], fields: Sequence[str] = RECORD_FIELDS
+    ) -> None:
+        self._columns = {name: series[name] for name in fields}
+        self._length = len(self._columns[fields[0]]) if fields else 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "HistoryView":
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], "HistoryView"]:
+        if isinstance(index, slice):
+            return HistoryView(
+                {name: values[index] for name, values in self._columns.items()},
+                tuple(self._columns),
+            )
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history index out of range")
+        return {name: _scalar(values[index]) for name, values in self._columns.items()}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        names = tuple(self._columns)
+        columns = [_values(values) for values in self._columns.values()]
+        for candle in zip(*columns):
+            yield dict(zip(names, candle))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(other) == self._length and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"HistoryView({self._length} candles, fields={tuple(self._columns)})"
+
+
+def _values(values: np.ndarray) -> List[Any]:
+    if values.dtype.kind == "M":
+        return np.datetime_as_string(values, unit="us").tolist()
+    return values.tolist()
+
+
+def _scalar(value: Any) -> Any:
+    if isinstance(value, np.datetime64):
+        return str(np.datetime_as_string(value, unit="us"))
+    return value.item()
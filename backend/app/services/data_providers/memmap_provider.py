@@ -0,0 +1,22 @@
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import get_settings
+from app.services.data_providers.binary_format import read_binary
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+
+
+class MemmapMarketDataProvider(MockMarketDataProvider):
+    """
+    Mock provider backed by a memory-mapped binary candle file instead of JSON.
+
+    Startup only maps the file, and every worker process shares the same pages
+    through the OS page cache.
+    """
+
+    def __init__(self, data_file: Optional[str] = None) -> None:
+        path = Path(data_file or get_settings().market_data_binary_file)
+        if not path.exists():
+            raise FileNotFoundError(f"Binary market data file missing: {path}")
+        super().__init__(store=read_binary(path))
+        self.data_file = path
@@ -1,20 +1,36 @@
+import asyncio
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from app.core.config import get_settings
 from app.services.cache.cache import TTLCache
 from app.services.data_providers.base import MarketDataProvider
+from app.services.data_providers.market_store import (
+    HISTORY_FIELDS,
+    HistoryView,
+    MarketDataStore,
+)
+from app.services.data_providers.panel import HistoryPanel
+from app.services.data_providers.timeframes import DAILY
+from app.services.data_providers.universe import UniverseBatch
+from app.services.metrics import get_metrics
 
 
 class MockMarketDataProvider(MarketDataProvider):
-    def __init__(self) -> None:
+    def __init__(self, store: Optional[MarketDataStore] = None) -> None:
+        super().__init__()
         settings = get_settings()
         self.data_file = Path(settings.mock_data_file)
-        self.snapshot_cache = TTLCache(settings.cache_ttl_seconds)
-        self.history_cache = TTLCache(settings.cache_ttl_seconds)
-        self._data = self._load_data()
+        self.snapshot_cache = TTLCache(
+            settings.cache_ttl_seconds, max_entries=settings.cache_max_entries
+        )
+        self.store = store or MarketDataStore.from_records(self._load_data())
+        self.store.set_rolling_windows(settings.rolling_windows)
+        get_metrics().register_cache("snapshot", self.snapshot_cache)
 
     def _load_data(self) -> List[Dict[str, Any]]:
         if not self.data_file.exists():
@@ -23,46 +39,175 @@ class MockMarketDataProvider(MarketDataProvider):
             return json.load(f)
 
     def list_symbols(self) -> List[Dict[str, Any]]:
-        return [
-            {
-                "symbol": item["symbol"],
-                "company_name": item["company_name"],
-                "last_price": item["last_price"],
-                "volume": item["volume"],
-                "trade_value": item["trade_value"],
-                "percent_change": item["percent_change"],
-                "last_updated": datetime.fromisoformat(item["last_updated"]),
-            }
-            for item in self._data
-        ]
+        return [self.store.snapshot(row) for row in range(len(self.store))]
 
     def get_snapshot(self, symbol: str) -> Dict[str, Any]:
-        cached = self.snapshot_cache.get(symbol)
-        if cached:
-            return cached
-        match = next((item for item in self._data if item["symbol"] == symbol), None)
-        if not match:
-            raise ValueError(f"Symbol not found: {symbol}")
-        snapshot = {
-            "symbol": match["symbol"],
-            "company_name": match["company_name"],
-            "last_price": match["last_price"],
-            "volume": match["volume"],
-            "trade_value": match["trade_value"],
-            "percent_change": match["percent_change"],
-            "last_updated": datetime.fromisoformat(match["last_updated"]),
-        }
-        self.snapshot_cache.set(symbol, snapshot)
-        return snapshot
-
-    def get_history(self, symbol: str, lookback: int = 60) -> List[Dict[str, Any]]:
-        cache_key = f"{symbol}:{lookback}"
-        cached = self.history_cache.get(cache_key)
-        if cached:
-            return cached
-        match = next((item for item in self._data if item["symbol"] == symbol), None)
-        if not match:
-            raise ValueError(f"Symbol not found: {symbol}")
-        history = match.get("history", [])[-lookback:]
-        self.history_cache.set(cache_key, history)
-        return history
+        return self.snapshot_cache.get_or_load(
+            symbol, lambda: self.store.snapshot(self.store.row(symbol))
+        )
+
+    def get_history(self, symbol: str, lookback: int = 60) -> HistoryView:
+        # A view over the store's buffer: nothing is copied or cached per lookback.
+        return HistoryView(self.store.history(self.store.row(symbol), lookback))
+
+    def get_history_arrays(
+        self, symbol: str, lookback: int = 60, timeframe: str = DAILY
+    ) -> Dict[str, np.ndarray]:
+        return self.store.history(self.store.row(symbol), lookback, timeframe)
+
+    def data_version(self, symbol: str) -> Optional[Tuple[str, int]]:
+        return self.store.uid, int(self.store.versions[self.store.row(symbol)])
+
+    def universe_version(self) -> Optional[str]:
+        return f"{self.store.uid}:{self.store.version}"
+
+    def get_panel(self, days: Optional[int] = None) -> HistoryPanel:
+        store = self.store
+        return HistoryPanel.from_histories(
+            store.symbols, [store.history(row, days) for row in range(len(store))]
+        )
+
+    def ingest_candle(
+        self,
+        symbol: str,
+        candle: Dict[str, Any],
+        snapshot: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Append a closed candle to a symbol's history, optionally replacing its
+        snapshot fields, and notify subscribers.
+        """
+        row = self.store.row(symbol)
+        self.store.append_candle(
+            row, candle["date"], float(candle["close"]), float(candle.get("volume", 0))
+        )
+        if snapshot is not None:
+            self.store.set_snapshot(row, snapshot, _as_datetime(candle["date"]))
+            self.snapshot_cache.delete(symbol)
+        self.publish_update(symbol)
+
+    def replay(self, warmup: int = 30) -> "HistoryReplay":
+        """
+        Rewind every symbol to its first ``warmup`` candles and return a feed
+        that ingests the remaining candles again in date order, to simulate a
+        live market offline.
+        """
+        store = self.store
+        candles: List[Tuple[np.datetime64, str, Dict[str, Any]]] = []
+        for row, symbol in enumerate(store.symbols):
+            series = store.series(row)
+            dates = np.datetime_as_string(series["date"], unit="us")
+            closes = series["close"].tolist()
+            volumes = series["volume"].tolist()
+            for i in range(warmup, len(closes)):
+                candle = {"date": str(dates[i]), "close": closes[i], "volume": volumes[i]}
+                candles.append((series["date"][i], symbol, candle))
+            store.truncate(row, warmup)
+            kept = store.series(row)
+            if len(kept["close"]):
+                store.set_snapshot(
+                    row,
+                    candle_snapshot(kept["close"][-2:], float(kept["volume"][-1])),
+                    _as_datetime(kept["date"][-1]),
+                )
+        self.snapshot_cache.clear()
+        candles.sort(key=lambda item: (item[0], item[1]))
+        return HistoryReplay(self, [(symbol, candle) for _, symbol, candle in candles])
+
+    def get_universe(
+        self,
+        lookback: int = 60,
+        symbols: Optional[Sequence[str]] = None,
+        frames: Optional[Dict[str, int]] = None,
+    ) -> UniverseBatch:
+        store = self.store
+        metrics = get_metrics()
+        with metrics.stage("list_symbols"):
+            if symbols is None:
+                rows = np.arange(len(store))
+                snapshot = dict(store.columns)
+            else:
+                rows = np.array([store.row(symbol) for symbol in symbols], dtype=np.intp)
+                snapshot = {name: column[rows] for name, column in store.columns.items()}
+            names = [store.symbols[row] for row in rows]
+
+        def batch(timeframe: str, bars: int, rolling: bool = False) -> UniverseBatch:
+            lengths = [store.history_length(row, timeframe) for row in rows]
+            return UniverseBatch(
+                symbols=names,
+                snapshot=snapshot,
+                history={
+                    name: store.matrix(name, bars, rows, timeframe) for name in HISTORY_FIELDS
+                },
+                lengths=np.minimum(np.array(lengths, dtype=np.intp), max(bars, 0)),
+                lookback=bars,
+                versions=store.versions[rows],
+                source=store.uid,
+                rolling=store.rolling_stats(rows) if rolling else None,
+            )
+
+        with metrics.stage("history"):
+            # Rolling statistics summarize history, so only batches with history
+            # carry them.
+            universe = batch(DAILY, lookback, rolling=lookback > 0)
+            for timeframe, bars in (frames or {}).items():
+                universe.frames[timeframe] = batch(timeframe, bars)
+        return universe
+
+
+class HistoryReplay:
+    """Simulated feed over candles captured by ``MockMarketDataProvider.replay``."""
+
+    def __init__(
+        self, provider: MockMarketDataProvider, candles: List[Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        self.provider = provider
+        self.candles = candles
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.candles) - self.position
+
+    def step(self) -> List[str]:
+        """Ingest every candle of the next date and return the updated symbols."""
+        if self.position >= len(self.candles):
+            return []
+        date = self.candles[self.position][1]["date"]
+        updated = []
+        while self.position < len(self.candles):
+            symbol, candle = self.candles[self.position]
+            if candle["date"] != date:
+                break
+            row = self.provider.store.row(symbol)
+            previous = self.provider.store.series(row)["close"][-1:]
+            self.provider.ingest_candle(
+                symbol,
+                candle,
+                candle_snapshot(
+                    np.append(previous, candle["close"]), float(candle["volume"])
+                ),
+            )
+            updated.append(symbol)
+            self.position += 1
+        return updated
+
+    async def run(self, interval: float) -> None:
+        """Step through the feed, one date every ``interval`` seconds."""
+        while self.step():
+            await asyncio.sleep(interval)
+
+
+def candle_snapshot(closes: np.ndarray, volume: float) -> Dict[str, float]:
+    """Snapshot fields for a day closing at ``closes[-1]`` (previous close first)."""
+    close = float(closes[-1])
+    previous = float(closes[0]) if len(closes) > 1 else close
+    return {
+        "last_price": close,
+        "volume": volume,
+        "trade_value": close * volume,
+        "percent_change": round((close / previous - 1) * 100, 2) if previous else 0.0,
+    }
+
+
+def _as_datetime(value: Any) -> datetime:
+    return np.datetime64(value, "us").astype(datetime)
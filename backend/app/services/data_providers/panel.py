@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.data_providers.market_store import HISTORY_FIELDS
+from app.services.data_providers.timeframes import period_keys
+from app.services.data_providers.universe import UniverseBatch
+
+
+@dataclass
+class HistoryPanel:
+    """
+    Date-aligned history of many symbols, used for backtesting.
+
+    ``history`` holds one (dates x symbols) float64 matrix per history field,
+    with NaN where a symbol has no candle on that date. At date ``t`` a filter
+    sees the candle of ``t`` as its snapshot and earlier candles as history.
+    """
+
+    symbols: List[str]
+    dates: np.ndarray
+    history: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def from_histories(
+        cls, symbols: Sequence[str], histories: Sequence[Dict[str, np.ndarray]]
+    ) -> "HistoryPanel":
+        """Align per-symbol history arrays (with a ``date`` column) on their union of dates."""
+        dates = np.unique(
+            np.concatenate(
+                [h["date"].astype("datetime64[us]") for h in histories]
+                or [np.array([], dtype="datetime64[us]")]
+            )
+        )
+        history = {
+            name: np.full((len(dates), len(symbols)), np.nan) for name in HISTORY_FIELDS
+        }
+        for column, series in enumerate(histories):
+            rows = np.searchsorted(dates, series["date"].astype("datetime64[us]"))
+            for name in HISTORY_FIELDS:
+                history[name][rows, column] = series[name]
+        return cls(symbols=list(symbols), dates=dates, history=history)
+
+    def candle_counts(self) -> np.ndarray:
+        """Number of candles each symbol has strictly before every date."""
+        valid = ~np.isnan(self.history["close"])
+        counts = np.zeros(valid.shape, dtype=np.intp)
+        counts[1:] = np.cumsum(valid, axis=0)[:-1]
+        return counts
+
+    def trailing_sum(self, field: str, window: int) -> np.ndarray:
+        """
+        Sum of ``field`` over the ``window`` dates before each date; NaN unless
+        all of them have a candle.
+        """
+        values = self.history[field]
+        valid = ~np.isnan(values)
+        sums = np.zeros((len(values) + 1, values.shape[1]))
+        counts = np.zeros((len(values) + 1, values.shape[1]), dtype=np.intp)
+        np.cumsum(np.where(valid, values, 0.0), axis=0, out=sums[1:])
+        np.cumsum(valid, axis=0, out=counts[1:])
+        result = np.full(values.shape, np.nan)
+        if window <= 0 or window > len(values):
+            return result
+        window_sums = sums[window:-1] - sums[:-window - 1]
+        window_counts = counts[window:-1] - counts[:-window - 1]
+        result[window:] = np.where(window_counts == window, window_sums, np.nan)
+        return result
+
+    def universe_at(
+        self, t: int, lookback: int, frames: Optional[Dict[str, int]] = None
+    ) -> UniverseBatch:
+        """
+        The ``UniverseBatch`` a screen would see at date ``t``: that date's candle
+        as snapshot and up to ``lookback`` earlier dates as history, plus the
+        last ``frames[timeframe]`` bars rolled up from those earlier dates.
+        """
+        close = self.history["close"][t]
+        volume = self.history["volume"][t]
+        value = self.history["value"][t]
+        start = max(0, t - lookback)
+        history = {}
+        for name in HISTORY_FIELDS:
+            window = np.full((len(self.symbols), lookback), np.nan)
+            if t > start:
+                window[:, lookback - (t - start) :] = self.history[name][start:t].T
+            history[name] = window
+        previous = np.full(len(self.symbols), np.nan)
+        if t > 0:
+            previous = self.history["close"][t - 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent_change = (close / previous - 1) * 100
+        universe = UniverseBatch(
+            symbols=self.symbols,
+            snapshot={
+                "last_price": np.nan_to_num(close),
+                "volume": np.nan_to_num(volume),
+                "trade_value": np.nan_to_num(value),
+                "percent_change": np.nan_to_num(percent_change, posinf=0.0, neginf=0.0),
+            },
+            history=history,
+            lengths=(~np.isnan(history["close"])).sum(axis=1).astype(np.intp),
+            lookback=lookback,
+        )
+        for timeframe, frame_lookback in (frames or {}).items():
+            history = self._bars_before(t, timeframe, frame_lookback)
+            universe.frames[timeframe] = UniverseBatch(
+                symbols=self.symbols,
+                snapshot=universe.snapshot,
+                history=history,
+                lengths=(~np.isnan(history["close"])).sum(axis=1).astype(np.intp),
+                lookback=frame_lookback,
+            )
+        return universe
+
+    def _bars_before(self, t: int, timeframe: str, lookback: int) -> Dict[str, np.ndarray]:
+        """
+        (symbols x lookback) matrices of the last ``lookback`` ``timeframe``
+        periods before date ``t`` (see ``timeframes.rollup``); NaN for periods
+        in which a symbol has no candle.
+        """
+        history = {
+            name: np.full((len(self.symbols), lookback), np.nan) for name in HISTORY_FIELDS
+        }
+        if t == 0 or lookback <= 0:
+            return history
+        keys = period_keys(self.dates[:t], timeframe)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])[-lookback:]
+        first = starts[0]
+        starts = starts - first
+        close = self.history["close"][first:t]
+        valid = ~np.isnan(close)
+        # Last candle of every period: the running index of the latest valid
+        # row, read at each period's end; periods without one are dropped below.
+        latest = np.maximum.accumulate(
+            np.where(valid, np.arange(len(close))[:, None], 0), axis=0
+        )
+        ends = np.r_[starts[1:], len(close)] - 1
+        has_bar = np.add.reduceat(valid, starts, axis=0) > 0
+        bars = {
+            "close": np.take_along_axis(close, latest[ends], axis=0),
+            **{
+                name: np.add.reduceat(
+                    np.where(valid, self.history[name][first:t], 0.0), starts, axis=0
+                )
+                for name in ("volume", "value")
+            },
+        }
+        for name, values in bars.items():
+            history[name][:, lookback - len(starts) :] = np.where(has_bar, values, np.nan).T
+        return history
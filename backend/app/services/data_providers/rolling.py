@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+# History fields with rolling statistics.
+ROLLING_FIELDS = ("volume", "value")
+# Standard windows (daily candles) of the rolling statistics.
+ROLLING_WINDOWS = (5, 10, 20, 60)
+# Variances this small relative to the squared mean are rounding noise of the
+# running sums, reported as zero.
+_RELATIVE_VARIANCE_NOISE = 1e-12
+
+
+@dataclass
+class RollingStats:
+    """
+    Running sums and sums of squares of ``volume`` and ``value`` over the last
+    ``windows`` candles of each symbol, so the mean, standard deviation and
+    z-score of any of those windows cost O(1) per symbol.
+
+    ``sums`` and ``squares`` hold one (symbols x windows) matrix per field, and
+    ``counts`` the number of candles in each window; statistics of windows
+    that are not full yet are NaN. ``push`` accounts for an appended candle by
+    adding it and subtracting the one that left the window.
+    """
+
+    windows: Tuple[int, ...]
+    sums: Dict[str, np.ndarray]
+    squares: Dict[str, np.ndarray]
+    counts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @classmethod
+    def from_histories(
+        cls, histories: Sequence[Dict[str, np.ndarray]], windows: Sequence[int]
+    ) -> "RollingStats":
+        windows = tuple(windows)
+        stats = cls(
+            windows=windows,
+            sums={name: np.zeros((len(histories), len(windows))) for name in ROLLING_FIELDS},
+            squares={
+                name: np.zeros((len(histories), len(windows))) for name in ROLLING_FIELDS
+            },
+            counts=np.zeros((len(histories), len(windows)), dtype=np.intp),
+        )
+        for row, series in enumerate(histories):
+            stats.refresh(row, series)
+        return stats
+
+    def has(self, window: int) -> bool:
+        return window in self.windows
+
+    def take(self, indices: Sequence[int]) -> "RollingStats":
+        indices = np.asarray(indices, dtype=np.intp)
+        return RollingStats(
+            windows=self.windows,
+            sums={name: matrix[indices] for name, matrix in self.sums.items()},
+            squares={name: matrix[indices] for name, matrix in self.squares.items()},
+            counts=self.counts[indices],
+        )
+
+    def refresh(self, row: int, series: Dict[str, np.ndarray]) -> None:
+        """Re-sum the windows of ``row`` from its full history ``series``."""
+        for name in ROLLING_FIELDS:
+            for j, window in enumerate(self.windows):
+                values = series[name][-window:]
+                self.sums[name][row, j] = values.sum()
+                self.squares[name][row, j] = np.dot(values, values)
+        self.counts[row] = np.minimum(len(series["close"]), self.windows)
+
+    def push(self, row: int, series: Dict[str, np.ndarray]) -> None:
+        """Account for the last candle of ``series``, just appended to ``row``."""
+        length = len(series["close"])
+        if length % max(self.windows, default=1) == 0:
+            # Re-summed exactly now and then, so rounding errors cannot build up.
+            self.refresh(row, series)
+            return
+        leaving = length - 1 - np.array(self.windows, dtype=np.intp)
+        for name in ROLLING_FIELDS:
+            values = series[name]
+            old = np.where(leaving >= 0, values[np.maximum(leaving, 0)], 0.0)
+            new = values[-1]
+            self.sums[name][row] += new - old
+            self.squares[name][row] += new * new - old * old
+        self.counts[row] = np.minimum(length, self.windows)
+
+    def mean(self, field: str, window: int) -> np.ndarray:
+        j = self._column(window)
+        mean = self.sums[field][:, j] / window
+        mean[self.counts[:, j] < window] = np.nan
+        return mean
+
+    def std(self, field: str, window: int) -> np.ndarray:
+        """Population standard deviation of each symbol's last ``window`` values."""
+        mean = self.mean(field, window)
+        variance = self.squares[field][:, self._column(window)] / window - mean * mean
+        variance[variance <= _RELATIVE_VARIANCE_NOISE * mean * mean] = 0.0
+        return np.sqrt(variance)
+
+    def zscore(self, field: str, window: int, values: np.ndarray) -> np.ndarray:
+        """``(values - mean) / std`` per symbol; NaN where the deviation is zero."""
+        mean = self.mean(field, window)
+        std = self.std(field, window)
+        scores = np.full(len(self), np.nan)
+        nonzero = std > 0
+        scores[nonzero] = (values[nonzero] - mean[nonzero]) / std[nonzero]
+        return scores
+
+    def _column(self, window: int) -> int:
+        try:
+            return self.windows.index(window)
+        except ValueError:
+            raise ValueError(f"No rolling statistics for window {window}") from None
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.data_providers.base import AsyncMarketDataProvider, MarketDataProvider
+from app.services.data_providers.timeframes import DAILY
+from app.services.data_providers.universe import UniverseBatch
+
+
+class SyncProviderAdapter(AsyncMarketDataProvider):
+    """
+    Exposes a synchronous ``MarketDataProvider`` through the async protocol.
+
+    Calls run in a worker thread so they never block the event loop. The whole
+    universe is loaded with the wrapped provider's own ``get_universe``, which
+    keeps columnar fast paths and data versions intact.
+    """
+
+    def __init__(self, provider: MarketDataProvider) -> None:
+        self.provider = provider
+
+    async def list_symbols(self) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.provider.list_symbols)
+
+    async def get_snapshots(self, symbols: Sequence[str]) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            lambda: [self.provider.get_snapshot(symbol) for symbol in symbols]
+        )
+
+    async def get_histories(
+        self, symbols: Sequence[str], lookback: int = 60, timeframe: str = DAILY
+    ) -> List[Dict[str, np.ndarray]]:
+        return await asyncio.to_thread(
+            lambda: [self.provider.get_history_arrays(s, lookback, timeframe) for s in symbols]
+        )
+
+    def universe_version(self) -> Optional[Hashable]:
+        return self.provider.universe_version()
+
+    async def get_universe(
+        self,
+        lookback: int = 60,
+        concurrency: int = 8,
+        timeout: Optional[float] = None,
+        batch_size: int = 100,
+        symbols: Optional[Sequence[str]] = None,
+        frames: Optional[Dict[str, int]] = None,
+    ) -> UniverseBatch:
+        # Frames are only passed on when asked for, so wrapped providers that
+        # predate them keep working.
+        args = (lookback, symbols, frames) if frames else (lookback, symbols)
+        return await asyncio.wait_for(
+            asyncio.to_thread(self.provider.get_universe, *args), timeout
+        )
@@ -0,0 +1,49 @@
+from typing import Dict
+
+import numpy as np
+
+DAILY = "D"
+WEEKLY = "W"
+MONTHLY = "M"
+TIMEFRAMES = (DAILY, WEEKLY, MONTHLY)
+# Most daily candles one bar of each timeframe can hold (calendar days), for
+# providers that aggregate on the fly from daily history.
+PERIOD_DAYS = {DAILY: 1, WEEKLY: 7, MONTHLY: 31}
+# Names of the latest (possibly unfinished) bar, for filter reasons.
+CURRENT_PERIOD = {DAILY: "امروز", WEEKLY: "این هفته", MONTHLY: "این ماه"}
+
+
+def period_keys(dates: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Integer period of each date: the day for ``D`` (so intraday bars roll up
+    to daily ones), the Saturday-to-Friday trading week of the Tehran market
+    for ``W``, and the calendar month for ``M``.
+    """
+    if timeframe == MONTHLY:
+        return dates.astype("datetime64[M]").astype(np.int64)
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    if timeframe == WEEKLY:
+        # 1970-01-03, day 2 of the epoch, was a Saturday.
+        return (days - 2) // 7
+    if timeframe == DAILY:
+        return days
+    raise ValueError(f"Unknown timeframe: {timeframe}")
+
+
+def rollup(series: Dict[str, np.ndarray], timeframe: str) -> Dict[str, np.ndarray]:
+    """
+    Aggregate date-ordered candles (``date``, ``close``, ``volume`` and
+    ``value`` arrays) into one bar per period: the last candle's date and
+    close, and the summed volume and value.
+    """
+    keys = period_keys(series["date"], timeframe)
+    if not len(keys):
+        return {name: np.array(values[:0]) for name, values in series.items()}
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return {
+        "date": series["date"][ends],
+        "close": series["close"][ends],
+        "volume": np.add.reduceat(series["volume"], starts),
+        "value": np.add.reduceat(series["value"], starts),
+    }
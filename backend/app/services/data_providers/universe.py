@@ -0,0 +1,119 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.data_providers.market_store import HISTORY_FIELDS, SNAPSHOT_FIELDS
+from app.services.data_providers.rolling import RollingStats
+from app.services.data_providers.timeframes import DAILY
+
+
+@dataclass
+class UniverseBatch:
+    """
+    Whole-universe view used by batch filter evaluation.
+
+    ``snapshot`` holds one float64 column per snapshot field and ``history`` one
+    (symbols x lookback) matrix per history field, right-aligned on the latest
+    candle and NaN-padded on the left. ``lengths`` is the number of real candles
+    in each row. ``versions`` carries each symbol's data version when the
+    provider tracks one, and ``source`` identifies the store it came from; both
+    are used to memoize per-symbol results.
+
+    ``frames`` holds the same symbols in other timeframes (weekly, monthly...):
+    batches sharing this one's snapshot whose history holds rolled-up bars.
+    ``rolling`` carries the store's rolling volume and value statistics of the
+    daily candles, when the provider keeps them.
+    """
+
+    symbols: List[str]
+    snapshot: Dict[str, np.ndarray]
+    history: Dict[str, np.ndarray]
+    lengths: np.ndarray
+    lookback: int
+    versions: Optional[np.ndarray] = None
+    source: Optional[str] = None
+    frames: Dict[str, "UniverseBatch"] = field(default_factory=dict)
+    rolling: Optional[RollingStats] = None
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def take(self, indices: Sequence[int]) -> "UniverseBatch":
+        indices = np.asarray(indices, dtype=np.intp)
+        if len(indices) == len(self.symbols) and (indices == np.arange(len(indices))).all():
+            return self
+        return UniverseBatch(
+            symbols=[self.symbols[i] for i in indices],
+            snapshot={name: col[indices] for name, col in self.snapshot.items()},
+            history={name: mat[indices] for name, mat in self.history.items()},
+            lengths=self.lengths[indices],
+            lookback=self.lookback,
+            versions=None if self.versions is None else self.versions[indices],
+            source=self.source,
+            frames={name: frame.take(indices) for name, frame in self.frames.items()},
+            rolling=None if self.rolling is None else self.rolling.take(indices),
+        )
+
+    def frame(self, timeframe: str) -> "UniverseBatch":
+        """The batch of ``timeframe`` bars (this batch itself for daily candles)."""
+        if timeframe == DAILY:
+            return self
+        try:
+            return self.frames[timeframe]
+        except KeyError:
+            raise ValueError(f"Timeframe not loaded: {timeframe}") from None
+
+    def add_frame(
+        self, timeframe: str, histories: Sequence[Dict[str, np.ndarray]], lookback: int
+    ) -> None:
+        """Attach the last ``lookback`` ``timeframe`` bars of every symbol, in row order."""
+        history, lengths = _stack(histories, lookback)
+        self.frames[timeframe] = UniverseBatch(
+            symbols=self.symbols,
+            snapshot=self.snapshot,
+            history=history,
+            lengths=lengths,
+            lookback=lookback,
+            versions=self.versions,
+            source=self.source,
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        snapshots: Sequence[Dict],
+        histories: Sequence[Dict[str, np.ndarray]],
+        lookback: int,
+    ) -> "UniverseBatch":
+        """Build a batch from per-symbol snapshot dicts and history arrays."""
+        snapshot = {
+            name: np.array([float(s.get(name) or 0) for s in snapshots], dtype=np.float64)
+            for name in SNAPSHOT_FIELDS
+        }
+        history, lengths = _stack(histories, lookback)
+        return cls(
+            symbols=[s["symbol"] for s in snapshots],
+            snapshot=snapshot,
+            history=history,
+            lengths=lengths,
+            lookback=lookback,
+        )
+
+
+def _stack(
+    histories: Sequence[Dict[str, np.ndarray]], lookback: int
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Right-aligned, NaN-padded (symbols x lookback) matrices and real lengths."""
+    history = {
+        name: np.full((len(histories), lookback), np.nan, dtype=np.float64)
+        for name in HISTORY_FIELDS
+    }
+    lengths = np.zeros(len(histories), dtype=np.intp)
+    for i, series in enumerate(histories):
+        for name in HISTORY_FIELDS:
+            values = series[name][-lookback:] if lookback > 0 else series[name][:0]
+            if len(values):
+                history[name][i, lookback - len(values) :] = values
+        lengths[i] = min(len(series["close"]), lookback)
+    return history, lengths
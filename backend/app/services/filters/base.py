@@ -1,7 +1,60 @@
+import math
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
 
 from app.schemas.filters import FilterDefinition, FilterParameter
+from app.services.data_providers.panel import HistoryPanel
+from app.services.data_providers.timeframes import DAILY, TIMEFRAMES
+from app.services.data_providers.universe import UniverseBatch
+
+
+@dataclass
+class BatchEvaluation:
+    """
+    Result of evaluating a filter over a ``UniverseBatch``.
+
+    ``passed`` is a boolean mask and ``scores`` a float vector (NaN means no
+    score). Reasons are stored as indices into ``reasons``; when ``values`` is
+    given, the selected reason is a format template filled from that row.
+    """
+
+    passed: np.ndarray
+    reason_index: np.ndarray
+    reasons: Sequence[str]
+    values: Optional[np.ndarray] = None
+    scores: Optional[np.ndarray] = None
+
+    def reason(self, i: int) -> str:
+        template = self.reasons[self.reason_index[i]]
+        if self.values is None:
+            return template
+        return template.format(*self.values[i])
+
+    def score(self, i: int) -> Optional[float]:
+        if self.scores is None or np.isnan(self.scores[i]):
+            return None
+        return float(self.scores[i])
+
+
+# Most candles any filter sees when screening.
+HISTORY_LOOKBACK = 120
+
+# Declared by filters that can read weekly or monthly bars instead of daily
+# candles; their history lookback then counts bars of that timeframe.
+TIMEFRAME_PARAMETER = FilterParameter(
+    name="timeframe",
+    type="str",
+    description="تایم‌فریم کندل‌ها (D روزانه، W هفتگی، M ماهانه)",
+    default=DAILY,
+    choices=list(TIMEFRAMES),
+)
+
+
+class InvalidFilterError(ValueError):
+    """Unknown filter id or a parameter that does not match its declaration."""
 
 
 class FilterBase(ABC):
@@ -9,9 +62,52 @@ class FilterBase(ABC):
     name: str
     description: str
     parameters: Dict[str, FilterParameter]
+    # Planner estimates: relative per-symbol cost and the expected fraction of
+    # symbols that pass. Cheap, selective filters run first in a plan.
+    cost: float = 1.0
+    selectivity: float = 0.5
 
     def __init__(self, **params: Any) -> None:
-        self.params = params
+        self.params = self.coerce_params(params)
+
+    @classmethod
+    def coerce_params(cls, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply declared defaults, coerce values to the declared types and check
+        them against the declared choices and bounds, then ``check_params``.
+        """
+        unknown = set(params) - set(cls.parameters)
+        if unknown:
+            raise InvalidFilterError(
+                f"Unknown parameter(s) for {cls.id}: {', '.join(sorted(unknown))}"
+            )
+        coerced = {}
+        for name, parameter in cls.parameters.items():
+            value = params.get(name, parameter.default)
+            try:
+                coerced[name] = _coerce(value, parameter.type)
+            except (TypeError, ValueError):
+                raise InvalidFilterError(
+                    f"Invalid value for {cls.id}.{name}: {value!r} (expected {parameter.type})"
+                ) from None
+            if parameter.choices is not None and coerced[name] not in parameter.choices:
+                raise InvalidFilterError(
+                    f"Invalid value for {cls.id}.{name}: {value!r} "
+                    f"(expected one of {', '.join(map(str, parameter.choices))})"
+                )
+            if (parameter.minimum is not None and coerced[name] < parameter.minimum) or (
+                parameter.maximum is not None and coerced[name] > parameter.maximum
+            ):
+                raise InvalidFilterError(
+                    f"Invalid value for {cls.id}.{name}: {value!r} "
+                    f"(expected {_bounds(parameter)})"
+                )
+        cls.check_params(coerced)
+        return coerced
+
+    @classmethod
+    def check_params(cls, params: Dict[str, Any]) -> None:
+        """Raise ``InvalidFilterError`` for invalid combinations of coerced values."""
 
     @classmethod
     def definition(cls) -> FilterDefinition:
@@ -22,6 +118,38 @@ class FilterBase(ABC):
             parameters=list(cls.parameters.values()),
         )
 
+    def requires(self) -> Dict[str, int]:
+        """
+        Data the filter reads: ``{"snapshot": 0}`` for snapshot fields only, or
+        ``{"history": n}`` when it also needs the last ``n`` candles. Snapshot
+        filters run before any history is loaded, and history is loaded with
+        the largest ``n`` in the plan. Defaults to the full screening history.
+        """
+        return {"history": HISTORY_LOOKBACK}
+
+    def history_lookback(self) -> int:
+        """Candles of history this filter needs (0 for snapshot-only filters)."""
+        return min(max(self.requires().get("history", 0), 0), HISTORY_LOOKBACK)
+
+    @property
+    def timeframe(self) -> str:
+        """Timeframe of the history the filter reads (see ``TIMEFRAME_PARAMETER``)."""
+        return self.params.get("timeframe", DAILY)
+
+    def candles(self, symbol_data: Dict[str, Any]) -> Sequence[Dict[str, Any]]:
+        """``symbol_data`` history in the filter's timeframe, oldest first."""
+        if self.timeframe == DAILY:
+            return symbol_data.get("history", [])
+        return symbol_data.get("frames", {}).get(self.timeframe, [])
+
+    @classmethod
+    def supports_batch(cls) -> bool:
+        return cls.evaluate_batch is not FilterBase.evaluate_batch
+
+    @classmethod
+    def supports_history(cls) -> bool:
+        return cls.evaluate_history is not FilterBase.evaluate_history
+
     @abstractmethod
     def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
         """
@@ -30,3 +158,43 @@ class FilterBase(ABC):
         Returns a dict with keys: passed (bool), reason (str), score (optional float)
         """
         raise NotImplementedError
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        """
+        Evaluate the filter for every symbol of ``universe`` at once.
+
+        Optional: filters that do not override this are evaluated per symbol.
+        """
+        raise NotImplementedError
+
+    def evaluate_history(self, panel: HistoryPanel) -> np.ndarray:
+        """
+        Pass mask (dates x symbols) of the filter at every date of ``panel``.
+
+        Optional: backtests evaluate filters that do not override this one
+        date at a time.
+        """
+        raise NotImplementedError
+
+
+def _bounds(parameter: FilterParameter) -> str:
+    if parameter.maximum is None:
+        return f"at least {parameter.minimum:g}"
+    if parameter.minimum is None:
+        return f"at most {parameter.maximum:g}"
+    return f"between {parameter.minimum:g} and {parameter.maximum:g}"
+
+
+def _coerce(value: Any, type_name: str) -> Any:
+    if type_name not in ("int", "float"):
+        return value
+    if isinstance(value, bool) or value is None:
+        raise TypeError(value)
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    if type_name == "int":
+        if not number.is_integer():
+            raise ValueError(value)
+        return int(number)
+    return number
@@ -0,0 +1,121 @@
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.data_providers.market_store import HistoryView
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import BatchEvaluation, FilterBase
+from app.services.metrics import get_metrics
+
+# Builds the per-symbol ``symbol_data`` dict for a row of a universe, used by
+# filters without a batch implementation.
+SymbolLoader = Callable[[UniverseBatch, int], Dict[str, Any]]
+Match = Tuple[int, List[str], List[Optional[float]]]
+# Chooses which survivors to return, and in what order, given their
+# (survivors x filters) score matrix in request order (NaN means no score).
+Selector = Callable[[np.ndarray], np.ndarray]
+
+
+def evaluate_chain(
+    universe: UniverseBatch,
+    instances: Sequence[FilterBase],
+    load_symbol: SymbolLoader,
+    positions: Optional[Sequence[int]] = None,
+    select: Optional[Selector] = None,
+) -> List[Match]:
+    """
+    AND-chain ``instances`` over ``universe`` and return ``(row, reasons, scores)``
+    for every row that passes all of them, in row order, with one reason and
+    one score (``None`` when the filter gives none) per filter.
+
+    ``positions`` gives each instance's place in the original request when the
+    chain runs in a different (planned) order; reasons and scores follow it.
+    ``select`` narrows and orders the survivors before their reasons are built.
+    """
+    # Each filter only sees the survivors of the previous ones; keep the row
+    # indices it was evaluated on so reasons can be mapped back at the end.
+    active = np.arange(len(universe))
+    stages = []
+    metrics = get_metrics()
+    if positions is None:
+        positions = range(len(instances))
+    for position, instance in zip(positions, instances):
+        if not len(active):
+            break
+        started = time.perf_counter()
+        evaluation = evaluate_filter(instance, universe.take(active), load_symbol)
+        stages.append((position, active, evaluation))
+        evaluated = len(active)
+        active = active[evaluation.passed]
+        metrics.record_filter(
+            instance.id, time.perf_counter() - started, evaluated, len(active)
+        )
+    stages.sort(key=lambda stage: stage[0])
+
+    # Index of each survivor within every stage's evaluation.
+    indices = [np.searchsorted(stage_rows, active) for _, stage_rows, _ in stages]
+    scores = np.full((len(active), len(stages)), np.nan)
+    for column, (_, _, evaluation) in enumerate(stages):
+        if evaluation.scores is not None:
+            scores[:, column] = evaluation.scores[indices[column]]
+
+    order = np.arange(len(active)) if select is None else select(scores)
+    matches = []
+    for k in order:
+        reasons = [
+            evaluation.reason(int(index[k])) or "قبول"
+            for (_, _, evaluation), index in zip(stages, indices)
+        ]
+        row_scores = [None if math.isnan(v) else v for v in scores[k].tolist()]
+        matches.append((int(active[k]), reasons, row_scores))
+    return matches
+
+
+def evaluate_filter(
+    instance: FilterBase, universe: UniverseBatch, load_symbol: SymbolLoader
+) -> BatchEvaluation:
+    if instance.supports_batch():
+        return instance.evaluate_batch(universe)
+
+    passed = np.zeros(len(universe), dtype=bool)
+    scores = np.full(len(universe), np.nan)
+    reasons = []
+    for i in range(len(universe)):
+        evaluation = instance.evaluate(load_symbol(universe, i))
+        passed[i] = bool(evaluation.get("passed"))
+        reasons.append(evaluation.get("reason") or "")
+        if evaluation.get("score") is not None:
+            scores[i] = evaluation["score"]
+    return BatchEvaluation(
+        passed=passed,
+        reason_index=np.arange(len(universe)),
+        reasons=reasons,
+        scores=scores,
+    )
+
+
+def universe_symbol_data(universe: UniverseBatch, i: int) -> Dict[str, Any]:
+    """Per-symbol data rebuilt from the universe arrays alone (no provider access)."""
+    data: Dict[str, Any] = {
+        "symbol": universe.symbols[i],
+        **{name: float(column[i]) for name, column in universe.snapshot.items()},
+        "history": history_view(universe, i),
+        "frames": frame_views(universe, i),
+    }
+    if universe.versions is not None:
+        data["data_version"] = (universe.source, int(universe.versions[i]))
+    return data
+
+
+def history_view(universe: UniverseBatch, i: int) -> HistoryView:
+    """Candles of row ``i`` of ``universe`` (without dates) as a ``HistoryView``."""
+    start = universe.lookback - int(universe.lengths[i])
+    history = {name: universe.history[name][i, start:] for name in ("close", "volume")}
+    return HistoryView(history, ("close", "volume"))
+
+
+def frame_views(universe: UniverseBatch, i: int) -> Dict[str, HistoryView]:
+    """Bars of row ``i`` in every timeframe loaded with ``universe``."""
+    return {timeframe: history_view(frame, i) for timeframe, frame in universe.frames.items()}
@@ -0,0 +1,269 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import BatchEvaluation, FilterBase
+from app.services.filters.chain import Match, Selector, SymbolLoader, evaluate_filter
+from app.services.metrics import get_metrics
+
+# Prefixes the reason of a filter that failed for a matching row (under ``not``,
+# or an ``or`` branch that did not hold).
+NEGATED_REASON = "نه: "
+
+
+@dataclass(frozen=True, eq=False)
+class ExpressionNode:
+    """
+    One node of a compiled filter expression.
+
+    ``op`` is ``"filter"`` (a leaf; ``column`` is its filter's place in the
+    plan), ``"and"``, ``"or"`` or ``"not"``. ``index`` numbers the distinct
+    nodes of the expression. ``cost`` is the expected evaluation cost per
+    symbol and ``selectivity`` the expected fraction of symbols passing.
+    """
+
+    op: str
+    index: int
+    children: Tuple["ExpressionNode", ...] = ()
+    column: int = -1
+    cost: float = 0.0
+    selectivity: float = 0.5
+
+
+class ExpressionBuilder:
+    """
+    Builds the DAG of a filter expression bottom-up.
+
+    Structurally equal subexpressions (``and``/``or`` compared regardless of
+    operand order) become a single node, so a filter or subtree used several
+    times is evaluated once. Operands are ordered so that short-circuiting
+    skips the most work: ``and`` by ascending cost / (1 - selectivity), like
+    the chain planner, and ``or`` by ascending cost / selectivity.
+    """
+
+    def __init__(self) -> None:
+        self._nodes: Dict[str, ExpressionNode] = {}
+        self._keys: List[str] = []  # by node index
+
+    @property
+    def size(self) -> int:
+        return len(self._nodes)
+
+    def leaf(self, column: int, instance: FilterBase) -> ExpressionNode:
+        cls = type(instance)
+        return self._node(f"f{column}", "filter", (), column, cls.cost, cls.selectivity)
+
+    def negate(self, child: ExpressionNode) -> ExpressionNode:
+        if child.op == "not":
+            return child.children[0]
+        return self._node(
+            f"not({self._keys[child.index]})",
+            "not",
+            (child,),
+            cost=child.cost,
+            selectivity=1.0 - child.selectivity,
+        )
+
+    def combine(self, op: str, children: Sequence[ExpressionNode]) -> ExpressionNode:
+        operands: Dict[int, ExpressionNode] = {}
+        for child in children:
+            # (a and b) and c == a and b and c; x and x == x.
+            for operand in child.children if child.op == op else (child,):
+                operands[operand.index] = operand
+        if len(operands) == 1:
+            return next(iter(operands.values()))
+        ordered = sorted(operands.values(), key=_and_rank if op == "and" else _or_rank)
+        cost = 0.0
+        reach = 1.0  # fraction of symbols still undecided before each operand
+        for operand in ordered:
+            cost += reach * operand.cost
+            reach *= operand.selectivity if op == "and" else 1.0 - operand.selectivity
+        selectivity = reach if op == "and" else 1.0 - reach
+        key = f"{op}({','.join(sorted(self._keys[n.index] for n in ordered))})"
+        return self._node(key, op, tuple(ordered), cost=cost, selectivity=selectivity)
+
+    def _node(
+        self,
+        key: str,
+        op: str,
+        children: Tuple[ExpressionNode, ...],
+        column: int = -1,
+        cost: float = 0.0,
+        selectivity: float = 0.5,
+    ) -> ExpressionNode:
+        node = self._nodes.get(key)
+        if node is None:
+            node = ExpressionNode(op, len(self._keys), children, column, cost, selectivity)
+            self._nodes[key] = node
+            self._keys.append(key)
+        return node
+
+
+def _and_rank(node: ExpressionNode) -> float:
+    return node.cost / max(1.0 - node.selectivity, 1e-6)
+
+
+def _or_rank(node: ExpressionNode) -> float:
+    return node.cost / max(node.selectivity, 1e-6)
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """
+    A boolean filter expression compiled to a DAG over ``leaves`` (one per
+    distinct filter, in request order; their scores and reasons are reported
+    in that order).
+    """
+
+    root: ExpressionNode
+    leaves: Tuple[FilterBase, ...]
+    size: int  # number of distinct nodes
+
+    def conjuncts(self) -> List[int]:
+        """Columns of the leaves every match must pass (top-level ``and`` operands)."""
+        operands = self.root.children if self.root.op == "and" else (self.root,)
+        return [node.column for node in operands if node.op == "filter"]
+
+    def evaluate(
+        self,
+        universe: UniverseBatch,
+        load_symbol: SymbolLoader,
+        select: Optional[Selector] = None,
+    ) -> List[Match]:
+        """
+        Matches of the expression over ``universe``, in the ``evaluate_chain``
+        format: ``(row, reasons, scores)`` with one score per leaf (``None``
+        when it gives none or was short-circuited) and the reasons of the leaves
+        evaluated for the row.
+        """
+        run = _Run(self, universe, load_symbol)
+        rows = np.arange(len(universe))
+        active = rows[run.value(self.root, rows)]
+        scores = run.scores[active]
+        order = np.arange(len(active)) if select is None else select(scores)
+        matches = []
+        for k in order:
+            row = int(active[k])
+            row_scores = [None if math.isnan(v) else v for v in scores[k].tolist()]
+            matches.append((row, run.reasons(row), row_scores))
+        return matches
+
+    def masks(self, leaf_mask: Callable[[int], np.ndarray]) -> np.ndarray:
+        """
+        Evaluate the expression over whole boolean arrays, e.g. (dates x
+        symbols) backtest signals; ``leaf_mask(column)`` is called at most once
+        per leaf, and not at all once an operand decides every element.
+        """
+        memo: Dict[int, np.ndarray] = {}
+
+        def value(node: ExpressionNode) -> np.ndarray:
+            if node.index in memo:
+                return memo[node.index]
+            if node.op == "filter":
+                result = np.asarray(leaf_mask(node.column), dtype=bool)
+            elif node.op == "not":
+                result = ~value(node.children[0])
+            else:
+                result = value(node.children[0]).copy()
+                for child in node.children[1:]:
+                    if node.op == "and":
+                        if not result.any():
+                            break
+                        result &= value(child)
+                    else:
+                        if result.all():
+                            break
+                        result |= value(child)
+            memo[node.index] = result
+            return result
+
+        return value(self.root)
+
+
+class _Run:
+    """
+    One evaluation of an expression over a universe. Every node memoizes its
+    value per row, so shared nodes are evaluated once per row, and operands of
+    ``and``/``or`` only see the rows they can still decide.
+    """
+
+    def __init__(
+        self,
+        expression: CompiledExpression,
+        universe: UniverseBatch,
+        load_symbol: SymbolLoader,
+    ) -> None:
+        count = len(universe)
+        self.expression = expression
+        self.universe = universe
+        self.load_symbol = load_symbol
+        self.done = np.zeros((expression.size, count), dtype=bool)
+        self.values = np.zeros((expression.size, count), dtype=bool)
+        leaves = len(expression.leaves)
+        self.scores = np.full((count, leaves), np.nan)
+        # Per leaf: its evaluations, and for each row the one covering it.
+        self.evaluations: List[List[BatchEvaluation]] = [[] for _ in range(leaves)]
+        self.evaluation_of = np.full((leaves, count), -1, dtype=np.intp)
+        self.offset = np.zeros((leaves, count), dtype=np.intp)
+        self.metrics = get_metrics()
+
+    def value(self, node: ExpressionNode, rows: np.ndarray) -> np.ndarray:
+        missing = rows[~self.done[node.index, rows]]
+        if len(missing):
+            self.values[node.index, missing] = self._compute(node, missing)
+            self.done[node.index, missing] = True
+        return self.values[node.index, rows]
+
+    def _compute(self, node: ExpressionNode, rows: np.ndarray) -> np.ndarray:
+        if node.op == "filter":
+            return self._evaluate_leaf(node.column, rows)
+        if node.op == "not":
+            return ~self.value(node.children[0], rows)
+        result = np.zeros(len(rows), dtype=bool)
+        # Positions (into rows) the operands so far have not decided.
+        pending = np.arange(len(rows))
+        for child in node.children:
+            if not len(pending):
+                break
+            passed = self.value(child, rows[pending])
+            if node.op == "and":
+                pending = pending[passed]
+            else:
+                result[pending[passed]] = True
+                pending = pending[~passed]
+        if node.op == "and":
+            result[pending] = True
+        return result
+
+    def _evaluate_leaf(self, column: int, rows: np.ndarray) -> np.ndarray:
+        instance = self.expression.leaves[column]
+        started = time.perf_counter()
+        evaluation = evaluate_filter(instance, self.universe.take(rows), self.load_symbol)
+        self.metrics.record_filter(
+            instance.id,
+            time.perf_counter() - started,
+            len(rows),
+            int(evaluation.passed.sum()),
+        )
+        self.evaluation_of[column, rows] = len(self.evaluations[column])
+        self.offset[column, rows] = np.arange(len(rows))
+        self.evaluations[column].append(evaluation)
+        if evaluation.scores is not None:
+            self.scores[rows, column] = evaluation.scores
+        return evaluation.passed
+
+    def reasons(self, row: int) -> List[str]:
+        reasons = []
+        for column, evaluations in enumerate(self.evaluations):
+            which = self.evaluation_of[column, row]
+            if which < 0:
+                continue
+            evaluation = evaluations[which]
+            index = int(self.offset[column, row])
+            reason = evaluation.reason(index) or "قبول"
+            reasons.append(reason if evaluation.passed[index] else NEGATED_REASON + reason)
+        return reasons
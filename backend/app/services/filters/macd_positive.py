@@ -1,45 +1,138 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 
 from app.schemas.filters import FilterParameter
-from app.services.filters.base import FilterBase
-from app.services.indicators import macd
+from app.services.cache.indicator_cache import cached_indicator, cached_rows
+from app.services.data_providers.panel import HistoryPanel
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import (
+    HISTORY_LOOKBACK,
+    TIMEFRAME_PARAMETER,
+    BatchEvaluation,
+    FilterBase,
+    InvalidFilterError,
+)
+from app.services.indicators import macd_array
 
 
 class MacdAboveZeroFilter(FilterBase):
     id = "macd_above_zero"
     name = "MACD بالای صفر"
     description = "آخرین مقدار MACD خط اصلی بالای صفر باشد"
+    cost = 4.0
+    selectivity = 0.5
     parameters = {
         "fast": FilterParameter(
             name="fast",
             type="int",
             description="دوره EMA سریع",
             default=12,
+            minimum=1,
+            maximum=HISTORY_LOOKBACK,
         ),
         "slow": FilterParameter(
             name="slow",
             type="int",
             description="دوره EMA کند",
             default=26,
+            minimum=1,
+            maximum=HISTORY_LOOKBACK,
         ),
         "signal": FilterParameter(
             name="signal",
             type="int",
             description="دوره خط سیگنال",
             default=9,
+            minimum=1,
+            maximum=HISTORY_LOOKBACK,
         ),
+        "timeframe": TIMEFRAME_PARAMETER,
     }
 
+    @classmethod
+    def check_params(cls, params: Dict[str, Any]) -> None:
+        if params["fast"] >= params["slow"]:
+            raise InvalidFilterError(
+                f"Invalid value for {cls.id}.fast: {params['fast']!r} "
+                f"(expected less than slow, {params['slow']!r})"
+            )
+
+    def requires(self) -> Dict[str, int]:
+        # The EMAs are seeded on the first candle of the window, so the value
+        # depends on the whole screening history, not just ``slow`` candles.
+        return {"history": HISTORY_LOOKBACK}
+
     def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
-        fast = int(self.params.get("fast", 12))
-        slow = int(self.params.get("slow", 26))
-        signal = int(self.params.get("signal", 9))
-        closes = [item["close"] for item in symbol_data.get("history", [])]
+        fast = self.params["fast"]
+        slow = self.params["slow"]
+        signal = self.params["signal"]
+        closes = [item["close"] for item in self.candles(symbol_data)]
         if len(closes) < slow:
             return {"passed": False, "reason": "داده کافی برای MACD موجود نیست"}
 
-        macd_values = macd(closes, fast=fast, slow=slow, signal=signal)
-        last_macd = macd_values["macd_line"][-1]
+        params = {**self.params, "length": len(closes)}
+        macd_values = cached_indicator(
+            symbol_data,
+            "macd",
+            params,
+            lambda: macd_array(np.asarray(closes, dtype=np.float64), fast, slow, signal),
+        )
+        last_macd = float(macd_values["macd_line"][-1])
         passed = last_macd > 0
         reason = f"MACD آخرین کندل {last_macd:.2f} است"
-        return {"passed": passed, "reason": reason}
+        return {"passed": passed, "reason": reason, "score": last_macd}
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        fast = self.params["fast"]
+        slow = self.params["slow"]
+        signal = self.params["signal"]
+        frame = universe.frame(self.timeframe)
+        enough = frame.lengths >= slow
+        last_macd = np.full(len(universe), np.nan)
+        rows = np.flatnonzero(enough)
+        if len(rows):
+            series = cached_rows(
+                frame,
+                rows,
+                "macd",
+                self.params,
+                lambda missing: _macd_rows(frame, missing, fast, slow, signal),
+            )
+            last_macd[rows] = [s["macd_line"][-1] for s in series]
+        return BatchEvaluation(
+            passed=enough & (last_macd > 0),
+            reason_index=enough.astype(np.intp),
+            reasons=[
+                "داده کافی برای MACD موجود نیست",
+                "MACD آخرین کندل {0:.2f} است",
+            ],
+            values=last_macd[:, None],
+            scores=last_macd,
+        )
+
+    def evaluate_history(self, panel: HistoryPanel) -> np.ndarray:
+        # One continuous EMA over the whole panel instead of one per trailing
+        # window: the screener's window seed stops mattering a few ``slow``
+        # periods in, and this keeps the backtest a single pass over the dates.
+        macd_line = macd_array(
+            panel.history["close"].T,
+            self.params["fast"],
+            self.params["slow"],
+            self.params["signal"],
+        )["macd_line"].T
+        # At date t the screen sees the MACD of the candles before t.
+        previous = np.full(macd_line.shape, np.nan)
+        previous[1:] = macd_line[:-1]
+        with np.errstate(invalid="ignore"):
+            return (panel.candle_counts() >= self.params["slow"]) & (previous > 0)
+
+
+def _macd_rows(
+    universe: UniverseBatch, rows: np.ndarray, fast: int, slow: int, signal: int
+) -> List[Dict[str, np.ndarray]]:
+    result = macd_array(universe.history["close"][rows], fast, slow, signal)
+    return [
+        {name: values[i, -length:].copy() for name, values in result.items()}
+        for i, length in enumerate(universe.lengths[rows])
+    ]
@@ -0,0 +1,60 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.schemas.filters import FilterParameter
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import BatchEvaluation, FilterBase, InvalidFilterError
+
+
+class PercentChangeFilter(FilterBase):
+    id = "percent_change_band"
+    name = "بازه درصد تغییر"
+    description = "درصد تغییر قیمت امروز در بازه تعیین‌شده باشد"
+    cost = 0.1
+    selectivity = 0.5
+    parameters = {
+        "min_change": FilterParameter(
+            name="min_change",
+            type="float",
+            description="حداقل درصد تغییر",
+            default=-5,
+        ),
+        "max_change": FilterParameter(
+            name="max_change",
+            type="float",
+            description="حداکثر درصد تغییر",
+            default=5,
+        ),
+    }
+
+    @classmethod
+    def check_params(cls, params: Dict[str, Any]) -> None:
+        if params["min_change"] > params["max_change"]:
+            raise InvalidFilterError(
+                f"Invalid value for {cls.id}.min_change: {params['min_change']!r} "
+                f"(expected at most max_change, {params['max_change']!r})"
+            )
+
+    def requires(self) -> Dict[str, int]:
+        return {"snapshot": 0}
+
+    def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        min_change = self.params["min_change"]
+        max_change = self.params["max_change"]
+        change = float(symbol_data.get("percent_change") or 0)
+        passed = min_change <= change <= max_change
+        reason = f"درصد تغییر امروز {change:.2f} (بازه {min_change} تا {max_change})"
+        return {"passed": passed, "reason": reason, "score": change}
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        min_change = self.params["min_change"]
+        max_change = self.params["max_change"]
+        change = universe.snapshot["percent_change"]
+        return BatchEvaluation(
+            passed=(change >= min_change) & (change <= max_change),
+            reason_index=np.zeros(len(universe), dtype=np.intp),
+            reasons=[f"درصد تغییر امروز {{0:.2f}} (بازه {min_change} تا {max_change})"],
+            values=change[:, None],
+            scores=change,
+        )
@@ -0,0 +1,321 @@
+import heapq
+import itertools
+import json
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.services.data_providers.timeframes import DAILY
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import FilterBase, InvalidFilterError
+from app.services.filters.chain import Match, Selector, SymbolLoader, evaluate_chain
+from app.services.filters.expression import (
+    CompiledExpression,
+    ExpressionBuilder,
+    ExpressionNode,
+)
+from app.services.filters.registry import instantiate_filter
+
+# A list of selections (AND-ed) or a boolean expression tree (see compile_plan).
+FilterSpec = Union[Sequence[Dict[str, Any]], Dict[str, Any]]
+EXPRESSION_OPERATORS = ("and", "or", "not")
+MAX_EXPRESSION_DEPTH = 32
+
+
+@dataclass(frozen=True)
+class PlannedFilter:
+    position: int  # index in the request; reasons are reported in this order
+    instance: FilterBase
+
+
+@dataclass(frozen=True)
+class Ranking:
+    """
+    Top-K selection of matches, best first.
+
+    Matches are keyed by one filter's score (``column``, a request position) or,
+    when ``column`` is ``None``, by the weighted composite score. Matches
+    without a score rank last and ties keep row order.
+    """
+
+    weights: Tuple[float, ...]
+    column: Optional[int] = None
+    limit: Optional[int] = None
+
+    def select(self, scores: np.ndarray) -> np.ndarray:
+        """``evaluate_chain`` selector: partial sort of a score matrix."""
+        keys = self._keys(scores)
+        candidates = np.arange(len(keys))
+        if self.limit is not None and self.limit < len(keys):
+            # np.partition finds the k-th key in O(n); keep every row above it
+            # and the first rows (in row order) tied with it.
+            kth = -np.partition(-keys, self.limit - 1)[self.limit - 1]
+            above = np.flatnonzero(keys > kth)
+            tied = np.flatnonzero(keys == kth)[: self.limit - len(above)]
+            candidates = np.concatenate([above, tied])
+        return candidates[np.lexsort((candidates, -keys[candidates]))]
+
+    def merge(self, parts: Iterable[List[Match]]) -> List[Match]:
+        """Heap-merge per-shard selections, each already ranked by ``select``."""
+        merged = heapq.merge(*parts, key=self._match_key)
+        return list(itertools.islice(merged, self.limit))
+
+    def _keys(self, scores: np.ndarray) -> np.ndarray:
+        if self.column is None:
+            keys = composite_scores(scores, self.weights)
+        else:
+            keys = scores[:, self.column]
+        return np.where(np.isnan(keys), -np.inf, keys)
+
+    def _match_key(self, match: Match) -> Tuple[float, int]:
+        row, _, scores = match
+        if self.column is None:
+            key = composite_score(scores, self.weights)
+        else:
+            key = scores[self.column]
+        return (math.inf if key is None else -key, row)
+
+
+@dataclass(frozen=True)
+class FilterPlan:
+    """
+    A validated filter request, compiled once and shared across requests.
+
+    ``steps`` are in execution order (cheapest and most selective first);
+    ``ids`` and ``weights`` are in request order; ``key`` is the canonical
+    JSON of the normalized filters in request order. Filter instances are
+    stateless during evaluation, so a plan is safe to reuse concurrently.
+
+    Plans of an expression tree carry the compiled ``expression``; their
+    steps are its distinct filters, in request order.
+    """
+
+    steps: Tuple[PlannedFilter, ...]
+    ids: Tuple[str, ...]
+    weights: Tuple[float, ...]
+    key: str
+    expression: Optional[CompiledExpression] = None
+
+    @property
+    def instances(self) -> List[FilterBase]:
+        return [step.instance for step in self.steps]
+
+    @property
+    def positions(self) -> List[int]:
+        return [step.position for step in self.steps]
+
+    @property
+    def history_lookback(self) -> int:
+        """Daily candles of history to load: the most any daily filter of the plan needs."""
+        return self._lookbacks().get(DAILY, 0)
+
+    @property
+    def frame_lookbacks(self) -> Dict[str, int]:
+        """Bars to load in every other timeframe the plan's filters read."""
+        lookbacks = self._lookbacks()
+        lookbacks.pop(DAILY, None)
+        return lookbacks
+
+    def _lookbacks(self) -> Dict[str, int]:
+        lookbacks: Dict[str, int] = {}
+        for instance in self.instances:
+            lookback = instance.history_lookback()
+            if lookback > 0:
+                timeframe = instance.timeframe
+                lookbacks[timeframe] = max(lookbacks.get(timeframe, 0), lookback)
+        return lookbacks
+
+    @property
+    def snapshot_instances(self) -> List[FilterBase]:
+        """
+        Filters that only read snapshot fields and that every match must pass,
+        in execution order.
+        """
+        if self.expression is None:
+            instances = self.instances
+        else:
+            instances = [self.expression.leaves[c] for c in self.expression.conjuncts()]
+        return [instance for instance in instances if instance.history_lookback() == 0]
+
+    def evaluate(
+        self,
+        universe: UniverseBatch,
+        load_symbol: SymbolLoader,
+        select: Optional[Selector] = None,
+    ) -> List[Match]:
+        """Matches of the plan over ``universe`` (see ``evaluate_chain``)."""
+        if self.expression is not None:
+            return self.expression.evaluate(universe, load_symbol, select)
+        return evaluate_chain(universe, self.instances, load_symbol, self.positions, select)
+
+    def composite(self, scores: Sequence[Optional[float]]) -> Optional[float]:
+        return composite_score(scores, self.weights)
+
+    def ranking(
+        self, sort_by: Optional[str] = None, limit: Optional[int] = None
+    ) -> Optional[Ranking]:
+        """
+        Ranking for ``sort_by`` (a selected filter id, or ``"score"`` for the
+        composite) and ``limit``; ``None`` keeps every match in row order.
+        """
+        if sort_by is None and limit is None:
+            return None
+        if limit is not None and limit < 1:
+            raise InvalidFilterError("limit must be at least 1")
+        column = None
+        if sort_by not in (None, "score"):
+            if sort_by not in self.ids:
+                raise InvalidFilterError(f"Cannot sort by {sort_by!r}: filter not selected")
+            column = self.ids.index(sort_by)
+        return Ranking(self.weights, column, limit)
+
+
+def composite_score(
+    scores: Sequence[Optional[float]], weights: Sequence[float]
+) -> Optional[float]:
+    """Weighted sum of the available filter scores (``None`` if there are none)."""
+    total = 0.0
+    scored = False
+    for score, weight in zip(scores, weights):
+        if score is not None:
+            total += weight * score
+            scored = True
+    return total if scored else None
+
+
+def composite_scores(scores: np.ndarray, weights: Sequence[float]) -> np.ndarray:
+    """Vectorized ``composite_score`` over a (matches x filters) matrix; NaN = none."""
+    total = np.zeros(len(scores))
+    scored = np.zeros(len(scores), dtype=bool)
+    # Column by column, so results equal composite_score bit for bit.
+    for column, weight in enumerate(weights):
+        values = scores[:, column]
+        present = ~np.isnan(values)
+        total = total + np.where(present, weight * values, 0.0)
+        scored |= present
+    return np.where(scored, total, np.nan)
+
+
+def compile_plan(filters: FilterSpec) -> FilterPlan:
+    """
+    Compile a list of ``{"id", "params", "weight"}`` selections into a
+    ``FilterPlan``; ``weight`` (default 1) scales the filter's score in the
+    composite.
+
+    ``filters`` may instead be a boolean expression: a selection, or a node
+    ``{"and": [...]}``, ``{"or": [...]}`` or ``{"not": expression}``.
+
+    Raises ``InvalidFilterError`` for unknown filter ids or invalid values.
+    """
+    if isinstance(filters, dict):
+        return _compile_expression(
+            json.dumps(filters, sort_keys=True, ensure_ascii=False, default=str)
+        )
+    request = json.dumps(
+        [
+            {"id": f["id"], "params": f.get("params") or {}, "weight": f.get("weight", 1.0)}
+            for f in filters
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return _compile(request)
+
+
+@lru_cache(maxsize=256)
+def _compile(request: str) -> FilterPlan:
+    selections = json.loads(request)
+    normalized = []
+    steps = []
+    weights = []
+    for position, selection in enumerate(selections):
+        instance = instantiate_filter(selection["id"], selection["params"])
+        weight = _weight(instance, selection["weight"])
+        weights.append(weight)
+        normalized.append({"id": instance.id, "params": instance.params, "weight": weight})
+        steps.append(PlannedFilter(position, instance))
+    # For independent AND-ed predicates, running them in ascending
+    # cost / (1 - selectivity) minimizes the expected work per symbol.
+    steps.sort(key=lambda step: _rank(type(step.instance)))
+    key = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return FilterPlan(
+        steps=tuple(steps),
+        ids=tuple(s["id"] for s in normalized),
+        weights=tuple(weights),
+        key=key,
+    )
+
+
+@lru_cache(maxsize=256)
+def _compile_expression(request: str) -> FilterPlan:
+    builder = ExpressionBuilder()
+    leaves: List[FilterBase] = []
+    weights: List[float] = []
+    columns: Dict[str, int] = {}
+
+    def build(node: Any, depth: int) -> Tuple[ExpressionNode, Any]:
+        if depth > MAX_EXPRESSION_DEPTH:
+            raise InvalidFilterError("Filter expression is nested too deeply")
+        if not isinstance(node, dict):
+            raise InvalidFilterError(f"Invalid filter expression: {node!r}")
+        operators = [op for op in EXPRESSION_OPERATORS if op in node]
+        if not operators:
+            return leaf(node)
+        op = operators[0]
+        if len(node) != 1:
+            raise InvalidFilterError(f"Expression node {op!r} takes no other keys")
+        if op == "not":
+            child, normalized = build(node[op], depth + 1)
+            return builder.negate(child), {op: normalized}
+        operands = node[op]
+        if not isinstance(operands, list) or not operands:
+            raise InvalidFilterError(f"Expression node {op!r} needs a non-empty list")
+        built = [build(operand, depth + 1) for operand in operands]
+        return (
+            builder.combine(op, [child for child, _ in built]),
+            {op: [normalized for _, normalized in built]},
+        )
+
+    def leaf(selection: Dict[str, Any]) -> Tuple[ExpressionNode, Any]:
+        if "id" not in selection or set(selection) - {"id", "params", "weight"}:
+            raise InvalidFilterError(f"Invalid filter expression: {selection!r}")
+        instance = instantiate_filter(selection["id"], selection.get("params") or {})
+        weight = _weight(instance, selection.get("weight", 1.0))
+        identity = json.dumps(
+            {"id": instance.id, "params": instance.params}, sort_keys=True, default=str
+        )
+        # The same filter with the same params is one leaf, whatever its weight;
+        # its first occurrence in the request sets its column and weight.
+        column = columns.setdefault(identity, len(leaves))
+        if column == len(leaves):
+            leaves.append(instance)
+            weights.append(weight)
+        normalized = {"id": instance.id, "params": instance.params, "weight": weight}
+        return builder.leaf(column, instance), normalized
+
+    root, normalized = build(json.loads(request), 0)
+    return FilterPlan(
+        steps=tuple(PlannedFilter(column, instance) for column, instance in enumerate(leaves)),
+        ids=tuple(instance.id for instance in leaves),
+        weights=tuple(weights),
+        key=json.dumps(normalized, sort_keys=True, ensure_ascii=False),
+        expression=CompiledExpression(root, tuple(leaves), builder.size),
+    )
+
+
+def _weight(instance: FilterBase, weight: Any) -> float:
+    if (
+        isinstance(weight, bool)
+        or not isinstance(weight, (int, float))
+        or not math.isfinite(weight)
+    ):
+        raise InvalidFilterError(f"Invalid weight for {instance.id}: {weight!r}")
+    return float(weight)
+
+
+def _rank(cls: type) -> float:
+    return cls.cost / max(1.0 - cls.selectivity, 1e-6)
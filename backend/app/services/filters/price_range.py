@@ -0,0 +1,61 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.schemas.filters import FilterParameter
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import BatchEvaluation, FilterBase, InvalidFilterError
+
+
+class PriceRangeFilter(FilterBase):
+    id = "price_range"
+    name = "بازه قیمت"
+    description = "آخرین قیمت در بازه تعیین‌شده باشد"
+    cost = 0.1
+    selectivity = 0.5
+    parameters = {
+        "min_price": FilterParameter(
+            name="min_price",
+            type="float",
+            description="حداقل آخرین قیمت",
+            default=0,
+            minimum=0,
+        ),
+        "max_price": FilterParameter(
+            name="max_price",
+            type="float",
+            description="حداکثر آخرین قیمت",
+            default=1_000_000,
+            minimum=0,
+        ),
+    }
+
+    @classmethod
+    def check_params(cls, params: Dict[str, Any]) -> None:
+        if params["min_price"] > params["max_price"]:
+            raise InvalidFilterError(
+                f"Invalid value for {cls.id}.min_price: {params['min_price']!r} "
+                f"(expected at most max_price, {params['max_price']!r})"
+            )
+
+    def requires(self) -> Dict[str, int]:
+        return {"snapshot": 0}
+
+    def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        min_price = self.params["min_price"]
+        max_price = self.params["max_price"]
+        price = float(symbol_data.get("last_price") or 0)
+        passed = min_price <= price <= max_price
+        reason = f"آخرین قیمت {price:.0f} (بازه {min_price:.0f} تا {max_price:.0f})"
+        return {"passed": passed, "reason": reason}
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        min_price = self.params["min_price"]
+        max_price = self.params["max_price"]
+        price = universe.snapshot["last_price"]
+        return BatchEvaluation(
+            passed=(price >= min_price) & (price <= max_price),
+            reason_index=np.zeros(len(universe), dtype=np.intp),
+            reasons=[f"آخرین قیمت {{0:.0f}} (بازه {min_price:.0f} تا {max_price:.0f})"],
+            values=price[:, None],
+        )
@@ -1,23 +1,219 @@
-from typing import Any, Dict, List, Type
+import functools
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Type
 
+from app.core.config import get_settings
+from app.core.json import encode_json
 from app.schemas.filters import FilterDefinition
-from app.services.filters.base import FilterBase
-from app.services.filters.macd_positive import MacdAboveZeroFilter
-from app.services.filters.smart_money import SmartMoneyInflowFilter
-from app.services.filters.volume_spike import VolumeAboveAverageFilter
-
-AVAILABLE_FILTERS: Dict[str, Type[FilterBase]] = {
-    SmartMoneyInflowFilter.id: SmartMoneyInflowFilter,
-    MacdAboveZeroFilter.id: MacdAboveZeroFilter,
-    VolumeAboveAverageFilter.id: VolumeAboveAverageFilter,
+from app.services.filters.base import FilterBase, InvalidFilterError
+
+logger = logging.getLogger(__name__)
+
+# Distributions register filters under this entry point group, one entry point
+# per filter named by its id: ``my_filter = my_package.filters:MyFilter``.
+ENTRY_POINT_GROUP = "bestamoozscreener.filters"
+
+# Built-in filters as ``module:Class`` references, in the order they are listed.
+BUILTIN_FILTERS: Dict[str, str] = {
+    "smart_money_inflow": "app.services.filters.smart_money:SmartMoneyInflowFilter",
+    "macd_above_zero": "app.services.filters.macd_positive:MacdAboveZeroFilter",
+    "volume_above_average": "app.services.filters.volume_spike:VolumeAboveAverageFilter",
+    "min_trade_value": "app.services.filters.trade_value:MinTradeValueFilter",
+    "price_range": "app.services.filters.price_range:PriceRangeFilter",
+    "percent_change_band": "app.services.filters.percent_change:PercentChangeFilter",
+    "volume_zscore": "app.services.filters.zscore_spike:VolumeZScoreFilter",
+    "trade_value_zscore": "app.services.filters.zscore_spike:TradeValueZScoreFilter",
 }
+# Modules whose source the built-in filter definitions are made of: the filter
+# package and the schema and indicators the filters import.
+BUILTIN_SOURCES = ("app.services.filters", "app.schemas.filters", "app.services.indicators")
+
+
+class FilterRegistry(Mapping[str, Type[FilterBase]]):
+    """
+    Filter classes by id, each imported the first time it is looked up.
+
+    ``references`` maps every id to a ``module:Class`` reference, so listing
+    the ids imports nothing. Filters whose module fails to import, or that do
+    not resolve to a ``FilterBase`` subclass with that id, raise
+    ``InvalidFilterError``.
+    """
+
+    def __init__(self, references: Mapping[str, str]) -> None:
+        self.references: Dict[str, str] = dict(references)
+        self._classes: Dict[str, Type[FilterBase]] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, filter_id: str) -> Type[FilterBase]:
+        cls = self._classes.get(filter_id)
+        if cls is None:
+            reference = self.references[filter_id]
+            with self._lock:
+                cls = self._classes.get(filter_id) or _load(filter_id, reference)
+                self._classes[filter_id] = cls
+        return cls
+
+    def __contains__(self, filter_id: object) -> bool:
+        # Mapping's default looks the class up, which would import it.
+        return filter_id in self.references
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.references)
+
+    def __len__(self) -> int:
+        return len(self.references)
+
+    def loaded(self) -> List[str]:
+        """Ids of the filters imported so far."""
+        return list(self._classes)
+
+    def fingerprint(self) -> str:
+        """
+        Hash of the references and of the size and modification time of every
+        source file the filters are made of: ``BUILTIN_SOURCES`` for built-in
+        filters and the whole top-level package of a plugin, so edits to
+        modules the filters share (the base class, the parameter schema...)
+        count too. The filter modules themselves are not imported.
+        """
+        sources = {
+            "references": sorted(self.references.items()),
+            "files": {
+                module: _source_files(module) for module in _source_modules(self.references)
+            },
+        }
+        return hashlib.sha256(json.dumps(sources).encode("utf-8")).hexdigest()
+
+
+def _source_modules(references: Mapping[str, str]) -> List[str]:
+    modules = set()
+    builtins = set(BUILTIN_FILTERS.values())
+    for reference in references.values():
+        if reference in builtins:
+            modules.update(BUILTIN_SOURCES)
+        else:
+            modules.add(reference.partition(":")[0].split(".")[0])
+    return sorted(modules)
+
+
+def _source_files(module: str) -> List[List[Any]]:
+    """``[path, mtime_ns, size]`` of each Python file of a module or package."""
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None:
+        return []
+    if not spec.submodule_search_locations:
+        paths = [spec.origin] if spec.origin and os.path.exists(spec.origin) else []
+    else:
+        paths = sorted(
+            str(path)
+            for location in spec.submodule_search_locations
+            for path in Path(location).rglob("*.py")
+        )
+    files = []
+    for path in paths:
+        stat = os.stat(path)
+        files.append([path, stat.st_mtime_ns, stat.st_size])
+    return files
+
+
+def discover_filters() -> Dict[str, str]:
+    """
+    The built-in filters plus those of the ``ENTRY_POINT_GROUP`` entry points
+    of the installed distributions, read from package metadata only. A plugin
+    cannot replace a built-in filter.
+    """
+    references = dict(BUILTIN_FILTERS)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in references:
+            logger.warning(
+                "Ignoring filter plugin %s = %s: the id is already registered",
+                entry_point.name,
+                entry_point.value,
+            )
+            continue
+        references[entry_point.name] = entry_point.value
+    return references
+
+
+def _load(filter_id: str, reference: str) -> Type[FilterBase]:
+    module_name, _, attribute = reference.partition(":")
+    try:
+        module = importlib.import_module(module_name)
+        cls = functools.reduce(getattr, attribute.split("."), module)
+    except (ImportError, AttributeError) as exc:
+        raise InvalidFilterError(f"Filter {filter_id} failed to load: {exc}") from exc
+    if not (isinstance(cls, type) and issubclass(cls, FilterBase)) or cls.id != filter_id:
+        raise InvalidFilterError(f"{reference} is not a filter with id {filter_id}")
+    return cls
+
+
+@lru_cache()
+def get_filter_registry() -> FilterRegistry:
+    return FilterRegistry(discover_filters())
 
 
 def get_filter_definitions() -> List[FilterDefinition]:
-    return [cls.definition() for cls in AVAILABLE_FILTERS.values()]
+    """Definitions of every filter that loads; imports all the filter modules."""
+    registry = get_filter_registry()
+    definitions = []
+    for filter_id in registry:
+        try:
+            definitions.append(registry[filter_id].definition())
+        except InvalidFilterError:
+            logger.exception("Leaving filter %s out of the definitions", filter_id)
+    return definitions
+
+
+@lru_cache()
+def get_filter_manifest() -> bytes:
+    """
+    JSON of ``get_filter_definitions()``, as served by ``/api/filters``.
+
+    With ``filter_manifest_file`` set, the manifest is read from that file
+    while its fingerprint matches the registry's, so a fresh process serves it
+    without importing any filter module; otherwise it is rebuilt and saved.
+    """
+    path = get_settings().filter_manifest_file
+    fingerprint = get_filter_registry().fingerprint() if path else None
+    if path:
+        cached = _read_manifest(Path(path), fingerprint)
+        if cached is not None:
+            return cached
+    body = encode_json([d.model_dump() for d in get_filter_definitions()])
+    if path:
+        try:
+            Path(path).write_text(
+                json.dumps({"fingerprint": fingerprint, "filters": json.loads(body)}),
+                encoding="utf-8",
+            )
+        except OSError:
+            logger.warning("Could not write the filter manifest to %s", path)
+    return body
+
+
+def _read_manifest(path: Path, fingerprint: Optional[str]) -> Optional[bytes]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("fingerprint") != fingerprint:
+        return None
+    return encode_json(manifest.get("filters", []))
 
 
 def instantiate_filter(filter_id: str, params: Dict[str, Any]) -> FilterBase:
-    if filter_id not in AVAILABLE_FILTERS:
-        raise ValueError(f"Unknown filter id: {filter_id}")
-    return AVAILABLE_FILTERS[filter_id](**params)
+    registry = get_filter_registry()
+    if filter_id not in registry:
+        raise InvalidFilterError(f"Unknown filter id: {filter_id}")
+    return registry[filter_id](**params)
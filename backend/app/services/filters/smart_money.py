@@ -1,7 +1,11 @@
 from typing import Any, Dict, Optional
 
+import numpy as np
+
 from app.schemas.filters import FilterParameter
-from app.services.filters.base import FilterBase
+from app.services.data_providers.panel import HistoryPanel
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import HISTORY_LOOKBACK, BatchEvaluation, FilterBase
 
 
 class SmartMoneyInflowFilter(FilterBase):
@@ -10,24 +14,32 @@ class SmartMoneyInflowFilter(FilterBase):
     description = (
         "حجم و ارزش معاملات امروز نسبت به میانگین دوره اخیر رشد معنادار داشته باشد."
     )
+    cost = 1.0
+    selectivity = 0.2
     parameters = {
         "lookback_days": FilterParameter(
             name="lookback_days",
             type="int",
             description="تعداد روز برای محاسبه میانگین ارزش معاملات",
             default=20,
+            minimum=1,
+            maximum=HISTORY_LOOKBACK,
         ),
         "threshold": FilterParameter(
             name="threshold",
             type="float",
             description="حداقل نسبت ارزش معاملات امروز به میانگین",
             default=2.0,
+            minimum=0,
         ),
     }
 
+    def requires(self) -> Dict[str, int]:
+        return {"history": self.params["lookback_days"]}
+
     def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
-        lookback = int(self.params.get("lookback_days", 20))
-        threshold = float(self.params.get("threshold", 2.0))
+        lookback = self.params["lookback_days"]
+        threshold = self.params["threshold"]
         history = symbol_data.get("history", [])
         if len(history) < lookback:
             return {"passed": False, "reason": "داده تاریخی کافی نیست"}
@@ -45,4 +57,49 @@ class SmartMoneyInflowFilter(FilterBase):
         reason = (
             f"نسبت ارزش معاملات امروز به میانگین {ratio:.2f} است (حداقل {threshold})"
         )
-        return {"passed": passed, "reason": reason}
+        return {"passed": passed, "reason": reason, "score": ratio}
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        lookback = self.params["lookback_days"]
+        threshold = self.params["threshold"]
+        if universe.rolling is not None and universe.rolling.has(lookback):
+            # O(1) per symbol from the running sums the store maintains.
+            avg_value = universe.rolling.mean("value", lookback)
+            enough = ~np.isnan(avg_value)
+        else:
+            enough = universe.lengths >= lookback
+            avg_value = np.full(len(universe), np.nan)
+            if enough.any() and lookback > 0:
+                window = universe.history["value"][enough, -lookback:]
+                avg_value[enough] = window.sum(axis=1) / lookback
+        snapshot = universe.snapshot
+        today_value = np.where(
+            snapshot["trade_value"] != 0,
+            snapshot["trade_value"],
+            snapshot["last_price"] * snapshot["volume"],
+        )
+        nonzero = enough & (avg_value != 0)
+        ratio = np.full(len(universe), np.nan)
+        ratio[nonzero] = today_value[nonzero] / avg_value[nonzero]
+        reason_index = np.where(enough, np.where(nonzero, 2, 1), 0)
+        return BatchEvaluation(
+            passed=nonzero & (ratio >= threshold),
+            reason_index=reason_index,
+            reasons=[
+                "داده تاریخی کافی نیست",
+                "میانگین ارزش معاملات صفر است",
+                f"نسبت ارزش معاملات امروز به میانگین {{0:.2f}} است (حداقل {threshold})",
+            ],
+            values=ratio[:, None],
+            scores=ratio,
+        )
+
+    def evaluate_history(self, panel: HistoryPanel) -> np.ndarray:
+        lookback = self.params["lookback_days"]
+        threshold = self.params["threshold"]
+        if lookback <= 0:
+            return np.zeros((len(panel), len(panel.symbols)), dtype=bool)
+        avg_value = panel.trailing_sum("value", lookback) / lookback
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = panel.history["value"] / avg_value
+        return (avg_value != 0) & (ratio >= threshold)
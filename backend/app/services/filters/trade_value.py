@@ -0,0 +1,45 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.schemas.filters import FilterParameter
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import BatchEvaluation, FilterBase
+
+
+class MinTradeValueFilter(FilterBase):
+    id = "min_trade_value"
+    name = "حداقل ارزش معاملات"
+    description = "ارزش معاملات امروز از حداقل تعیین‌شده کمتر نباشد"
+    cost = 0.1
+    selectivity = 0.5
+    parameters = {
+        "min_value": FilterParameter(
+            name="min_value",
+            type="float",
+            description="حداقل ارزش معاملات امروز (ریال)",
+            default=100_000_000,
+            minimum=0,
+        ),
+    }
+
+    def requires(self) -> Dict[str, int]:
+        return {"snapshot": 0}
+
+    def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        min_value = self.params["min_value"]
+        trade_value = float(symbol_data.get("trade_value") or 0)
+        passed = trade_value >= min_value
+        reason = f"ارزش معاملات امروز {trade_value:.0f} است (حداقل {min_value:.0f})"
+        return {"passed": passed, "reason": reason, "score": trade_value}
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        min_value = self.params["min_value"]
+        trade_value = universe.snapshot["trade_value"]
+        return BatchEvaluation(
+            passed=trade_value >= min_value,
+            reason_index=np.zeros(len(universe), dtype=np.intp),
+            reasons=[f"ارزش معاملات امروز {{0:.0f}} است (حداقل {min_value:.0f})"],
+            values=trade_value[:, None],
+            scores=trade_value,
+        )
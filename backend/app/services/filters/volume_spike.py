@@ -1,43 +1,115 @@
 from typing import Any, Dict, Optional
 
+import numpy as np
+
 from app.schemas.filters import FilterParameter
-from app.services.filters.base import FilterBase
+from app.services.data_providers.panel import HistoryPanel
+from app.services.data_providers.timeframes import CURRENT_PERIOD, DAILY
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import (
+    HISTORY_LOOKBACK,
+    TIMEFRAME_PARAMETER,
+    BatchEvaluation,
+    FilterBase,
+)
 
 
 class VolumeAboveAverageFilter(FilterBase):
     id = "volume_above_average"
     name = "حجم بالاتر از میانگین"
     description = "حجم امروز بزرگ‌تر از میانگین دوره انتخابی باشد"
+    cost = 1.0
+    selectivity = 0.3
     parameters = {
         "lookback": FilterParameter(
             name="lookback",
             type="int",
             description="تعداد روز برای میانگین حجم",
             default=20,
+            minimum=1,
+            maximum=HISTORY_LOOKBACK,
         ),
         "multiplier": FilterParameter(
             name="multiplier",
             type="float",
             description="ضریب مقایسه حجم امروز با میانگین",
             default=1.5,
+            minimum=0,
         ),
+        # Weekly or monthly: the volume of the current bar against the
+        # average of the last ``lookback`` bars.
+        "timeframe": TIMEFRAME_PARAMETER,
     }
 
+    def requires(self) -> Dict[str, int]:
+        return {"history": self.params["lookback"]}
+
     def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
-        lookback = int(self.params.get("lookback", 20))
-        multiplier = float(self.params.get("multiplier", 1.5))
-        history = symbol_data.get("history", [])
+        lookback = self.params["lookback"]
+        multiplier = self.params["multiplier"]
+        history = self.candles(symbol_data)
         if len(history) < lookback:
             return {"passed": False, "reason": "تعداد کندل کافی نیست"}
 
         volumes = [h.get("volume", 0) for h in history[-lookback:]]
         avg_volume = sum(volumes) / lookback if volumes else 0
-        today_volume = symbol_data.get("volume", 0)
+        if self.timeframe == DAILY:
+            today_volume = symbol_data.get("volume", 0)
+        else:
+            today_volume = history[-1].get("volume", 0) if len(history) else 0
         if avg_volume == 0:
             return {"passed": False, "reason": "میانگین حجم صفر است"}
 
         passed = today_volume > avg_volume * multiplier
         reason = (
-            f"حجم امروز {today_volume:.0f} در مقابل میانگین {avg_volume:.0f} با ضریب {multiplier}"
+            f"حجم {CURRENT_PERIOD[self.timeframe]} {today_volume:.0f} "
+            f"در مقابل میانگین {avg_volume:.0f} با ضریب {multiplier}"
         )
-        return {"passed": passed, "reason": reason}
+        return {"passed": passed, "reason": reason, "score": today_volume / avg_volume}
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        lookback = self.params["lookback"]
+        multiplier = self.params["multiplier"]
+        frame = universe.frame(self.timeframe)
+        rolling = universe.rolling if self.timeframe == DAILY else None
+        if rolling is not None and rolling.has(lookback):
+            # O(1) per symbol from the running sums the store maintains.
+            avg_volume = rolling.mean("volume", lookback)
+            enough = ~np.isnan(avg_volume)
+        else:
+            enough = frame.lengths >= lookback
+            avg_volume = np.full(len(universe), np.nan)
+            if enough.any() and lookback > 0:
+                window = frame.history["volume"][enough, -lookback:]
+                avg_volume[enough] = window.sum(axis=1) / lookback
+        if self.timeframe == DAILY:
+            today_volume = universe.snapshot["volume"]
+        elif frame.lookback > 0:
+            today_volume = np.nan_to_num(frame.history["volume"][:, -1])
+        else:
+            today_volume = np.zeros(len(universe))
+        nonzero = enough & (avg_volume != 0)
+        ratio = np.full(len(universe), np.nan)
+        ratio[nonzero] = today_volume[nonzero] / avg_volume[nonzero]
+        reason_index = np.where(enough, np.where(nonzero, 2, 1), 0)
+        return BatchEvaluation(
+            passed=nonzero & (today_volume > avg_volume * multiplier),
+            reason_index=reason_index,
+            reasons=[
+                "تعداد کندل کافی نیست",
+                "میانگین حجم صفر است",
+                f"حجم {CURRENT_PERIOD[self.timeframe]} {{0:.0f}} "
+                f"در مقابل میانگین {{1:.0f}} با ضریب {multiplier}",
+            ],
+            values=np.column_stack([today_volume, avg_volume]),
+            scores=ratio,
+        )
+
+    def evaluate_history(self, panel: HistoryPanel) -> np.ndarray:
+        lookback = self.params["lookback"]
+        multiplier = self.params["multiplier"]
+        if lookback <= 0:
+            return np.zeros((len(panel), len(panel.symbols)), dtype=bool)
+        avg_volume = panel.trailing_sum("volume", lookback) / lookback
+        with np.errstate(invalid="ignore"):
+            return (avg_volume != 0) & (panel.history["volume"] > avg_volume * multiplier)
@@ -0,0 +1,132 @@
+from abc import abstractmethod
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.schemas.filters import FilterParameter
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import HISTORY_LOOKBACK, BatchEvaluation, FilterBase
+
+
+class _ZScoreSpikeFilter(FilterBase):
+    """
+    Today's ``field`` (volume or trade value) as a z-score against the mean
+    and standard deviation of the last ``window`` candles. Batches read them
+    from the provider's rolling statistics when it maintains that window.
+    """
+
+    field: str
+    label: str
+    cost = 0.5
+    selectivity = 0.1
+
+    def requires(self) -> Dict[str, int]:
+        return {"history": self.params["window"]}
+
+    @abstractmethod
+    def candle_value(self, candle: Dict[str, Any]) -> float:
+        """``field`` of one history candle."""
+
+    @abstractmethod
+    def today_value(self, snapshot: Dict[str, Any]) -> Any:
+        """Today's ``field`` from a snapshot dict or the snapshot columns of a batch."""
+
+    def evaluate(self, symbol_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        window = self.params["window"]
+        min_zscore = self.params["min_zscore"]
+        history = symbol_data.get("history", [])
+        if window <= 0 or len(history) < window:
+            return {"passed": False, "reason": "داده تاریخی کافی نیست"}
+
+        values = np.array([self.candle_value(h) for h in history[-window:]])
+        std = values.std()
+        if std == 0:
+            return {"passed": False, "reason": f"انحراف معیار {self.label} صفر است"}
+
+        zscore = (self.today_value(symbol_data) - values.mean()) / std
+        reason = f"z-score {self.label} امروز {zscore:.2f} است (حداقل {min_zscore})"
+        return {"passed": zscore >= min_zscore, "reason": reason, "score": zscore}
+
+    def evaluate_batch(self, universe: UniverseBatch) -> BatchEvaluation:
+        window = self.params["window"]
+        min_zscore = self.params["min_zscore"]
+        today = self.today_value(universe.snapshot)
+        if universe.rolling is not None and universe.rolling.has(window):
+            enough = ~np.isnan(universe.rolling.mean(self.field, window))
+            zscore = universe.rolling.zscore(self.field, window, today)
+        else:
+            enough = (universe.lengths >= window) & (window > 0)
+            zscore = np.full(len(universe), np.nan)
+            if enough.any():
+                values = universe.history[self.field][enough, -window:]
+                std = values.std(axis=1)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    scores = (today[enough] - values.mean(axis=1)) / std
+                zscore[enough] = np.where(std > 0, scores, np.nan)
+        nonzero = enough & ~np.isnan(zscore)
+        return BatchEvaluation(
+            passed=nonzero & (zscore >= min_zscore),
+            reason_index=np.where(enough, np.where(nonzero, 2, 1), 0),
+            reasons=[
+                "داده تاریخی کافی نیست",
+                f"انحراف معیار {self.label} صفر است",
+                f"z-score {self.label} امروز {{0:.2f}} است (حداقل {min_zscore})",
+            ],
+            values=zscore[:, None],
+            scores=zscore,
+        )
+
+
+def _parameters(description: str) -> Dict[str, FilterParameter]:
+    return {
+        "window": FilterParameter(
+            name="window",
+            type="int",
+            description=f"تعداد روز برای میانگین و انحراف معیار {description}",
+            default=20,
+            minimum=2,
+            maximum=HISTORY_LOOKBACK,
+        ),
+        "min_zscore": FilterParameter(
+            name="min_zscore",
+            type="float",
+            description="حداقل فاصله مقدار امروز از میانگین بر حسب انحراف معیار",
+            default=2.0,
+        ),
+    }
+
+
+class VolumeZScoreFilter(_ZScoreSpikeFilter):
+    id = "volume_zscore"
+    name = "جهش حجم (z-score)"
+    description = "حجم امروز چند انحراف معیار بالاتر از میانگین دوره انتخابی باشد"
+    field = "volume"
+    label = "حجم"
+    parameters = _parameters("حجم")
+
+    def candle_value(self, candle: Dict[str, Any]) -> float:
+        return candle.get("volume", 0)
+
+    def today_value(self, snapshot: Dict[str, Any]) -> Any:
+        return snapshot.get("volume", 0)
+
+
+class TradeValueZScoreFilter(_ZScoreSpikeFilter):
+    id = "trade_value_zscore"
+    name = "جهش ارزش معاملات (z-score)"
+    description = (
+        "ارزش معاملات امروز چند انحراف معیار بالاتر از میانگین دوره انتخابی باشد"
+    )
+    field = "value"
+    label = "ارزش معاملات"
+    parameters = _parameters("ارزش معاملات")
+
+    def candle_value(self, candle: Dict[str, Any]) -> float:
+        return candle["close"] * candle.get("volume", 0)
+
+    def today_value(self, snapshot: Dict[str, Any]) -> Any:
+        trade_value = snapshot.get("trade_value")
+        fallback = snapshot.get("last_price", 0) * snapshot.get("volume", 0)
+        if isinstance(trade_value, np.ndarray):
+            return np.where(trade_value != 0, trade_value, fallback)
+        return trade_value or fallback
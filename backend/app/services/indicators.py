@@ -1,27 +1,82 @@
-from typing import List
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
 
+import numpy as np
 
-def sma(values: List[float], window: int) -> List[float]:
+# Batch kernels operate along the last axis of 1D series or 2D (symbols x time)
+# matrices. Leading NaNs, as produced by the left padding of a universe matrix,
+# are treated as missing candles.
+
+
+def sma_array(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Cumulative-sum SMA. A point is NaN until ``window`` valid values are
+    available in its window.
+    """
     if window <= 0:
         raise ValueError("window must be positive")
-    result = []
-    for i in range(len(values)):
-        if i + 1 < window:
-            result.append(float("nan"))
-        else:
-            window_values = values[i + 1 - window : i + 1]
-            result.append(sum(window_values) / window)
+    data = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(data)
+    pad = [(0, 0)] * (data.ndim - 1) + [(1, 0)]
+    sums = np.pad(np.cumsum(np.where(valid, data, 0.0), axis=-1), pad)
+    counts = np.pad(np.cumsum(valid, axis=-1), pad)
+    result = np.full(data.shape, np.nan)
+    if data.shape[-1] < window:
+        return result
+    window_sums = sums[..., window:] - sums[..., :-window]
+    window_counts = counts[..., window:] - counts[..., :-window]
+    result[..., window - 1 :] = np.where(
+        window_counts == window, window_sums / window, np.nan
+    )
     return result
 
 
-def ema(values: List[float], window: int) -> List[float]:
+def ema_array(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    EMA as a first-order recursive filter along the last axis.
+
+    Each row is seeded with its first valid value, matching ``ema`` on the
+    unpadded list. 2D input is advanced one time step at a time across all rows;
+    a missing value (NaN) after the seed carries the previous EMA forward, so a
+    row with gaps matches ``ema`` on its valid values.
+    """
     if window <= 0:
         raise ValueError("window must be positive")
-    result = []
+    data = np.asarray(values, dtype=np.float64)
     multiplier = 2 / (window + 1)
-    ema_prev = None
+    if data.ndim == 1:
+        return np.array(_ema_list(data.tolist(), multiplier), dtype=np.float64)
+    result = np.empty_like(data)
+    ema_prev = np.full(data.shape[:-1], np.nan)
+    for t in range(data.shape[-1]):
+        price = data[..., t]
+        updated = np.where(
+            np.isnan(ema_prev), price, (price - ema_prev) * multiplier + ema_prev
+        )
+        ema_prev = np.where(np.isnan(price), ema_prev, updated)
+        result[..., t] = ema_prev
+    return result
+
+
+def macd_array(
+    values: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> Dict[str, np.ndarray]:
+    slow_ema = ema_array(values, slow)
+    fast_ema = ema_array(values, fast)
+    macd_line = fast_ema - slow_ema
+    signal_line = ema_array(macd_line, signal)
+    return {
+        "macd_line": macd_line,
+        "signal_line": signal_line,
+        "histogram": macd_line - signal_line,
+    }
+
+
+def _ema_list(values: List[float], multiplier: float) -> List[float]:
+    result = []
+    ema_prev = float("nan")
     for price in values:
-        if ema_prev is None:
+        if ema_prev != ema_prev:
             ema_prev = price
         else:
             ema_prev = (price - ema_prev) * multiplier + ema_prev
@@ -29,16 +84,103 @@ def ema(values: List[float], window: int) -> List[float]:
     return result
 
 
+# List-based API kept for existing callers.
+
+
+def sma(values: List[float], window: int) -> List[float]:
+    return sma_array(np.asarray(values, dtype=np.float64), window).tolist()
+
+
+def ema(values: List[float], window: int) -> List[float]:
+    if window <= 0:
+        raise ValueError("window must be positive")
+    return _ema_list([float(v) for v in values], 2 / (window + 1))
+
+
 def macd(values: List[float], fast: int = 12, slow: int = 26, signal: int = 9):
     if len(values) < slow:
         raise ValueError("Not enough data for MACD calculation")
-    slow_ema = ema(values, slow)
-    fast_ema = ema(values, fast)
-    macd_line = [f - s for f, s in zip(fast_ema, slow_ema)]
-    signal_line = ema(macd_line, signal)
-    histogram = [m - s for m, s in zip(macd_line, signal_line)]
-    return {
-        "macd_line": macd_line,
-        "signal_line": signal_line,
-        "histogram": histogram,
-    }
+    result = macd_array(np.asarray(values, dtype=np.float64), fast, slow, signal)
+    return {name: series.tolist() for name, series in result.items()}
+
+
+# Incremental state: O(1) updates when a new candle arrives.
+
+
+class EMAState:
+    def __init__(self, window: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.multiplier = 2 / (window + 1)
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> float:
+        if self.value is None:
+            self.value = float(price)
+        else:
+            self.value = (price - self.value) * self.multiplier + self.value
+        return self.value
+
+    def extend(self, prices: Iterable[float]) -> Optional[float]:
+        for price in prices:
+            self.update(price)
+        return self.value
+
+
+class RollingSMAState:
+    def __init__(self, window: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.values: Deque[float] = deque(maxlen=window)
+        self.total = 0.0
+
+    @property
+    def value(self) -> float:
+        if len(self.values) < self.window:
+            return float("nan")
+        return self.total / self.window
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(float(value))
+        self.total += value
+        return self.value
+
+    def extend(self, values: Iterable[float]) -> float:
+        for value in values:
+            self.update(value)
+        return self.value
+
+
+class MACDState:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9) -> None:
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+        self.count = 0
+
+    @classmethod
+    def from_values(
+        cls, values: Iterable[float], fast: int = 12, slow: int = 26, signal: int = 9
+    ) -> "MACDState":
+        state = cls(fast, slow, signal)
+        for value in values:
+            state.update(value)
+        return state
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.slow.window
+
+    def update(self, price: float) -> Dict[str, float]:
+        macd_value = self.fast.update(price) - self.slow.update(price)
+        signal_value = self.signal.update(macd_value)
+        self.count += 1
+        return {
+            "macd_line": macd_value,
+            "signal_line": signal_value,
+            "histogram": macd_value - signal_value,
+        }
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from app.services.data_providers.base import MarketDataProvider
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.chain import universe_symbol_data
+from app.services.filters.plan import FilterSpec, compile_plan
+from app.services.screener import build_result, run_screener
+
+logger = logging.getLogger(__name__)
+
+
+class LiveScreen:
+    """
+    Pass/fail state of one filter set across the universe.
+
+    ``results`` maps each passing symbol to its result row. After the initial
+    full screen, only the symbols the provider reports as updated are
+    evaluated again.
+    """
+
+    def __init__(self, provider: MarketDataProvider, filters: FilterSpec) -> None:
+        self.provider = provider
+        self.filters = filters
+        self.plan = compile_plan(filters)
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.subscribers: List["asyncio.Queue[Dict[str, Any]]"] = []
+        self.ready = asyncio.Event()
+        # Symbols updated while the initial screen was running.
+        self.pending: Set[str] = set()
+
+    def load(self) -> None:
+        self.results = {r["symbol"]: r for r in run_screener(self.provider, self.filters)}
+
+    def evaluate(self, symbols: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Screen only ``symbols``; a ``None`` outcome means the symbol fails."""
+        lookback = self.plan.history_lookback
+        snapshots = [self.provider.get_snapshot(s) for s in symbols]
+        histories = [self.provider.get_history_arrays(s, lookback) for s in symbols]
+        universe = UniverseBatch.from_arrays(snapshots, histories, lookback)
+        for timeframe, bars in self.plan.frame_lookbacks.items():
+            universe.add_frame(
+                timeframe,
+                [self.provider.get_history_arrays(s, bars, timeframe) for s in symbols],
+                bars,
+            )
+        outcome: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(symbols)
+        for row, reasons, scores in self.plan.evaluate(universe, universe_symbol_data):
+            outcome[symbols[row]] = build_result(self.plan, snapshots[row], reasons, scores)
+        return outcome
+
+    def apply(self, outcome: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Merge an ``evaluate`` outcome and return the ``entered``/``left`` diff."""
+        entered = []
+        left = []
+        for symbol, result in outcome.items():
+            if result is None:
+                if self.results.pop(symbol, None) is not None:
+                    left.append(symbol)
+            else:
+                if symbol not in self.results:
+                    entered.append(result)
+                self.results[symbol] = result
+        return {"entered": entered, "left": left}
+
+
+class LiveSubscription:
+    def __init__(self, screen: LiveScreen) -> None:
+        self.screen = screen
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        # Results at subscription time; diffs on ``queue`` apply on top of it.
+        self.initial = list(screen.results.values())
+
+
+class LiveScreener:
+    """
+    Keeps registered filter sets up to date as the provider publishes updates.
+
+    Identical filter sets share one ``LiveScreen``. Updates are collected from
+    any thread and handled in batches on the event loop, so a burst of ticks
+    costs one evaluation per screen.
+    """
+
+    def __init__(self, provider: MarketDataProvider) -> None:
+        self.provider = provider
+        self._screens: Dict[str, LiveScreen] = {}
+        self._dirty: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    async def subscribe(self, filters: FilterSpec) -> LiveSubscription:
+        """Register ``filters``; raises ``InvalidFilterError`` for an invalid set."""
+        key = compile_plan(filters).key
+        self._start()
+        screen = self._screens.get(key)
+        if screen is None:
+            screen = self._screens[key] = LiveScreen(self.provider, filters)
+            try:
+                await asyncio.to_thread(screen.load)
+                while screen.pending:
+                    symbols = list(screen.pending)
+                    screen.pending.clear()
+                    screen.apply(await asyncio.to_thread(screen.evaluate, symbols))
+            except BaseException:
+                del self._screens[key]
+                if not self._screens:
+                    self._stop()
+                raise
+            finally:
+                screen.ready.set()
+        await screen.ready.wait()
+        if self._screens.get(key) is not screen:
+            # The initial screen failed for the subscriber that started it.
+            return await self.subscribe(filters)
+        subscription = LiveSubscription(screen)
+        screen.subscribers.append(subscription.queue)
+        return subscription
+
+    def unsubscribe(self, subscription: LiveSubscription) -> None:
+        screen = subscription.screen
+        if subscription.queue in screen.subscribers:
+            screen.subscribers.remove(subscription.queue)
+        if not screen.subscribers and screen.ready.is_set():
+            self._screens.pop(screen.plan.key, None)
+        if not self._screens:
+            self._stop()
+
+    def _start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._unsubscribe = self.provider.subscribe(self._on_update)
+        self._task = asyncio.ensure_future(self._drain())
+
+    def _stop(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+        if self._task is not None:
+            self._task.cancel()
+        self._task = self._unsubscribe = self._loop = None
+        self._dirty.clear()
+
+    def _on_update(self, symbol: str) -> None:
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._mark_dirty, symbol)
+
+    def _mark_dirty(self, symbol: str) -> None:
+        self._dirty.add(symbol)
+        self._wakeup.set()
+
+    async def _drain(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            symbols = list(self._dirty)
+            self._dirty.clear()
+            for screen in list(self._screens.values()):
+                if not screen.ready.is_set():
+                    screen.pending.update(symbols)
+                    continue
+                try:
+                    outcome = await asyncio.to_thread(screen.evaluate, symbols)
+                except Exception:
+                    logger.exception("Live re-screen failed for %s", symbols)
+                    continue
+                diff = screen.apply(outcome)
+                if diff["entered"] or diff["left"]:
+                    for queue in screen.subscribers:
+                        queue.put_nowait(diff)
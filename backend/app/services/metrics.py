@@ -0,0 +1,220 @@
+import bisect
+import cProfile
+import io
+import math
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# TTLCache/IndicatorCache ``stats()`` keys exported as counters; the rest are gauges.
+_CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations")
+
+LabelValues = Tuple[str, ...]
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_values(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_values(self.labelnames, labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum.
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_values(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = series
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(_label_values(self.labelnames, labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, math.inf), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else _number(bound)
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (le,))} {cumulative}")
+                labels = _labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_number(total[0])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class ScreenerMetrics:
+    """
+    Process-wide screener metrics in the Prometheus text format.
+
+    Stage and filter timings are recorded where the work runs; with
+    ``screener_workers > 1`` the per-filter metrics of sharded screens stay in
+    the worker processes and are not exported. Caches register themselves and
+    their ``stats()`` are read at scrape time.
+    """
+
+    def __init__(self) -> None:
+        self.stage_seconds = Histogram(
+            "screener_stage_seconds", "Time spent in each screener stage", ["stage"]
+        )
+        self.filter_seconds = Histogram(
+            "screener_filter_seconds", "Time spent evaluating each filter", ["filter"]
+        )
+        self.filter_evaluated = Counter(
+            "screener_filter_evaluated_total", "Symbols evaluated by each filter", ["filter"]
+        )
+        self.filter_rejected = Counter(
+            "screener_filter_rejected_total", "Symbols rejected by each filter", ["filter"]
+        )
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency",
+            ["method", "route", "status"],
+        )
+        self.sync_seconds = Histogram(
+            "symbol_sync_seconds", "Duration of symbol table syncs from the provider"
+        )
+        self.sync_rows = Counter(
+            "symbol_sync_rows_total", "Symbol rows written by table syncs", ["action"]
+        )
+        self.startup_seconds = Histogram(
+            "startup_seconds", "Duration of each startup step of this process", ["step"]
+        )
+        self._caches: Dict[str, Any] = {}
+
+    def stage(self, name: str):
+        """Context manager timing one screener stage."""
+        return self.stage_seconds.time(stage=name)
+
+    def record_filter(
+        self, filter_id: str, seconds: float, evaluated: int, passed: int
+    ) -> None:
+        self.filter_seconds.observe(seconds, filter=filter_id)
+        self.filter_evaluated.inc(evaluated, filter=filter_id)
+        self.filter_rejected.inc(evaluated - passed, filter=filter_id)
+
+    def register_cache(self, name: str, cache: Any) -> None:
+        """Export ``cache.stats()`` under ``name``; a later cache replaces an earlier one."""
+        self._caches[name] = cache
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (
+            self.stage_seconds,
+            self.filter_seconds,
+            self.filter_evaluated,
+            self.filter_rejected,
+            self.request_seconds,
+            self.sync_seconds,
+            self.sync_rows,
+            self.startup_seconds,
+        ):
+            lines.extend(metric.render())
+        stats = {name: cache.stats() for name, cache in sorted(self._caches.items())}
+        keys = sorted({key for values in stats.values() for key in values})
+        for key in keys:
+            counter = key in _CACHE_COUNTERS
+            name = f"screener_cache_{key}_total" if counter else f"screener_cache_{key}"
+            lines.append(f"# HELP {name} Cache {key}")
+            lines.append(f"# TYPE {name} {'counter' if counter else 'gauge'}")
+            for cache_name, values in stats.items():
+                if key in values:
+                    lines.append(f'{name}{{cache="{cache_name}"}} {_number(values[key])}')
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache()
+def get_metrics() -> ScreenerMetrics:
+    return ScreenerMetrics()
+
+
+def profile_call(
+    func: Callable[..., Any], *args: Any, limit: int = 40, **kwargs: Any
+) -> Tuple[Any, str]:
+    """
+    Run ``func`` under cProfile and return its result with a summary of the
+    top ``limit`` functions by cumulative time.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return result, out.getvalue()
+
+
+def _label_values(names: Tuple[str, ...], labels: Dict[str, str]) -> LabelValues:
+    if set(labels) != set(names):
+        raise ValueError(f"Expected labels {names}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in names)
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: Optional[float]) -> str:
+    if value is None:
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
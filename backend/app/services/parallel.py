@@ -0,0 +1,316 @@
+import atexit
+import multiprocessing as mp
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Deque, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.data_providers.rolling import RollingStats
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.base import FilterBase
+from app.services.filters.chain import (
+    Match,
+    Selector,
+    evaluate_chain,
+    universe_symbol_data,
+)
+from app.services.filters.expression import CompiledExpression
+
+# Number of published universes kept for reuse by later requests. One that is
+# dropped is unlinked once the last run reading it has finished.
+_RETAINED_PUBLICATIONS = 2
+
+
+class SharedUniverse:
+    """
+    A ``UniverseBatch`` copied once into named shared-memory segments.
+
+    Only ``spec`` (segment names, shapes and dtypes) is sent to workers, which
+    map the segments directly, so market data is never pickled per request.
+    """
+
+    def __init__(self, universe: UniverseBatch) -> None:
+        self._segments: List[SharedMemory] = []
+        # Submitted runs with shards still pending, and whether the pool has
+        # dropped this publication; it is closed once both allow it.
+        self.runs = 0
+        self.retired = False
+        arrays: Dict[str, np.ndarray] = {
+            "symbols": np.array(universe.symbols, dtype=str),
+            "lengths": universe.lengths,
+            **{f"snapshot.{name}": col for name, col in universe.snapshot.items()},
+            **{f"history.{name}": mat for name, mat in universe.history.items()},
+        }
+        for timeframe, frame in universe.frames.items():
+            arrays[f"frame.{timeframe}.lengths"] = frame.lengths
+            for name, matrix in frame.history.items():
+                arrays[f"frame.{timeframe}.history.{name}"] = matrix
+        if universe.versions is not None:
+            arrays["versions"] = universe.versions
+        rolling = universe.rolling
+        if rolling is not None:
+            arrays["rolling.counts"] = rolling.counts
+            for name in rolling.sums:
+                arrays[f"rolling.sums.{name}"] = rolling.sums[name]
+                arrays[f"rolling.squares.{name}"] = rolling.squares[name]
+        self.spec: Dict[str, Any] = {
+            "token": uuid.uuid4().hex,
+            "lookback": universe.lookback,
+            "frames": {name: frame.lookback for name, frame in universe.frames.items()},
+            "rolling": None if rolling is None else rolling.windows,
+            "source": universe.source,
+            "arrays": {name: self._publish(array) for name, array in arrays.items()},
+        }
+
+    def _publish(self, array: np.ndarray) -> Tuple[str, Tuple[int, ...], str]:
+        array = np.ascontiguousarray(array)
+        segment = SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._segments.append(segment)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        return segment.name, array.shape, array.dtype.str
+
+    def close(self) -> None:
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+
+class ScreenerPool:
+    """Persistent worker processes that screen contiguous symbol shards."""
+
+    def __init__(self, workers: int, shard_size: int) -> None:
+        self.workers = workers
+        self.shard_size = max(1, shard_size)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp.get_context("spawn")
+        )
+        self._published: Deque[Tuple[Hashable, SharedUniverse]] = deque()
+        self._lock = threading.Lock()
+
+    def screen(
+        self,
+        universe: UniverseBatch,
+        instances: Sequence[FilterBase],
+        version: Optional[Hashable] = None,
+        positions: Optional[Sequence[int]] = None,
+        select: Optional[Selector] = None,
+        expression: Optional[CompiledExpression] = None,
+    ) -> List[Match]:
+        """
+        Evaluate the filter chain (or ``expression``, instead of it) shard by
+        shard and merge the matches in shard order, which is the same row order
+        the serial path produces.
+        """
+        matches: List[Match] = []
+        for future in self.submit(universe, instances, version, positions, select, expression):
+            matches.extend(future.result())
+        return matches
+
+    def submit(
+        self,
+        universe: UniverseBatch,
+        instances: Sequence[FilterBase],
+        version: Optional[Hashable] = None,
+        positions: Optional[Sequence[int]] = None,
+        select: Optional[Selector] = None,
+        expression: Optional[CompiledExpression] = None,
+    ) -> List["Future[List[Match]]"]:
+        """
+        Submit every shard and return their futures in shard order. The
+        published universe stays alive until all of them have resolved.
+        """
+        shared = self._publish(universe, version)
+        futures = [
+            self.executor.submit(
+                _screen_shard,
+                shared.spec,
+                list(instances),
+                None if positions is None else list(positions),
+                select,
+                start,
+                min(start + self.shard_size, len(universe)),
+                expression,
+            )
+            for start in range(0, len(universe), self.shard_size)
+        ]
+        pending = [len(futures)]
+
+        def shard_done(_: Future) -> None:
+            with self._lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            self._release(shared)
+
+        if not futures:
+            self._release(shared)
+        for future in futures:
+            future.add_done_callback(shard_done)
+        return futures
+
+    def _publish(
+        self, universe: UniverseBatch, version: Optional[Hashable]
+    ) -> SharedUniverse:
+        """
+        Publication of ``universe`` for one more run: reused when one of the
+        same data version holds the same symbols, lookbacks and rolling
+        windows (the universe of a request depends on its plan, not only on
+        the version). Release it with ``_release`` when the run is done.
+        """
+        key = None if version is None else (version, _identity(universe))
+        with self._lock:
+            if key is not None:
+                for published_key, shared in self._published:
+                    if published_key == key:
+                        shared.runs += 1
+                        return shared
+            shared = SharedUniverse(universe)
+            shared.runs += 1
+            self._published.append((key, shared))
+            while len(self._published) > _RETAINED_PUBLICATIONS:
+                _retire(self._published.popleft()[1])
+            return shared
+
+    def _release(self, shared: SharedUniverse) -> None:
+        with self._lock:
+            shared.runs -= 1
+            if shared.retired and not shared.runs:
+                shared.close()
+
+    def close(self) -> None:
+        # Shutting down resolves every future, so each run has been released.
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            while self._published:
+                _retire(self._published.popleft()[1])
+
+
+def _retire(shared: SharedUniverse) -> None:
+    """Drop a publication: closed now when unused, else by its last run."""
+    shared.retired = True
+    if not shared.runs:
+        shared.close()
+
+
+def _identity(universe: UniverseBatch) -> Hashable:
+    """What, besides the data version, determines the contents of ``universe``."""
+    return (
+        tuple(universe.symbols),
+        universe.lookback,
+        tuple(sorted((name, frame.lookback) for name, frame in universe.frames.items())),
+        None if universe.rolling is None else universe.rolling.windows,
+    )
+
+
+@lru_cache()
+def get_screener_pool() -> ScreenerPool:
+    settings = get_settings()
+    pool = ScreenerPool(settings.screener_workers, settings.screener_shard_size)
+    atexit.register(pool.close)
+    return pool
+
+
+# Worker side: attached universes are cached per process by publication token.
+_ATTACHED: Dict[str, Tuple[UniverseBatch, List[SharedMemory]]] = {}
+
+
+def _attach(spec: Dict[str, Any]) -> UniverseBatch:
+    cached = _ATTACHED.get(spec["token"])
+    if cached is not None:
+        return cached[0]
+    if len(_ATTACHED) >= _RETAINED_PUBLICATIONS:
+        oldest = next(iter(_ATTACHED))
+        _, segments = _ATTACHED.pop(oldest)
+        for segment in segments:
+            _close_quietly(segment)
+
+    segments = []
+    arrays: Dict[str, np.ndarray] = {}
+    for name, (segment_name, shape, dtype) in spec["arrays"].items():
+        # Spawned workers share the parent's resource tracker, so attaching
+        # here does not take ownership; the parent unlinks the segment.
+        segment = SharedMemory(name=segment_name)
+        segments.append(segment)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+
+    universe = UniverseBatch(
+        symbols=arrays["symbols"].tolist(),
+        snapshot={
+            name.split(".", 1)[1]: array
+            for name, array in arrays.items()
+            if name.startswith("snapshot.")
+        },
+        history={
+            name.split(".", 1)[1]: array
+            for name, array in arrays.items()
+            if name.startswith("history.")
+        },
+        lengths=arrays["lengths"],
+        lookback=spec["lookback"],
+        versions=arrays.get("versions"),
+        source=spec["source"],
+    )
+    for timeframe, lookback in spec["frames"].items():
+        prefix = f"frame.{timeframe}.history."
+        universe.frames[timeframe] = UniverseBatch(
+            symbols=universe.symbols,
+            snapshot=universe.snapshot,
+            history={
+                name[len(prefix) :]: array
+                for name, array in arrays.items()
+                if name.startswith(prefix)
+            },
+            lengths=arrays[f"frame.{timeframe}.lengths"],
+            lookback=lookback,
+            versions=universe.versions,
+            source=universe.source,
+        )
+    if spec["rolling"] is not None:
+        universe.rolling = RollingStats(
+            windows=tuple(spec["rolling"]),
+            sums={
+                name[len("rolling.sums.") :]: array
+                for name, array in arrays.items()
+                if name.startswith("rolling.sums.")
+            },
+            squares={
+                name[len("rolling.squares.") :]: array
+                for name, array in arrays.items()
+                if name.startswith("rolling.squares.")
+            },
+            counts=arrays["rolling.counts"],
+        )
+    _ATTACHED[spec["token"]] = (universe, segments)
+    return universe
+
+
+def _close_quietly(segment: SharedMemory) -> None:
+    try:
+        segment.close()
+    except BufferError:
+        # A view is still referenced; the mapping goes away with the process.
+        pass
+
+
+def _screen_shard(
+    spec: Dict[str, Any],
+    instances: List[FilterBase],
+    positions: Optional[List[int]],
+    select: Optional[Selector],
+    start: int,
+    stop: int,
+    expression: Optional[CompiledExpression] = None,
+) -> List[Match]:
+    shard = _attach(spec).take(np.arange(start, stop))
+    if expression is not None:
+        matches = expression.evaluate(shard, universe_symbol_data, select)
+    else:
+        matches = evaluate_chain(shard, instances, universe_symbol_data, positions, select)
+    return [(start + row, reasons, scores) for row, reasons, scores in matches]
@@ -1,43 +1,408 @@
-from typing import Any, Dict, List
+import asyncio
+import hashlib
+import json
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple, Union
 
-from app.services.data_providers.base import MarketDataProvider
-from app.services.filters.registry import instantiate_filter
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.cache.cache import TTLCache
+from app.services.data_providers.base import AsyncMarketDataProvider, MarketDataProvider
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.chain import (
+    Match,
+    SymbolLoader,
+    evaluate_filter,
+    frame_views,
+    universe_symbol_data,
+)
+from app.services.filters.plan import FilterPlan, FilterSpec, Ranking, compile_plan
+from app.services.metrics import get_metrics
+from app.services.parallel import get_screener_pool
+
+AnyProvider = Union[MarketDataProvider, AsyncMarketDataProvider]
+
+# Screens currently being computed on each event loop, for request coalescing.
+_INFLIGHT: Dict[Tuple[asyncio.AbstractEventLoop, str], "asyncio.Task"] = {}
+
+
+@lru_cache()
+def get_screen_cache() -> TTLCache:
+    settings = get_settings()
+    cache = TTLCache(
+        settings.screen_cache_ttl_seconds, max_entries=settings.screen_cache_max_entries
+    )
+    get_metrics().register_cache("screen", cache)
+    return cache
+
+
+def screen_key(
+    provider: AnyProvider,
+    filters: FilterSpec,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> str:
+    """Canonical hash of the compiled request and the provider's data version."""
+    plan = compile_plan(filters)
+    plan.ranking(sort_by, limit)  # validate before caching anything
+    canonical = json.dumps(
+        {
+            "filters": plan.key,
+            "sort_by": sort_by,
+            "limit": limit,
+            "version": provider.universe_version(),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def run_screener_cached(
+    provider: MarketDataProvider,
+    filters: FilterSpec,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Run (or reuse) a screen and return ``(etag, results)``.
+
+    Identical concurrent requests share one computation. Providers without a
+    data version are not cached and get a content-based ETag instead.
+    """
+    key = screen_key(provider, filters, sort_by, limit)
+    if provider.universe_version() is None:
+        results = run_screener(provider, filters, sort_by, limit)
+        return _content_etag(results), results
+    return key, get_screen_cache().get_or_load(
+        key, lambda: run_screener(provider, filters, sort_by, limit)
+    )
+
+
+async def run_screener_cached_async(
+    provider: AsyncMarketDataProvider,
+    filters: FilterSpec,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Async counterpart of ``run_screener_cached``."""
+    key = screen_key(provider, filters, sort_by, limit)
+    if provider.universe_version() is None:
+        results = await run_screener_async(provider, filters, sort_by, limit)
+        return _content_etag(results), results
+
+    cache = get_screen_cache()
+    results = cache.get(key)
+    if results is not None:
+        return key, results
+
+    inflight_key = (asyncio.get_running_loop(), key)
+    task = _INFLIGHT.get(inflight_key)
+    if task is None:
+
+        async def load() -> List[Dict[str, Any]]:
+            value = await run_screener_async(provider, filters, sort_by, limit)
+            cache.set(key, value)
+            return value
+
+        task = asyncio.ensure_future(load())
+        _INFLIGHT[inflight_key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(inflight_key, None))
+    # Shielded so a disconnecting client does not cancel the shared computation.
+    return key, await asyncio.shield(task)
+
+
+def _content_etag(results: List[Dict[str, Any]]) -> str:
+    body = json.dumps(results, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
 
 
 def run_screener(
-    provider: MarketDataProvider, filters: List[Dict[str, Any]]
+    provider: MarketDataProvider,
+    filters: FilterSpec,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    symbols = provider.list_symbols()
-    results = []
-
-    for symbol in symbols:
-        symbol_id = symbol["symbol"]
-        snapshot = provider.get_snapshot(symbol_id)
-        history = provider.get_history(symbol_id, lookback=120)
-        symbol_data = {**snapshot, "history": history}
-
-        passed_all = True
-        reasons = []
-        score = None
-
-        for f in filters:
-            instance = instantiate_filter(f["id"], f.get("params", {}))
-            evaluation = instance.evaluate(symbol_data)
-            if not evaluation.get("passed"):
-                passed_all = False
-                reasons.append(evaluation.get("reason") or "رد شده")
-                break
-            reasons.append(evaluation.get("reason") or "قبول")
-            if evaluation.get("score") is not None:
-                score = evaluation.get("score")
-
-        if passed_all:
-            results.append(
-                {
-                    **snapshot,
-                    "reason": " و ".join(reasons),
-                    "score": score,
-                }
-            )
-
-    return results
+    """
+    Screen the universe. Matches come in row order unless ``sort_by`` (a
+    selected filter id or ``"score"``) or ``limit`` asks for the top ranked.
+    """
+    metrics = get_metrics()
+    plan = compile_plan(filters)
+    ranking = plan.ranking(sort_by, limit)
+    with metrics.stage("universe"):
+        universe = load_universe(provider, plan)
+    with metrics.stage("evaluate"):
+        matches = match_universe(
+            universe,
+            plan,
+            provider.universe_version(),
+            lambda u, i: _provider_symbol_data(provider, u, i),
+            ranking,
+        )
+    with metrics.stage("snapshots"):
+        return [
+            build_result(plan, provider.get_snapshot(universe.symbols[row]), reasons, scores)
+            for row, reasons, scores in matches
+        ]
+
+
+async def run_screener_async(
+    provider: AsyncMarketDataProvider,
+    filters: FilterSpec,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Screen through the async provider protocol.
+
+    The universe is fetched with bounded concurrency and a per-call timeout
+    (``provider_*`` settings); CPU-bound evaluation runs in a worker thread.
+    Filters without a batch implementation receive ``symbol_data`` rebuilt from
+    the universe arrays.
+    """
+    settings = get_settings()
+    metrics = get_metrics()
+    plan = compile_plan(filters)
+    ranking = plan.ranking(sort_by, limit)
+    with metrics.stage("universe"):
+        universe = await _load_universe_async(provider, plan)
+    with metrics.stage("evaluate"):
+        matches = await asyncio.to_thread(
+            match_universe,
+            universe,
+            plan,
+            provider.universe_version(),
+            universe_symbol_data,
+            ranking,
+        )
+    with metrics.stage("snapshots"):
+        snapshots = await asyncio.wait_for(
+            provider.get_snapshots([universe.symbols[row] for row, _, _ in matches]),
+            settings.provider_timeout_seconds,
+        )
+    return [
+        build_result(plan, snapshot, reasons, scores)
+        for snapshot, (_, reasons, scores) in zip(snapshots, matches)
+    ]
+
+
+async def stream_screener_async(
+    provider: AsyncMarketDataProvider,
+    filters: FilterSpec,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield ``{"type": "result", "data": ...}`` records as matches are found,
+    chunk by chunk in row order, then one ``{"type": "summary", "data": ...}``
+    record with the evaluated and passed counts and the elapsed time.
+
+    A ranked request (``sort_by``/``limit``) keeps a running top-K across
+    chunks and emits it once every chunk is done. A fresh cached screen is
+    replayed directly (``evaluated`` is then ``None``). Closing the generator
+    stops the remaining chunks (queued pool shards are cancelled).
+    """
+    started = time.perf_counter()
+    plan = compile_plan(filters)
+    ranking = plan.ranking(sort_by, limit)
+    version = provider.universe_version()
+    cached = None
+    if version is not None:
+        cached = get_screen_cache().get(screen_key(provider, filters, sort_by, limit))
+    evaluated: Optional[int] = None
+    passed = 0
+
+    if cached is not None:
+        for result in cached:
+            passed += 1
+            yield {"type": "result", "data": result}
+    else:
+        universe = await _load_universe_async(provider, plan)
+        evaluated = len(universe)
+        best: List[Match] = []
+        async for matches in _iter_matches(universe, plan, version, ranking):
+            if ranking is not None:
+                best = ranking.merge([best, matches])
+                continue
+            async for result in _results(provider, universe, plan, matches):
+                passed += 1
+                yield result
+        async for result in _results(provider, universe, plan, best):
+            passed += 1
+            yield result
+
+    yield {
+        "type": "summary",
+        "data": {
+            "evaluated": evaluated,
+            "passed": passed,
+            "cached": cached is not None,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        },
+    }
+
+
+async def _results(
+    provider: AsyncMarketDataProvider,
+    universe: UniverseBatch,
+    plan: FilterPlan,
+    matches: List[Match],
+) -> AsyncIterator[Dict[str, Any]]:
+    if not matches:
+        return
+    snapshots = await asyncio.wait_for(
+        provider.get_snapshots([universe.symbols[row] for row, _, _ in matches]),
+        get_settings().provider_timeout_seconds,
+    )
+    for snapshot, (_, reasons, scores) in zip(snapshots, matches):
+        yield {"type": "result", "data": build_result(plan, snapshot, reasons, scores)}
+
+
+async def _iter_matches(
+    universe: UniverseBatch,
+    plan: FilterPlan,
+    version: Optional[Hashable],
+    ranking: Optional[Ranking],
+) -> AsyncIterator[List[Match]]:
+    select = None if ranking is None else ranking.select
+    if _use_pool(universe):
+        futures = get_screener_pool().submit(
+            universe, plan.instances, version, plan.positions, select, plan.expression
+        )
+        try:
+            for future in futures:
+                yield await asyncio.wrap_future(future)
+        finally:
+            for future in futures:
+                future.cancel()
+        return
+
+    chunk_size = max(1, get_settings().screener_stream_chunk_size)
+    for start in range(0, len(universe), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(universe)))
+        matches = await asyncio.to_thread(
+            plan.evaluate, universe.take(rows), universe_symbol_data, select
+        )
+        yield [(start + row, reasons, scores) for row, reasons, scores in matches]
+
+
+def load_universe(provider: MarketDataProvider, plan: FilterPlan) -> UniverseBatch:
+    """
+    Universe for ``plan``. When the plan has snapshot-only filters and needs
+    history, they run first over the whole market and history is loaded for
+    their survivors only, ``plan.history_lookback`` candles deep (and
+    ``plan.frame_lookbacks`` bars of other timeframes).
+    """
+    lookback = plan.history_lookback
+    frames = _frames(plan)
+    if (lookback == 0 and not frames) or not plan.snapshot_instances:
+        return provider.get_universe(lookback=lookback, **frames)
+    with get_metrics().stage("prefilter"):
+        snapshots = provider.get_universe(lookback=0)
+        symbols = _prefilter(snapshots, plan)
+    return provider.get_universe(lookback=lookback, symbols=symbols, **frames)
+
+
+async def _load_universe_async(
+    provider: AsyncMarketDataProvider, plan: FilterPlan
+) -> UniverseBatch:
+    settings = get_settings()
+    options = {
+        "concurrency": settings.provider_concurrency,
+        "timeout": settings.provider_timeout_seconds,
+        "batch_size": settings.provider_batch_size,
+    }
+    lookback = plan.history_lookback
+    frames = _frames(plan)
+    if (lookback == 0 and not frames) or not plan.snapshot_instances:
+        return await provider.get_universe(lookback, **options, **frames)
+    with get_metrics().stage("prefilter"):
+        snapshots = await provider.get_universe(0, **options)
+        symbols = await asyncio.to_thread(_prefilter, snapshots, plan)
+    return await provider.get_universe(lookback, symbols=symbols, **options, **frames)
+
+
+def _frames(plan: FilterPlan) -> Dict[str, Dict[str, int]]:
+    """``get_universe`` keyword for the plan's other timeframes, if it reads any."""
+    # Left out otherwise, so providers written before timeframes keep working.
+    frames = plan.frame_lookbacks
+    return {"frames": frames} if frames else {}
+
+
+def _prefilter(snapshots: UniverseBatch, plan: FilterPlan) -> List[str]:
+    """Symbols passing every snapshot-only filter of ``plan``, in universe order."""
+    metrics = get_metrics()
+    active = np.arange(len(snapshots))
+    for instance in plan.snapshot_instances:
+        if not len(active):
+            break
+        started = time.perf_counter()
+        evaluation = evaluate_filter(instance, snapshots.take(active), universe_symbol_data)
+        metrics.record_filter(
+            instance.id,
+            time.perf_counter() - started,
+            len(active),
+            int(evaluation.passed.sum()),
+        )
+        active = active[evaluation.passed]
+    return [snapshots.symbols[row] for row in active]
+
+
+def match_universe(
+    universe: UniverseBatch,
+    plan: FilterPlan,
+    version: Optional[Hashable],
+    load_symbol: SymbolLoader,
+    ranking: Optional[Ranking] = None,
+) -> List[Match]:
+    """
+    Evaluate the plan serially or on the process pool, per settings. With a
+    ranking, each shard selects its own top-K and the shards are heap-merged.
+    """
+    select = None if ranking is None else ranking.select
+    if _use_pool(universe):
+        futures = get_screener_pool().submit(
+            universe, plan.instances, version, plan.positions, select, plan.expression
+        )
+        parts = [future.result() for future in futures]
+    else:
+        parts = [plan.evaluate(universe, load_symbol, select)]
+    if ranking is None:
+        return [match for part in parts for match in part]
+    return ranking.merge(parts)
+
+
+def build_result(
+    plan: FilterPlan,
+    snapshot: Dict[str, Any],
+    reasons: List[str],
+    scores: List[Optional[float]],
+) -> Dict[str, Any]:
+    """Result row: snapshot, joined reasons, composite score and per-filter scores."""
+    return {
+        **snapshot,
+        "reason": " و ".join(reasons),
+        "score": plan.composite(scores),
+        "scores": scores,
+    }
+
+
+def _use_pool(universe: UniverseBatch) -> bool:
+    settings = get_settings()
+    return settings.screener_workers > 1 and len(universe) > settings.screener_shard_size
+
+
+def _provider_symbol_data(
+    provider: MarketDataProvider, universe: UniverseBatch, i: int
+) -> Dict[str, Any]:
+    symbol_id = universe.symbols[i]
+    return {
+        **provider.get_snapshot(symbol_id),
+        "history": provider.get_history(symbol_id, lookback=universe.lookback),
+        "frames": frame_views(universe, i),
+        "data_version": provider.data_version(symbol_id),
+    }
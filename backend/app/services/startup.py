@@ -0,0 +1,54 @@
+import logging
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+
+from app.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """
+    Durations of the startup steps of this process (imports, database setup,
+    provider load, seeding...), exported as ``startup_seconds`` and logged
+    once startup is done.
+    """
+
+    def __init__(self) -> None:
+        self.steps: List[Tuple[str, float]] = []
+
+    def record(self, step: str, seconds: float) -> None:
+        self.steps.append((step, seconds))
+        get_metrics().startup_seconds.observe(seconds, step=step)
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @property
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.steps)
+
+    def summary(self) -> str:
+        steps = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.steps)
+        return f"{self.total:.3f}s ({steps})"
+
+    def finish(self, budget_seconds: float = 0.0) -> None:
+        """Log the report; as a warning when it exceeds a positive budget."""
+        if 0 < budget_seconds < self.total:
+            logger.warning(
+                "Startup took %s, over the budget of %.3fs", self.summary(), budget_seconds
+            )
+        else:
+            logger.info("Startup took %s", self.summary())
+
+
+@lru_cache()
+def get_startup_report() -> StartupReport:
+    return StartupReport()
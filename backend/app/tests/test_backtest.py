@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+
+from app.services.backtest import forward_returns, history_signals, run_backtest
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.filters.chain import evaluate_filter, universe_symbol_data
+from app.services.filters.plan import compile_plan
+
+
+def _provider():
+    records = []
+    for i in range(5):
+        closes = [100.0 + 10 * math.sin((t + 5 * i) / 4) for t in range(50)]
+        volumes = [1000.0 + 400 * math.cos((t * (i + 1)) / 3) for t in range(50)]
+        # SYM4 starts trading later, so the panel has leading gaps.
+        start = 15 if i == 4 else 0
+        records.append(
+            {
+                "symbol": f"SYM{i}",
+                "company_name": f"Company {i}",
+                "last_price": closes[-1],
+                "volume": volumes[-1],
+                "trade_value": closes[-1] * volumes[-1],
+                "percent_change": 0.0,
+                "last_updated": "2025-01-01T00:00:00",
+                "history": [
+                    {
+                        "date": f"2024-{1 + t // 28:02d}-{1 + t % 28:02d}",
+                        "close": closes[t],
+                        "volume": volumes[t],
+                    }
+                    for t in range(start, 50)
+                ],
+            }
+        )
+    return MockMarketDataProvider(MarketDataStore.from_records(records))
+
+
+def test_vectorized_history_matches_per_date_screen():
+    panel = _provider().get_panel()
+    assert panel.history["close"].shape == (50, 5)
+    assert np.isnan(panel.history["close"][:15, 4]).all()
+    plan = compile_plan(
+        [
+            {"id": "volume_above_average", "params": {"lookback": 10, "multiplier": 1.1}},
+            {"id": "smart_money_inflow", "params": {"threshold": 1.05, "lookback_days": 5}},
+        ]
+    )
+    for instance in plan.instances:
+        vectorized = instance.evaluate_history(panel)
+        for t in range(len(panel)):
+            universe = panel.universe_at(t, 60)
+            expected = evaluate_filter(instance, universe, universe_symbol_data).passed
+            assert (vectorized[t] == expected).all(), (instance.id, t)
+
+
+def test_trailing_sum_and_forward_returns():
+    panel = _provider().get_panel()
+    volume = panel.history["volume"]
+    sums = panel.trailing_sum("volume", 3)
+    assert np.isnan(sums[:3]).all()
+    assert np.allclose(sums[10], volume[7:10].sum(axis=0), equal_nan=True)
+    # Needs all three candles before the date.
+    assert np.isnan(sums[17, 4]) and not np.isnan(sums[18, 4])
+
+    close = panel.history["close"]
+    returns = forward_returns(close, 5)
+    assert np.allclose(returns[:-5], close[5:] / close[:-5] - 1, equal_nan=True)
+    assert np.isnan(returns[-5:]).all()
+
+
+def test_run_backtest_reports_per_set_stats():
+    provider = _provider()
+    macd = compile_plan([{"id": "macd_above_zero"}]).instances[0]
+    signals = history_signals(macd, provider.get_panel())
+    assert not signals[:26].any() and signals.any()
+
+    result = run_backtest(
+        provider,
+        [
+            {"name": "macd", "filters": [{"id": "macd_above_zero"}]},
+            {"name": "none", "filters": []},
+        ],
+        horizons=[1, 5],
+    )
+    assert result["dates"] == 50 and result["symbols"] == 5
+    macd_set, everything = result["results"]
+    assert macd_set["signals"] == int(signals.sum())
+    assert [h["count"] for h in macd_set["horizons"]][0] <= macd_set["signals"]
+    # With no filters every symbol-date signals, which is the baseline.
+    assert everything["horizons"][0]["count"] == result["baseline"][0]["count"]
+    assert everything["horizons"][0]["excess_return"] == 0.0
+    assert 0.0 <= macd_set["horizons"][1]["hit_rate"] <= 1.0
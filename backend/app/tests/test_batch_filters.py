@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.services.data_providers.universe import UniverseBatch
+from app.services.filters.macd_positive import MacdAboveZeroFilter
+from app.services.filters.smart_money import SmartMoneyInflowFilter
+from app.services.filters.volume_spike import VolumeAboveAverageFilter
+
+
+def _universe(n_symbols=12, lookback=60):
+    rng = np.random.default_rng(7)
+    snapshots, histories, symbol_data = [], [], []
+    for i in range(n_symbols):
+        length = int(rng.integers(5, lookback + 10))
+        close = 100 + np.cumsum(rng.normal(0, 2, length))
+        volume = rng.integers(1_000, 5_000, length).astype(float)
+        snapshot = {
+            "symbol": f"S{i}",
+            "last_price": float(close[-1]),
+            "volume": float(rng.integers(1_000, 9_000)),
+            "trade_value": 0.0 if i % 3 == 0 else float(rng.integers(100_000, 900_000)),
+            "percent_change": 0.0,
+        }
+        snapshots.append(snapshot)
+        histories.append({"close": close, "volume": volume, "value": close * volume})
+        history = [
+            {"close": float(c), "volume": float(v)}
+            for c, v in zip(close[-lookback:], volume[-lookback:])
+        ]
+        symbol_data.append({**snapshot, "history": history})
+    return UniverseBatch.from_arrays(snapshots, histories, lookback), symbol_data
+
+
+def test_batch_matches_per_symbol():
+    universe, symbol_data = _universe()
+    filters = [
+        MacdAboveZeroFilter(fast=5, slow=10, signal=3),
+        VolumeAboveAverageFilter(lookback=10, multiplier=1.0),
+        SmartMoneyInflowFilter(lookback_days=15, threshold=0.5),
+    ]
+    for f in filters:
+        batch = f.evaluate_batch(universe)
+        for i, data in enumerate(symbol_data):
+            expected = f.evaluate(data)
+            assert bool(batch.passed[i]) == expected["passed"]
+            assert batch.reason(i) == expected["reason"]
+
+
+def test_take_reorders_full_length_indices():
+    universe, _ = _universe(n_symbols=3)
+    assert universe.take([0, 1, 2]) is universe
+    reordered = universe.take([2, 0, 1])
+    assert reordered.symbols == ["S2", "S0", "S1"]
+    np.testing.assert_array_equal(reordered.history["close"][0], universe.history["close"][2])
+    assert universe.take([1, 1, 1]).symbols == ["S1"] * 3
@@ -0,0 +1,22 @@
+from benchmarks.run import compare, run
+from benchmarks.synthetic import synthetic_records
+
+
+def test_synthetic_records_shape():
+    records = synthetic_records(4, 30, regime="mixed", seed=1)
+    assert len(records) == 4 and len(records[0]["history"]) == 30
+    assert records[0]["last_price"] == records[0]["history"][-1]["close"]
+    assert synthetic_records(4, 30, regime="mixed", seed=1) == records
+
+
+def test_benchmark_run_and_regression_check():
+    report = run(symbols=20, candles=40, repeat=2, route=False)
+    results = report["results"]
+    assert {"provider_load", "indicators.macd", "run_screener"} <= set(results)
+    assert all(stats["p50_ms"] <= stats["p99_ms"] for stats in results.values())
+
+    baseline = {"run_screener": {**results["run_screener"], "p50_ms": 1.0}}
+    slower = {"run_screener": {**results["run_screener"], "p50_ms": 1.5}}
+    assert compare(slower, baseline, threshold=0.2) != []
+    assert compare(slower, baseline, threshold=0.2, min_ms=1.0) == []
+    assert compare(slower, baseline, threshold=0.6) == []
@@ -0,0 +1,32 @@
+import numpy as np
+
+from app.services.data_providers.binary_format import read_binary, write_binary
+from app.services.data_providers.market_store import MarketDataStore
+from app.tests.test_market_store import _records
+
+
+def test_roundtrip_matches_json_store(tmp_path):
+    path = tmp_path / "candles.bin"
+    write_binary(_records(), path)
+    mapped = read_binary(path)
+    expected = MarketDataStore.from_records(_records())
+
+    assert mapped.symbols == expected.symbols
+    for row in range(len(expected)):
+        assert mapped.snapshot(row) == expected.snapshot(row)
+        for name, values in expected.series(row).items():
+            np.testing.assert_array_equal(mapped.series(row)[name], values)
+    # Histories are views into the read-only mapping, not copies.
+    assert not mapped.series(0)["close"].flags.writeable
+    # Every process mapping the same file gets the same store identity.
+    assert read_binary(path).uid == mapped.uid
+
+
+def test_append_copies_mapped_buffer(tmp_path):
+    path = tmp_path / "candles.bin"
+    write_binary(_records(), path)
+    store = read_binary(path)
+    row = store.row("BBB")
+    store.append_candle(row, "2025-01-04T10:00:00", 6.0, 60.0)
+    assert store.series(row)["close"].tolist() == [5.0, 6.0]
+    assert read_binary(path).series(row)["close"].tolist() == [5.0]
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from app.services.cache.cache import TTLCache
+
+
+def test_falsy_values_are_hits():
+    cache = TTLCache(ttl_seconds=60)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_load("empty", lambda: calls.append(1) or []) == []
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_bounds_evict_least_recently_used():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+    sized = TTLCache(ttl_seconds=60, max_bytes=10, sizeof=lambda v: v)
+    sized.set("x", 6)
+    sized.set("y", 6)
+    assert sized.keys() == ["y"] and sized.stats()["bytes"] == 6
+
+
+def test_expired_entries_are_swept():
+    cache = TTLCache(ttl_seconds=0.05)
+    cache.set("a", 1)
+    assert cache.sweep() == 0
+    time.sleep(0.06)
+    assert cache.sweep() == 1
+    assert len(cache) == 0
+
+
+def test_single_flight_loader():
+    cache = TTLCache(ttl_seconds=60)
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(1)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
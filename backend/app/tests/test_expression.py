@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.backtest import history_signals, signal_matrix
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.filters.base import InvalidFilterError
+from app.services.filters.plan import compile_plan
+from app.services.metrics import get_metrics
+from app.services.screener import run_screener
+
+
+def _provider():
+    records = []
+    for i in range(12):
+        closes = [100.0 + 10 * math.sin((t + 3 * i) / 5) for t in range(60)]
+        volumes = [1000.0 + 500 * math.cos(t * (i + 1) / 7) for t in range(60)]
+        records.append(
+            {
+                "symbol": f"SYM{i}",
+                "company_name": f"Company {i}",
+                "last_price": closes[-1],
+                "volume": volumes[-1],
+                "trade_value": closes[-1] * volumes[-1],
+                "percent_change": i - 6.0,
+                "last_updated": "2025-01-01T00:00:00",
+                "history": [
+                    {
+                        "date": f"2024-{1 + t // 28:02d}-{1 + t % 28:02d}",
+                        "close": closes[t],
+                        "volume": volumes[t],
+                    }
+                    for t in range(60)
+                ],
+            }
+        )
+    return MockMarketDataProvider(MarketDataStore.from_records(records))
+
+
+MACD = {"id": "macd_above_zero"}
+VOLUME = {"id": "volume_above_average", "params": {"lookback": 10, "multiplier": 1.0}}
+BAND = {"id": "percent_change_band", "params": {"min_change": -3, "max_change": 3}}
+
+
+def _symbols(provider, filters):
+    return {r["symbol"] for r in run_screener(provider, filters)}
+
+
+def test_expression_matches_set_logic():
+    provider = _provider()
+    macd, volume, band = (_symbols(provider, [f]) for f in (MACD, VOLUME, BAND))
+    everything = _symbols(provider, [])
+    assert macd and volume and band
+
+    expression = {"or": [{"and": [MACD, {"not": VOLUME}]}, BAND]}
+    expected = (macd & (everything - volume)) | band
+    results = run_screener(provider, expression)
+    assert {r["symbol"] for r in results} == expected
+    # Row order, like the chain; scores follow the leaves in request order.
+    assert [r["symbol"] for r in results] == [s for s in sorted(everything) if s in expected]
+    ids = ("macd_above_zero", "volume_above_average", "percent_change_band")
+    assert compile_plan(expression).ids == ids
+    top = run_screener(provider, expression, sort_by="percent_change_band", limit=2)
+    assert [r["scores"][2] for r in top] == sorted(
+        (r["scores"][2] for r in results if r["scores"][2] is not None), reverse=True
+    )[:2]
+
+    # A plain list is an AND, and gives the same matches as its expression.
+    assert _symbols(provider, {"and": [MACD, BAND]}) == _symbols(provider, [MACD, BAND])
+    assert _symbols(provider, {"not": {"not": MACD}}) == macd
+
+
+def test_shared_subexpressions_are_evaluated_once():
+    provider = _provider()
+    metrics = get_metrics()
+    evaluated = metrics.filter_evaluated
+    before = evaluated.value(filter="macd_above_zero")
+    shared = {"and": [BAND, MACD]}
+    # The two ``and`` nodes are the same node (operand order does not matter),
+    # and MACD is one leaf whatever its weight.
+    expression = {"or": [{"and": [MACD, BAND]}, {"not": shared}, {**MACD, "weight": 2}]}
+    plan = compile_plan(expression)
+    assert plan.ids == ("macd_above_zero", "percent_change_band")
+    assert plan.weights == (1.0, 1.0)
+    assert len(run_screener(provider, expression)) == 12
+    # MACD ran at most once per symbol although it appears three times.
+    assert evaluated.value(filter="macd_above_zero") - before <= 12
+
+    # Only top-level AND operands can prefilter snapshots.
+    assert [f.id for f in compile_plan({"and": [MACD, BAND]}).snapshot_instances] == [
+        "percent_change_band"
+    ]
+    assert compile_plan({"or": [MACD, BAND]}).snapshot_instances == []
+
+
+def test_expression_backtest_and_validation():
+    provider = _provider()
+    panel = provider.get_panel()
+    plan = compile_plan({"and": [MACD, {"not": VOLUME}]})
+    macd, volume = (history_signals(instance, panel) for instance in plan.instances)
+    has_close = ~np.isnan(panel.history["close"])
+    assert (signal_matrix(panel, plan) == (has_close & macd & ~volume)).all()
+
+    for invalid in (
+        {"and": []},
+        {"or": MACD},
+        {"not": MACD, "id": "macd_above_zero"},
+        {"xor": [MACD]},
+        {"and": [{"id": "unknown"}]},
+    ):
+        with pytest.raises(InvalidFilterError):
+            compile_plan(invalid)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from app.services.filters.base import InvalidFilterError
+from app.services.filters.plan import Ranking, compile_plan
+
+
+def test_plan_coerces_params_and_applies_defaults():
+    plan = compile_plan([{"id": "volume_above_average", "params": {"lookback": "10"}}])
+    (step,) = plan.steps
+    assert step.instance.params == {"lookback": 10, "multiplier": 1.5, "timeframe": "D"}
+    assert isinstance(step.instance.params["lookback"], int)
+
+
+def test_plan_rejects_unknown_ids_and_bad_params():
+    with pytest.raises(InvalidFilterError):
+        compile_plan([{"id": "no_such_filter"}])
+    with pytest.raises(InvalidFilterError):
+        compile_plan([{"id": "macd_above_zero", "params": {"fast": 2.5}}])
+    with pytest.raises(InvalidFilterError):
+        compile_plan([{"id": "macd_above_zero", "params": {"window": 3}}])
+    with pytest.raises(InvalidFilterError):
+        compile_plan([{"id": "macd_above_zero", "params": {"timeframe": "H"}}])
+
+
+@pytest.mark.parametrize(
+    "filter_id, params",
+    [
+        ("macd_above_zero", {"fast": 0}),
+        ("macd_above_zero", {"fast": -3}),
+        ("macd_above_zero", {"fast": 30, "slow": 26}),
+        ("macd_above_zero", {"slow": 500}),
+        ("volume_above_average", {"lookback": -5}),
+        ("volume_above_average", {"multiplier": -1}),
+        ("smart_money_inflow", {"lookback_days": 0}),
+        ("volume_zscore", {"window": 1}),
+        ("price_range", {"min_price": -10}),
+    ],
+)
+def test_plan_rejects_out_of_range_params(filter_id, params):
+    with pytest.raises(InvalidFilterError, match="expected"):
+        compile_plan([{"id": filter_id, "params": params}])
+    assert compile_plan([{"id": "macd_above_zero", "params": {"fast": 1, "slow": 2}}])
+
+
+def test_plan_orders_by_rank_and_is_cached():
+    filters = [
+        {"id": "macd_above_zero", "params": {}},
+        {"id": "smart_money_inflow", "params": {"threshold": 1}},
+    ]
+    plan = compile_plan(filters)
+    assert [s.instance.id for s in plan.steps] == ["smart_money_inflow", "macd_above_zero"]
+    assert plan.positions == [1, 0]
+    assert compile_plan(filters) is plan
+    assert compile_plan(list(reversed(filters))).key != plan.key
+
+
+def test_ranking_partial_sort_and_merge():
+    ranking = Ranking(weights=(1.0, 2.0), limit=3)
+    scores = np.array(
+        [[1.0, np.nan], [0.0, 2.0], [np.nan, np.nan], [4.0, 0.0], [0.0, 2.0], [3.0, 1.0]]
+    )
+    # Composite: 1, 4, none, 4, 4, 5 -> row 5, then the tied rows 1, 3 in row order.
+    assert ranking.select(scores).tolist() == [5, 1, 3]
+
+    shards = [[(5, [], [3.0, 1.0]), (1, [], [0.0, 2.0])], [(3, [], [4.0, 0.0])]]
+    assert [m[0] for m in ranking.merge(shards)] == [5, 1, 3]
+
+    plan = compile_plan([{"id": "macd_above_zero"}, {"id": "smart_money_inflow"}])
+    assert plan.ranking("smart_money_inflow", 5).column == 1
+    assert plan.ranking() is None
+    with pytest.raises(InvalidFilterError):
+        plan.ranking("volume_above_average")
@@ -0,0 +1,106 @@
+import json
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.filters import registry
+from app.services.filters.base import InvalidFilterError
+from app.services.filters.registry import FilterRegistry, discover_filters
+
+PLUGIN = '''
+from app.services.filters.base import FilterBase
+
+
+class AlwaysFilter(FilterBase):
+    id = "always"
+    name = "Always"
+    description = "Passes every symbol"
+    parameters = {}
+
+    def evaluate(self, symbol_data):
+        return {"passed": True, "reason": "قبول"}
+'''
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    (tmp_path / "screener_plugin.py").write_text(PLUGIN, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    points = [
+        EntryPoint("always", "screener_plugin:AlwaysFilter", registry.ENTRY_POINT_GROUP),
+        EntryPoint("price_range", "screener_plugin:AlwaysFilter", registry.ENTRY_POINT_GROUP),
+    ]
+    monkeypatch.setattr(registry, "entry_points", lambda group: points)
+    yield
+    sys.modules.pop("screener_plugin", None)
+
+
+def test_plugins_are_discovered_without_importing_them(plugin):
+    references = discover_filters()
+    assert list(references)[-1] == "always"
+    assert references["price_range"] == registry.BUILTIN_FILTERS["price_range"]
+
+    filters = FilterRegistry(references)
+    assert "always" in filters and filters.loaded() == []
+    assert "screener_plugin" not in sys.modules
+    instance = filters["always"]()
+    assert instance.evaluate({})["passed"] and filters.loaded() == ["always"]
+
+    broken = FilterRegistry({"always": "screener_plugin:Missing", "x": "no_such_module:X"})
+    for filter_id in broken:
+        with pytest.raises(InvalidFilterError):
+            broken[filter_id]
+    with pytest.raises(InvalidFilterError):
+        FilterRegistry({"other": "screener_plugin:AlwaysFilter"})["other"]
+
+
+def test_fingerprint_covers_modules_shared_by_filters(tmp_path, monkeypatch):
+    package = tmp_path / "shared_plugin"
+    package.mkdir()
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    (package / "filters.py").write_text(PLUGIN, encoding="utf-8")
+    (package / "params.py").write_text("WINDOW = 20\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    filters = FilterRegistry({"always": "shared_plugin.filters:AlwaysFilter"})
+    fingerprint = filters.fingerprint()
+    assert filters.fingerprint() == fingerprint
+    (package / "params.py").write_text("WINDOW = 120\n", encoding="utf-8")
+    assert filters.fingerprint() != fingerprint
+    assert "shared_plugin" not in sys.modules
+
+
+def test_fingerprint_of_builtins_covers_only_the_filter_sources():
+    modules = registry._source_modules(registry.BUILTIN_FILTERS)
+    assert modules == sorted(registry.BUILTIN_SOURCES)
+    paths = [path for module in modules for path, _, _ in registry._source_files(module)]
+    assert any(path.endswith("volume_spike.py") for path in paths)
+    assert not any("tests" in path or "routes" in path for path in paths)
+    plugin = {"always": "shared_plugin.filters:AlwaysFilter"}
+    assert registry._source_modules(plugin) == ["shared_plugin"]
+
+
+def test_manifest_file_is_reused_until_a_filter_changes(plugin, tmp_path, monkeypatch):
+    path = tmp_path / "filters.json"
+    monkeypatch.setattr(get_settings(), "filter_manifest_file", str(path))
+
+    def fresh_manifest():
+        registry.get_filter_registry.cache_clear()
+        registry.get_filter_manifest.cache_clear()
+        return json.loads(registry.get_filter_manifest())
+
+    try:
+        manifest = fresh_manifest()
+        assert [f["id"] for f in manifest][-1] == "always" and path.exists()
+        # A new process serves the saved manifest without importing the filters.
+        assert fresh_manifest() == manifest
+        assert registry.get_filter_registry().loaded() == []
+        (tmp_path / "screener_plugin.py").write_text(
+            PLUGIN.replace("Passes every symbol", "Passes all"), encoding="utf-8"
+        )
+        sys.modules.pop("screener_plugin", None)
+        assert fresh_manifest()[-1]["description"] == "Passes all"
+    finally:
+        registry.get_filter_registry.cache_clear()
+        registry.get_filter_manifest.cache_clear()
@@ -0,0 +1,24 @@
+from app.services.cache.indicator_cache import IndicatorCache
+
+
+def test_version_change_is_a_miss():
+    cache = IndicatorCache(max_entries=10)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_compute("AAA", "macd", {"fast": 12}, 1, compute) == 1
+    assert cache.get_or_compute("AAA", "macd", {"fast": 12}, 1, compute) == 1
+    assert cache.get_or_compute("AAA", "macd", {"fast": 12}, 2, compute) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["size"] == 1
+
+
+def test_lru_eviction():
+    cache = IndicatorCache(max_entries=2)
+    for symbol in ("A", "B"):
+        cache.get_or_compute(symbol, "sma", {"window": 5}, 0, lambda: symbol)
+    cache.get_or_compute("A", "sma", {"window": 5}, 0, lambda: "stale")
+    cache.get_or_compute("C", "sma", {"window": 5}, 0, lambda: "C")
+    assert cache.stats()["evictions"] == 1
+    assert cache.get(cache.make_key("B", "sma", {"window": 5}), 0) is None
+    assert cache.get(cache.make_key("A", "sma", {"window": 5}), 0) == "A"
@@ -1,10 +1,24 @@
-from app.services.indicators import sma, ema, macd
+import math
+
+import numpy as np
+
+from app.services.indicators import (
+    EMAState,
+    MACDState,
+    RollingSMAState,
+    ema,
+    ema_array,
+    macd,
+    sma,
+    sma_array,
+)
 
 
 def test_sma_basic():
     values = [1, 2, 3, 4]
     result = sma(values, 2)
-    assert result == [float("nan"), 1.5, 2.5, 3.5]
+    assert math.isnan(result[0])
+    assert result[1:] == [1.5, 2.5, 3.5]
 
 
 def test_ema_monotonic():
@@ -19,3 +33,26 @@ def test_macd_above_zero():
     macd_result = macd(values)
     assert len(macd_result["macd_line"]) == len(values)
     assert macd_result["macd_line"][-1] > 0
+
+
+def test_batch_kernels_skip_left_padding():
+    row = np.array([3.0, 5.0, 4.0, 6.0, 8.0])
+    matrix = np.vstack([np.concatenate([[np.nan, np.nan], row[2:]]), row])
+    np.testing.assert_allclose(ema_array(matrix, 3)[0, 2:], ema(row[2:].tolist(), 3))
+    np.testing.assert_allclose(ema_array(matrix, 3)[1], ema(row.tolist(), 3))
+    sma_result = sma_array(matrix, 2)
+    assert np.isnan(sma_result[0, :3]).all()
+    np.testing.assert_allclose(sma_result[1, 1:], [4.0, 4.5, 5.0, 7.0])
+
+
+def test_incremental_states_match_batch():
+    values = [float(v) for v in np.random.default_rng(1).normal(100, 5, 80)]
+    expected = macd(values, fast=5, slow=13, signal=4)
+    state = MACDState.from_values(values[:-1], fast=5, slow=13, signal=4)
+    last = state.update(values[-1])
+    assert state.ready
+    assert abs(last["macd_line"] - expected["macd_line"][-1]) < 1e-9
+    assert abs(last["signal_line"] - expected["signal_line"][-1]) < 1e-9
+
+    assert abs(EMAState(10).extend(values) - ema(values, 10)[-1]) < 1e-9
+    assert abs(RollingSMAState(7).extend(values) - sma(values, 7)[-1]) < 1e-9
@@ -0,0 +1,79 @@
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.live import LiveScreener
+from app.services.screener import run_screener
+
+
+def _provider():
+    records = []
+    for i in range(6):
+        closes = [100.0 + 10 * math.sin((t + 7 * i) / 6) for t in range(60)]
+        records.append(
+            {
+                "symbol": f"SYM{i}",
+                "company_name": f"Company {i}",
+                "last_price": closes[-1],
+                "volume": 1000.0,
+                "trade_value": closes[-1] * 1000.0,
+                "percent_change": 0.0,
+                "last_updated": "2025-01-01T00:00:00",
+                "history": [
+                    {"date": f"2024-{1 + t // 28:02d}-{1 + t % 28:02d}", "close": c, "volume": 1000}
+                    for t, c in enumerate(closes)
+                ],
+            }
+        )
+    return MockMarketDataProvider(MarketDataStore.from_records(records))
+
+
+def test_replay_feed_restores_full_history():
+    provider = _provider()
+    full = provider.store.series(0)["close"].copy()
+    replay = provider.replay(warmup=30)
+    assert provider.store.history_length(0) == 30
+    updated = []
+    provider.subscribe(updated.append)
+    assert replay.step() == [f"SYM{i}" for i in range(6)]
+    assert updated == [f"SYM{i}" for i in range(6)] and len(replay) == 29 * 6
+    while replay.step():
+        pass
+    assert (provider.store.series(0)["close"] == full).all()
+
+
+def test_subscribers_added_from_many_threads_are_all_notified():
+    provider = _provider()
+    provider.publish_update("SYM0")  # no subscribers yet
+    calls = []
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: provider.subscribe(lambda s: calls.append((i, s))), range(64)))
+    provider.publish_update("SYM1")
+    assert sorted(calls) == [(i, "SYM1") for i in range(64)]
+
+
+def test_live_diffs_track_full_screen():
+    provider = _provider()
+    replay = provider.replay(warmup=30)
+    filters = [{"id": "macd_above_zero", "params": {}}]
+
+    async def scenario():
+        live = LiveScreener(provider)
+        subscription = await live.subscribe(filters)
+        current = {r["symbol"] for r in subscription.initial}
+        changes = 0
+        while replay.step():
+            expected = {r["symbol"] for r in run_screener(provider, filters)}
+            while current != expected:
+                diff = await asyncio.wait_for(subscription.queue.get(), 5)
+                current |= {r["symbol"] for r in diff["entered"]}
+                current -= set(diff["left"])
+                changes += 1
+        live.unsubscribe(subscription)
+        return changes, live
+
+    changes, live = asyncio.run(scenario())
+    assert changes > 0
+    assert live._task is None and not provider._subscribers
@@ -0,0 +1,81 @@
+import numpy as np
+
+from app.services.data_providers.market_store import (
+    HistoryView,
+    MarketDataStore,
+    history_records,
+)
+
+
+def _records():
+    return [
+        {
+            "symbol": "AAA",
+            "company_name": "A",
+            "last_price": 10.0,
+            "volume": 100,
+            "trade_value": 1000.0,
+            "percent_change": 1.0,
+            "last_updated": "2025-01-03T10:00:00",
+            "history": [
+                {"date": f"2025-01-0{i}T10:00:00", "close": float(i), "volume": 10 * i}
+                for i in range(1, 4)
+            ],
+        },
+        {
+            "symbol": "BBB",
+            "company_name": "B",
+            "last_price": 5.0,
+            "volume": 50,
+            "trade_value": 250.0,
+            "percent_change": -1.0,
+            "last_updated": "2025-01-03T10:00:00",
+            "history": [{"date": "2025-01-03T10:00:00", "close": 5.0, "volume": 50}],
+        },
+    ]
+
+
+def test_history_is_view():
+    store = MarketDataStore.from_records(_records())
+    row = store.row("AAA")
+    view = store.history(row, lookback=2)
+    assert view["close"].tolist() == [2.0, 3.0]
+    assert view["value"].tolist() == [40.0, 90.0]
+    assert np.shares_memory(view["close"], store.series(row)["close"])
+
+
+def test_matrix_right_aligned():
+    store = MarketDataStore.from_records(_records())
+    matrix = store.matrix("close", 3)
+    assert matrix.shape == (2, 3)
+    assert matrix[0].tolist() == [1.0, 2.0, 3.0]
+    assert np.isnan(matrix[1, :2]).all() and matrix[1, 2] == 5.0
+
+
+def test_history_records_roundtrip():
+    store = MarketDataStore.from_records(_records())
+    records = history_records(store.history(store.row("BBB")))
+    assert records == [{"date": "2025-01-03T10:00:00.000000", "close": 5.0, "volume": 50.0}]
+
+
+def test_history_view_is_lazy_and_slices_without_copying():
+    store = MarketDataStore.from_records(_records())
+    row = store.row("AAA")
+    view = HistoryView(store.history(row))
+    tail = view[-2:]
+    assert isinstance(tail, HistoryView) and len(tail) == 2
+    assert np.shares_memory(tail._columns["close"], store.series(row)["close"])
+    assert tail[-1] == {"date": "2025-01-03T10:00:00.000000", "close": 3.0, "volume": 30.0}
+    assert [c["close"] for c in view] == [1.0, 2.0, 3.0]
+    assert view == history_records(store.history(row))
+    # Appending does not change a view handed out earlier.
+    store.append_candle(row, "2025-01-04T10:00:00", 4.0, 40.0)
+    assert len(view) == 3 and len(HistoryView(store.history(row))) == 4
+
+
+def test_uid_is_derived_from_the_data():
+    uid = MarketDataStore.from_records(_records()).uid
+    assert MarketDataStore.from_records(_records()).uid == uid
+    changed = _records()
+    changed[1]["history"][0]["close"] = 6.0
+    assert MarketDataStore.from_records(changed).uid != uid
@@ -0,0 +1,82 @@
+from app.api.routes.metrics import metrics as metrics_route
+from app.services.cache.cache import TTLCache
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.metrics import Counter, Histogram, ScreenerMetrics, get_metrics, profile_call
+from app.services.screener import run_screener
+
+
+def _provider():
+    records = [
+        {
+            "symbol": f"SYM{i}",
+            "company_name": f"Company {i}",
+            "last_price": 100.0,
+            "volume": 1000.0 * (i + 1),
+            "trade_value": 100_000.0 * (i + 1),
+            "percent_change": 0.0,
+            "last_updated": "2025-01-01T00:00:00",
+            "history": [
+                {"date": f"2024-01-{d + 1:02d}", "close": 100.0, "volume": 1000.0}
+                for d in range(10)
+            ],
+        }
+        for i in range(6)
+    ]
+    return MockMarketDataProvider(MarketDataStore.from_records(records))
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    histogram = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/a")
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+    counter = Counter("rejected_total", "Rejected", ["filter"])
+    counter.inc(3, filter='a"b')
+    assert counter.render()[-1] == 'rejected_total{filter="a\\"b"} 3'
+
+
+def test_cache_stats_are_exported():
+    metrics = ScreenerMetrics()
+    cache = TTLCache(60)
+    metrics.register_cache("screen", cache)
+    cache.get("missing")
+    cache.get_or_load("key", lambda: 1)
+    cache.get("key")
+    text = metrics.render()
+    assert 'screener_cache_hits_total{cache="screen"} 1' in text
+    assert 'screener_cache_misses_total{cache="screen"} 2' in text
+    assert 'screener_cache_size{cache="screen"} 1' in text
+
+
+def test_screener_records_stages_and_rejections():
+    metrics = get_metrics()
+    filters = [{"id": "volume_above_average", "params": {"lookback": 5, "multiplier": 2}}]
+    evaluated = metrics.filter_evaluated.value(filter="volume_above_average")
+    rejected = metrics.filter_rejected.value(filter="volume_above_average")
+    universe_runs = metrics.stage_seconds.count(stage="universe")
+
+    provider = _provider()
+    results = run_screener(provider, filters)
+    assert len(results) == 4
+    assert metrics.stage_seconds.count(stage="universe") == universe_runs + 1
+    assert metrics.filter_evaluated.value(filter="volume_above_average") == evaluated + 6
+    assert metrics.filter_rejected.value(filter="volume_above_average") == (
+        rejected + 6 - len(results)
+    )
+
+    results, summary = profile_call(run_screener, provider, filters)
+    assert "run_screener" in summary and "cumulative" in summary
+
+
+def test_metrics_route_reports_data_loading_stages_of_the_mock_provider():
+    run_screener(_provider(), [{"id": "volume_above_average", "params": {"lookback": 5}}])
+    text = metrics_route().body.decode("utf-8")
+    assert 'screener_stage_seconds_count{stage="list_symbols"}' in text
+    assert 'screener_stage_seconds_count{stage="history"}' in text
@@ -0,0 +1,81 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from app.api.middleware import CompressionMiddleware
+from app.api.responses import columnar
+from app.core import json as app_json
+from app.core.json import encode_json
+
+ROWS = [
+    {
+        "symbol": "SYM1",
+        "last_price": 1250.5,
+        "last_updated": datetime(2025, 1, 1, 10, 30, 0, 125),
+        "reason": "حجم امروز 1200 در مقابل میانگین 800 با ضریب 1.5",
+        "score": None,
+        "scores": [1.5, None],
+    },
+    {
+        "symbol": "SYM2",
+        "last_price": np.float64(99.0),
+        "last_updated": datetime(2025, 1, 2),
+        "reason": "قبول",
+        "score": 2.0,
+        "scores": [2.0, None],
+    },
+]
+
+
+def test_encode_json_matches_jsonable_encoder(monkeypatch):
+    expected = json.loads(json.dumps(jsonable_encoder(ROWS), ensure_ascii=False))
+    fast = encode_json(ROWS)
+    assert json.loads(fast) == expected
+    assert "حجم امروز".encode("utf-8") in fast  # not escaped
+    not_finite = {"score": float("nan"), "scores": [np.float64("nan"), float("inf"), 1.5]}
+    written = {"score": None, "scores": [None, None, 1.5]}
+    assert json.loads(encode_json(not_finite)) == written
+    monkeypatch.setattr(app_json, "orjson", None)
+    assert json.loads(encode_json(ROWS)) == expected
+    assert json.loads(encode_json(not_finite)) == written
+
+    table = columnar(ROWS)
+    assert table["count"] == 2
+    assert table["columns"]["symbol"] == ["SYM1", "SYM2"]
+    columns = table["columns"]
+    assert [{name: columns[name][i] for name in columns} for i in range(2)] == ROWS
+    assert columnar([]) == {"count": 0, "columns": {}}
+
+
+def _respond(media_type, chunks, accept="gzip"):
+    async def app(scope, receive, send):
+        headers = [(b"content-type", media_type.encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for i, chunk in enumerate(chunks):
+            more = i < len(chunks) - 1
+            await send({"type": "http.response.body", "body": chunk, "more_body": more})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+    headers = dict(sent[0]["headers"])
+    return headers.get(b"content-encoding"), b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_compression_skips_small_and_streamed_responses():
+    body = encode_json(ROWS * 20)
+    encoding, sent = _respond("application/json", [body])
+    assert encoding == b"gzip" and gzip.decompress(sent) == body
+    assert _respond("application/json", [body], accept="identity") == (None, body)
+    assert _respond("application/json", [b"[]"]) == (None, b"[]")
+    # Streamed records go out uncompressed, chunk by chunk.
+    records = [b'{"type":"result"}\n' * 10] * 3
+    assert _respond("application/x-ndjson", records) == (None, b"".join(records))
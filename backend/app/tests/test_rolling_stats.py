@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.filters.chain import universe_symbol_data
+from app.services.filters.smart_money import SmartMoneyInflowFilter
+from app.services.filters.volume_spike import VolumeAboveAverageFilter
+from app.services.filters.zscore_spike import (
+    TradeValueZScoreFilter,
+    VolumeZScoreFilter,
+    _ZScoreSpikeFilter,
+)
+
+
+def _records(n_symbols=10, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = np.arange("2024-01-01", "2024-06-01", dtype="datetime64[D]")
+    records = []
+    for i in range(n_symbols):
+        length = int(rng.integers(3, 90))
+        closes = 100 + np.cumsum(rng.normal(0, 2, length))
+        volumes = rng.integers(1_000, 5_000, length).astype(float)
+        records.append(
+            {
+                "symbol": f"S{i}",
+                "company_name": f"Company {i}",
+                "last_price": float(closes[-1]),
+                "volume": float(rng.integers(1_000, 20_000)),
+                "trade_value": 0.0 if i % 3 == 0 else float(rng.integers(1e5, 2e6)),
+                "percent_change": 0.0,
+                "last_updated": "2024-06-01T00:00:00",
+                "history": [
+                    {"date": str(d), "close": float(c), "volume": float(v)}
+                    for d, c, v in zip(dates, closes, volumes)
+                ],
+            }
+        )
+    return records
+
+
+def _assert_matches_history(store):
+    stats = store.rolling_stats()
+    for row in range(len(store)):
+        series = store.series(row)
+        for window in store.rolling_windows:
+            for field in ("volume", "value"):
+                values = series[field][-window:]
+                mean = stats.mean(field, window)[row]
+                if len(values) < window:
+                    assert np.isnan(mean)
+                    continue
+                assert np.isclose(mean, values.mean())
+                assert np.isclose(stats.std(field, window)[row], values.std())
+
+
+def test_rolling_stats_follow_appends_and_truncation():
+    store = MarketDataStore.from_records(_records())
+    _assert_matches_history(store)
+    rng = np.random.default_rng(11)
+    for day in range(70):
+        date = np.datetime64("2024-07-01") + day
+        for row in range(len(store)):
+            store.append_candle(row, date, 100 + rng.normal(0, 5), rng.integers(1, 9_000))
+    _assert_matches_history(store)
+    store.truncate(0, 12)
+    store.set_rolling_windows([3, 12, 0])
+    assert store.rolling_windows == (3, 12)
+    _assert_matches_history(store)
+
+    # Constant volume: zero deviation despite rounding in the running sums.
+    for day in range(40):
+        store.append_candle(1, np.datetime64("2024-10-01") + day, 101.7, 1234.5)
+    assert store.rolling_stats().std("volume", 12)[1] == 0
+    assert np.isnan(store.rolling_stats().zscore("volume", 12, np.full(len(store), 9.0))[1])
+
+
+def test_filters_read_rolling_stats():
+    provider = MockMarketDataProvider(MarketDataStore.from_records(_records(30)))
+    universe = provider.get_universe(60)
+    assert universe.rolling is not None and universe.rolling.windows == (5, 10, 20, 60)
+    without = provider.get_universe(60)
+    without.rolling = None
+    filters = [
+        VolumeZScoreFilter(window=20, min_zscore=1.0),
+        TradeValueZScoreFilter(window=10, min_zscore=1.0),
+        # Not a maintained window: computed from the candles.
+        VolumeZScoreFilter(window=7, min_zscore=1.0),
+        VolumeAboveAverageFilter(lookback=20, multiplier=1.2),
+        SmartMoneyInflowFilter(lookback_days=60, threshold=0.8),
+    ]
+    for f in filters:
+        fast, slow = f.evaluate_batch(universe), f.evaluate_batch(without)
+        assert fast.passed.any() and (fast.passed == slow.passed).all()
+        for i in range(len(universe)):
+            single = f.evaluate(universe_symbol_data(universe, i))
+            assert single["passed"] == fast.passed[i]
+            assert single["reason"] == fast.reason(i) == slow.reason(i)
+            if single.get("score") is not None:
+                assert np.isclose(single["score"], fast.score(i))
+
+    assert provider.get_universe(0).rolling is None
+    # Shards of the universe keep their rows' statistics.
+    shard = universe.take([3, 1])
+    assert (shard.rolling.counts == universe.rolling.counts[[3, 1]]).all()
+
+
+def test_zscore_filters_must_define_their_values():
+    class Incomplete(_ZScoreSpikeFilter):
+        id = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
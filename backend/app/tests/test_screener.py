@@ -0,0 +1,199 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.routes.screener import get_body_cache, run_screen
+from app.core.config import get_settings
+from app.schemas.screener import ScreenerRunRequest
+from app.services.data_providers.base import AsyncMarketDataProvider
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.data_providers.sync_adapter import SyncProviderAdapter
+from app.services.filters.chain import evaluate_chain, universe_symbol_data
+from app.services.filters.volume_spike import VolumeAboveAverageFilter
+from app.services.parallel import ScreenerPool, get_screener_pool
+from app.services.screener import (
+    get_screen_cache,
+    run_screener,
+    run_screener_async,
+    run_screener_cached,
+    stream_screener_async,
+)
+
+
+def _provider():
+    records = []
+    for i in range(5):
+        closes = [100.0 + (t if i % 2 else -t) for t in range(40)]
+        records.append(
+            {
+                "symbol": f"SYM{i}",
+                "company_name": f"Company {i}",
+                "last_price": closes[-1],
+                "volume": 1000.0 * (i + 1),
+                "trade_value": closes[-1] * 1000.0 * (i + 1),
+                "percent_change": 0.0,
+                "last_updated": "2025-01-01T00:00:00",
+                "history": [
+                    {"date": f"2024-11-{1 + t % 28:02d}T00:00:00", "close": c, "volume": 1000}
+                    for t, c in enumerate(closes)
+                ],
+            }
+        )
+    return MockMarketDataProvider(MarketDataStore.from_records(records))
+
+
+def test_cached_screen_reuses_results_until_data_changes():
+    provider = _provider()
+    filters = [{"id": "macd_above_zero", "params": {}}]
+    etag, results = run_screener_cached(provider, filters)
+    assert [r["symbol"] for r in results] == ["SYM1", "SYM3"]
+
+    same_etag, same = run_screener_cached(
+        provider, [{"id": "macd_above_zero", "params": {"fast": 12, "slow": 26}}]
+    )
+    assert same_etag == etag and same is results
+
+    provider.ingest_candle("SYM0", {"date": "2024-12-01T00:00:00", "close": 500.0})
+    new_etag, _ = run_screener_cached(provider, filters)
+    assert new_etag != etag
+
+
+def test_process_pool_matches_serial_order():
+    provider = _provider()
+    universe = provider.get_universe(lookback=60)
+    instances = [VolumeAboveAverageFilter(lookback=10, multiplier=0.5)]
+    serial = evaluate_chain(universe, instances, universe_symbol_data)
+    pool = ScreenerPool(workers=2, shard_size=2)
+    try:
+        assert pool.screen(universe, instances, provider.universe_version()) == serial
+    finally:
+        pool.close()
+
+
+def test_process_pool_keeps_publications_until_their_shards_finish():
+    provider = _provider()
+    universe = provider.get_universe(lookback=60)
+    instances = [VolumeAboveAverageFilter(lookback=10, multiplier=0.5)]
+    serial = evaluate_chain(universe, instances, universe_symbol_data)
+    pool = ScreenerPool(workers=1, shard_size=2)
+    try:
+        # Newer versions are published while the first runs are still queued.
+        runs = [pool.submit(universe, instances, version) for version in range(4)]
+        for futures in runs:
+            assert [match for future in futures for match in future.result()] == serial
+    finally:
+        pool.close()
+
+
+def test_process_pool_matches_serial_for_plans_back_to_back(monkeypatch):
+    provider = _provider()
+    volume = {"id": "volume_above_average", "params": {"lookback": 10, "multiplier": 0.5}}
+    price = {"id": "price_range", "params": {"min_price": 100, "max_price": 2000}}
+    plans = [[volume], [volume, price], [volume]]
+    serial = [run_screener(provider, filters) for filters in plans]
+    assert [r["symbol"] for r in serial[1]] == ["SYM1", "SYM3"]
+
+    # Same data version, but the second plan screens a prefiltered subset.
+    settings = get_settings()
+    monkeypatch.setattr(settings, "screener_workers", 2)
+    monkeypatch.setattr(settings, "screener_shard_size", 1)
+    get_screener_pool.cache_clear()
+    try:
+        assert [run_screener(provider, filters) for filters in plans] == serial
+    finally:
+        get_screener_pool().close()
+        get_screener_pool.cache_clear()
+
+
+class _BulkProvider(AsyncMarketDataProvider):
+    """Async provider using the default chunked fan-out of ``get_universe``."""
+
+    def __init__(self, provider):
+        self.provider = provider
+
+    async def list_symbols(self):
+        return self.provider.list_symbols()
+
+    async def get_snapshots(self, symbols):
+        return [self.provider.get_snapshot(s) for s in symbols]
+
+    async def get_histories(self, symbols, lookback=60):
+        return [self.provider.get_history_arrays(s, lookback) for s in symbols]
+
+
+def test_async_bulk_fanout_matches_sync():
+    provider = _provider()
+    filters = [{"id": "smart_money_inflow", "params": {"threshold": 0.5}}]
+    expected = run_screener(provider, filters)
+    results = asyncio.run(run_screener_async(_BulkProvider(provider), filters))
+    assert results == expected
+
+
+def test_stream_yields_results_in_chunks_then_summary(monkeypatch):
+    monkeypatch.setattr(get_settings(), "screener_stream_chunk_size", 2)
+    provider = _provider()
+    filters = [{"id": "macd_above_zero", "params": {}}]
+    expected = run_screener(provider, filters)
+
+    async def collect():
+        return [record async for record in stream_screener_async(_BulkProvider(provider), filters)]
+
+    records = asyncio.run(collect())
+    assert [r["data"] for r in records[:-1]] == expected
+    assert records[-1]["type"] == "summary"
+    assert records[-1]["data"]["evaluated"] == 5
+    assert records[-1]["data"]["passed"] == len(expected)
+
+
+def test_ranked_screen_returns_top_k_by_filter_score():
+    provider = _provider()
+    filters = [{"id": "volume_above_average", "params": {"lookback": 10, "multiplier": 0.5}}]
+    full = run_screener(provider, filters)
+    top = run_screener(provider, filters, sort_by="volume_above_average", limit=2)
+    expected = sorted(full, key=lambda r: -r["scores"][0])[:2]
+    assert [r["symbol"] for r in top] == [r["symbol"] for r in expected] == ["SYM4", "SYM3"]
+    assert top[0]["score"] == top[0]["scores"][0] == 5.0
+
+
+def _run_route(provider, filters, etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    request = Request({"type": "http", "method": "POST", "headers": headers})
+    return asyncio.run(
+        run_screen(
+            ScreenerRunRequest(filters=filters),
+            request,
+            profile=False,
+            format="rows",
+            provider=SyncProviderAdapter(provider),
+            sync_provider=provider,
+        )
+    )
+
+
+def test_run_route_keeps_encoded_bodies_out_of_the_screen_cache():
+    provider = _provider()
+    filters = [{"id": "volume_above_average", "params": {}}]
+    screens, bodies = len(get_screen_cache()), len(get_body_cache())
+    first = _run_route(provider, filters)
+    second = _run_route(provider, filters)
+    assert first.body == second.body
+    assert len(get_screen_cache()) == screens + 1
+    assert len(get_body_cache()) == bodies + 1
+    assert _run_route(provider, filters, first.headers["etag"]).status_code == 304
+
+
+@pytest.mark.parametrize(
+    "selected",
+    [
+        {"id": "price_range", "params": {"min_price": 500, "max_price": 100}},
+        {"id": "percent_change_band", "params": {"min_change": 3, "max_change": -3}},
+    ],
+)
+def test_run_route_rejects_empty_bands(selected):
+    with pytest.raises(HTTPException) as raised:
+        _run_route(_provider(), [selected])
+    assert raised.value.status_code == 422
+    assert "expected at most" in raised.value.detail
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.filters.chain import universe_symbol_data
+from app.services.filters.plan import compile_plan
+from app.services.screener import run_screener
+
+
+def _provider():
+    records = []
+    for i in range(8):
+        closes = [100.0 * (i + 1) + 5 * math.sin(t / 3) for t in range(40)]
+        records.append(
+            {
+                "symbol": f"SYM{i}",
+                "company_name": f"Company {i}",
+                "last_price": closes[-1],
+                "volume": 2000.0,
+                "trade_value": closes[-1] * 2000.0,
+                "percent_change": i - 4.0,
+                "last_updated": "2025-01-01T00:00:00",
+                "history": [
+                    {"date": f"2024-{1 + t // 28:02d}-{1 + t % 28:02d}", "close": c, "volume": 1000}
+                    for t, c in enumerate(closes)
+                ],
+            }
+        )
+    return MockMarketDataProvider(MarketDataStore.from_records(records))
+
+
+SNAPSHOT_FILTERS = [
+    {"id": "min_trade_value", "params": {"min_value": 500_000}},
+    {"id": "price_range", "params": {"min_price": 0, "max_price": 700}},
+    {"id": "percent_change_band", "params": {"min_change": -2, "max_change": 3}},
+]
+
+
+def test_plan_lookback_follows_requirements():
+    plan = compile_plan(
+        SNAPSHOT_FILTERS[:1] + [{"id": "volume_above_average", "params": {"lookback": 10}}]
+    )
+    assert plan.history_lookback == 10
+    assert [f.id for f in plan.snapshot_instances] == ["min_trade_value"]
+    assert compile_plan(SNAPSHOT_FILTERS).history_lookback == 0
+    assert compile_plan([{"id": "macd_above_zero"}]).history_lookback == 120
+    assert compile_plan([]).history_lookback == 0
+
+
+def test_snapshot_filters_batch_matches_per_symbol():
+    universe = _provider().get_universe(lookback=0)
+    for selection in SNAPSHOT_FILTERS:
+        instance = compile_plan([selection]).instances[0]
+        batch = instance.evaluate_batch(universe)
+        for i in range(len(universe)):
+            single = instance.evaluate(universe_symbol_data(universe, i))
+            assert batch.passed[i] == single["passed"]
+            assert batch.reason(i) == single["reason"]
+            assert batch.score(i) == single.get("score")
+
+
+def test_history_is_loaded_for_snapshot_survivors_only():
+    provider = _provider()
+    calls = []
+    get_universe = provider.get_universe
+
+    def spy(lookback=60, symbols=None):
+        calls.append((lookback, None if symbols is None else list(symbols)))
+        return get_universe(lookback, symbols)
+
+    provider.get_universe = spy
+    history_filter = {"id": "volume_above_average", "params": {"lookback": 10}}
+    results = run_screener(provider, [history_filter] + SNAPSHOT_FILTERS)
+    # Prices are about 100 * (i + 1): trade value >= 500k needs i >= 2, and
+    # SYM6 closes just above 700. Every change in [-2, 3] is from i in 2..7.
+    survivors = ["SYM2", "SYM3", "SYM4", "SYM5"]
+    assert calls == [(0, None), (10, survivors)]
+    assert [r["symbol"] for r in results] == survivors
+    assert len(results[0]["scores"]) == 4
+
+    full = run_screener(provider, [history_filter])
+    expected = [r for r in full if r["symbol"] in survivors]
+    assert [r["score"] for r in expected] == [r["scores"][0] for r in results]
+    assert np.isclose(results[0]["scores"][1], results[0]["trade_value"])
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.bulk import upsert_symbols
+from app.db.sync import sync_symbols
+from app.db.search import (
+    decode_cursor,
+    encode_cursor,
+    ensure_search_index,
+    symbol_search_clause,
+)
+from app.models.base import Base
+from app.models.symbol import Symbol
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.metrics import get_metrics
+
+
+def _item(symbol, company_name, price=1.0):
+    return {
+        "symbol": symbol,
+        "company_name": company_name,
+        "last_price": price,
+        "volume": 1.0,
+        "trade_value": price,
+        "percent_change": 0.0,
+        "last_updated": datetime(2025, 1, 1),
+    }
+
+
+def test_upsert_and_fts_search(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    assert ensure_search_index(engine)
+
+    with Session(engine) as session:
+        upsert_symbols(
+            session, [_item("FOLD", "فولاد مبارکه"), _item("KHODRO", "ایران خودرو")]
+        )
+        session.commit()
+        upsert_symbols(
+            session, [_item("FOLD", "فولاد مبارکه اصفهان", price=2.0)], batch_size=1
+        )
+        session.commit()
+
+        def search(term):
+            clause = symbol_search_clause("sqlite", term)
+            return [s.symbol for s in session.query(Symbol).filter(clause).order_by(Symbol.id)]
+
+        assert session.query(Symbol).count() == 2
+        assert session.query(Symbol).filter_by(symbol="FOLD").one().last_price == 2.0
+        assert search("اصفهان") == ["FOLD"]
+        assert search("khod") == ["KHODRO"]
+        assert search("O") == ["FOLD", "KHODRO"]
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+def test_sync_writes_only_changed_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    records = [
+        {**_item(name, f"Company {name}"), "last_updated": "2025-01-01T00:00:00"}
+        for name in ("AAA", "BBB", "CCC")
+    ]
+    for record in records:
+        record["history"] = [{"date": "2025-01-01T00:00:00", "close": 1.0, "volume": 1.0}]
+    provider = MockMarketDataProvider(MarketDataStore.from_records(records))
+    updated = get_metrics().sync_rows.value(action="updated")
+
+    with Session(engine) as session:
+        upsert_symbols(session, [_item("OLD", "Delisted")])
+        session.commit()
+        stats = sync_symbols(session, provider)
+        assert (stats.inserted, stats.updated, stats.deleted) == (3, 0, 1)
+        assert sync_symbols(session, provider).unchanged == 3
+
+        provider.ingest_candle(
+            "BBB",
+            {"date": "2025-01-02T00:00:00", "close": 2.0, "volume": 5.0},
+            {"last_price": 2.0},
+        )
+        stats = sync_symbols(session, provider)
+        assert (stats.inserted, stats.updated, stats.unchanged) == (0, 1, 2)
+        assert session.query(Symbol).filter_by(symbol="BBB").one().last_price == 2.0
+        assert sorted(s.symbol for s in session.query(Symbol)) == ["AAA", "BBB", "CCC"]
+    assert get_metrics().sync_rows.value(action="updated") == updated + 1
@@ -0,0 +1,115 @@
+import asyncio
+import math
+
+import numpy as np
+
+from app.services.backtest import history_signals
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.data_providers.sync_adapter import SyncProviderAdapter
+from app.services.data_providers.timeframes import period_keys, rollup
+from app.services.filters.chain import universe_symbol_data
+from app.services.filters.plan import compile_plan
+from app.services.screener import run_screener, run_screener_async
+
+DAYS = np.arange("2024-11-02", "2025-03-01", dtype="datetime64[D]")
+# Tehran market days: Saturday to Wednesday.
+TRADING_DAYS = [d for d in DAYS if (d.astype(np.int64) - 2) % 7 < 5]
+
+
+def _records(count=8):
+    records = []
+    for i in range(count):
+        closes = [100 + 10 * math.sin((t + 7 * i) / 9) for t in range(len(TRADING_DAYS))]
+        volumes = [1000 + 400 * math.cos((t + 3 * i) / 4) for t in range(len(TRADING_DAYS))]
+        records.append(
+            {
+                "symbol": f"SYM{i}",
+                "company_name": f"Company {i}",
+                "last_price": closes[-1],
+                "volume": volumes[-1],
+                "trade_value": closes[-1] * volumes[-1],
+                "percent_change": 0.0,
+                "last_updated": "2025-03-01T00:00:00",
+                "history": [
+                    {"date": str(day), "close": close, "volume": volume}
+                    for day, close, volume in zip(TRADING_DAYS, closes, volumes)
+                ],
+            }
+        )
+    return records
+
+
+def test_rollups_are_maintained_incrementally():
+    records = _records(1)
+    candles = records[0]["history"]
+    store = MarketDataStore.from_records([{**records[0], "history": candles[:30]}])
+    # Materialize the rollups, then feed the remaining candles one by one.
+    assert store.history_length(0, "W") == 6
+    assert store.history_length(0, "M") == 2
+    for candle in candles[30:]:
+        store.append_candle(0, candle["date"], candle["close"], candle["volume"])
+
+    full = MarketDataStore.from_records(records).series(0)
+    for timeframe in ("W", "M"):
+        expected = rollup(full, timeframe)
+        bars = store.series(0, timeframe)
+        assert len(bars["close"]) == len(np.unique(period_keys(full["date"], timeframe)))
+        for name in ("date", "close"):
+            assert (bars[name] == expected[name]).all()
+        for name in ("volume", "value"):
+            assert np.allclose(bars[name], expected[name])
+    # Weeks start on Saturday: Saturday 2024-11-02 through Wednesday 2024-11-06.
+    week = store.history(0, None, "W")
+    assert str(week["date"][0])[:10] == "2024-11-06"
+    assert math.isclose(week["volume"][0], sum(c["volume"] for c in candles[:5]))
+
+
+def test_weekly_filters_read_rolled_up_bars():
+    provider = MockMarketDataProvider(MarketDataStore.from_records(_records()))
+    macd = {"fast": 3, "slow": 6, "signal": 2, "timeframe": "W"}
+    volume = {"lookback": 4, "multiplier": 1.0, "timeframe": "W"}
+    weekly = [
+        {"id": "macd_above_zero", "params": macd},
+        {"id": "volume_above_average", "params": volume},
+    ]
+    plan = compile_plan(weekly)
+    assert plan.history_lookback == 0
+    assert plan.frame_lookbacks == {"W": 120}
+
+    expected = []
+    for row, symbol in enumerate(provider.store.symbols):
+        bars = provider.store.series(row, "W")
+        average = bars["volume"][-4:].mean()
+        closes = bars["close"][-120:]
+        fast, slow = (_ema(closes, span) for span in (3, 6))
+        if fast - slow > 0 and bars["volume"][-1] > average:
+            expected.append(symbol)
+    results = run_screener(provider, weekly)
+    assert expected and [r["symbol"] for r in results] == expected
+    assert "حجم این هفته" in results[0]["reason"]
+    async_results = asyncio.run(run_screener_async(SyncProviderAdapter(provider), weekly))
+    assert async_results == results
+
+    # Per-symbol evaluation of the same bars agrees with the batch one.
+    universe = provider.get_universe(0, frames={"W": 120})
+    for instance in plan.instances:
+        batch = instance.evaluate_batch(universe)
+        for i in range(len(universe)):
+            single = instance.evaluate(universe_symbol_data(universe, i))
+            assert single["passed"] == batch.passed[i]
+            assert single["reason"] == batch.reason(i)
+
+    # Backtests screen each date with the weekly bars before it.
+    panel = provider.get_panel()
+    signals = history_signals(plan.instances[1], panel)
+    assert signals.shape == (len(panel), len(panel.symbols))
+    assert signals[-1].any() and not signals[:20].any()
+
+
+def _ema(values, span):
+    alpha = 2 / (span + 1)
+    result = values[0]
+    for value in values[1:]:
+        result = alpha * value + (1 - alpha) * result
+    return result
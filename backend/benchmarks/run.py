@@ -0,0 +1,256 @@
+"""
+Benchmark the screener on a synthetic universe.
+
+    cd backend
+    python -m benchmarks.run --symbols 1500 --candles 120 --save-baseline baseline.json
+    python -m benchmarks.run --symbols 1500 --candles 120 --baseline baseline.json
+
+Each case reports p50/p99 latency, throughput (symbols per second at the p50)
+and the peak traced allocation of one extra run under ``tracemalloc``. With
+``--baseline`` the run fails (exit code 1) when a case's p50 is slower than the
+baseline by more than ``--threshold`` (and by at least ``--min-ms``).
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services import indicators
+from app.services.cache.indicator_cache import get_indicator_cache
+from app.services.data_providers.market_store import MarketDataStore
+from app.services.data_providers.mock_provider import MockMarketDataProvider
+from app.services.data_providers.sync_adapter import SyncProviderAdapter
+from app.services.filters.base import HISTORY_LOOKBACK
+from app.services.filters.chain import universe_symbol_data
+from app.services.filters.registry import get_filter_registry, instantiate_filter
+from app.services.screener import get_screen_cache, run_screener
+from benchmarks.synthetic import REGIMES, synthetic_records
+
+SCREEN_FILTERS = [{"id": filter_id, "params": {}} for filter_id in get_filter_registry()]
+
+
+@dataclass
+class Case:
+    name: str
+    func: Callable[[], Any]
+    items: int  # symbols processed per call, for throughput
+    setup: Optional[Callable[[], None]] = None
+
+
+def measure(case: Case, repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        _call(case)
+    samples = []
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.func()
+        samples.append(time.perf_counter() - start)
+    # Traced separately: tracemalloc slows allocation-heavy code down.
+    tracemalloc.start()
+    try:
+        _call(case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    p50 = float(np.percentile(samples, 50))
+    return {
+        "p50_ms": p50 * 1000,
+        "p99_ms": float(np.percentile(samples, 99)) * 1000,
+        "throughput": case.items / p50 if p50 > 0 else float("inf"),
+        "peak_kb": peak / 1024,
+    }
+
+
+def _call(case: Case) -> None:
+    if case.setup:
+        case.setup()
+    case.func()
+
+
+def _clear_caches() -> None:
+    get_screen_cache().clear()
+    get_indicator_cache().clear()
+
+
+def build_cases(records: List[Dict[str, Any]], route: bool = True) -> List[Case]:
+    count = len(records)
+    provider = MockMarketDataProvider(MarketDataStore.from_records(records))
+    universe = provider.get_universe(lookback=HISTORY_LOOKBACK)
+    closes = [[candle["close"] for candle in r["history"]] for r in records]
+    matrix = universe.history["close"]
+    symbol_data = []
+    for i in range(count):
+        data = universe_symbol_data(universe, i)
+        # Without a data version the filters recompute instead of hitting the cache.
+        data.pop("data_version", None)
+        symbol_data.append(data)
+
+    def load_provider():
+        loaded = MockMarketDataProvider(MarketDataStore.from_records(records))
+        loaded.get_universe(lookback=HISTORY_LOOKBACK)
+
+    cases = [
+        Case("provider_load", load_provider, count),
+        Case("indicators.sma", lambda: [indicators.sma(c, 20) for c in closes], count),
+        Case("indicators.ema", lambda: [indicators.ema(c, 20) for c in closes], count),
+        Case("indicators.macd", lambda: [indicators.macd(c) for c in closes], count),
+        Case("indicators.sma_array", lambda: indicators.sma_array(matrix, 20), count),
+        Case("indicators.ema_array", lambda: indicators.ema_array(matrix, 20), count),
+        Case("indicators.macd_array", lambda: indicators.macd_array(matrix), count),
+    ]
+    for filter_id in get_filter_registry():
+        instance = instantiate_filter(filter_id, {})
+        cases.append(
+            Case(
+                f"filter.{filter_id}.evaluate",
+                lambda instance=instance: [instance.evaluate(d) for d in symbol_data],
+                count,
+            )
+        )
+        if instance.supports_batch():
+            cases.append(
+                Case(
+                    f"filter.{filter_id}.evaluate_batch",
+                    lambda instance=instance: instance.evaluate_batch(universe),
+                    count,
+                )
+            )
+    cases.append(
+        Case("run_screener", lambda: run_screener(provider, SCREEN_FILTERS), count, _clear_caches)
+    )
+    if route:
+        route_case = _route_case(provider, count)
+        if route_case is not None:
+            cases.append(route_case)
+    return cases
+
+
+def _route_case(provider: MockMarketDataProvider, count: int) -> Optional[Case]:
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:  # TestClient needs httpx, which is not a runtime dependency
+        print("Skipping route benchmark: httpx is not installed", file=sys.stderr)
+        return None
+    from app.deps import get_async_provider
+    from app.main import app
+
+    adapter = SyncProviderAdapter(provider)
+    app.dependency_overrides[get_async_provider] = lambda: adapter
+    # Not used as a context manager, so the startup hooks (database, replay) do not run.
+    client = TestClient(app)
+
+    def post():
+        response = client.post("/api/screener/run", json={"filters": SCREEN_FILTERS})
+        response.raise_for_status()
+
+    return Case("route.screener_run", post, count, _clear_caches)
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+    min_ms: float = 0.0,
+) -> List[str]:
+    """
+    Cases whose p50 regressed by more than ``threshold`` (a fraction) over the
+    baseline and by more than ``min_ms``, so sub-millisecond noise is ignored.
+    """
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        limit = previous["p50_ms"] + max(previous["p50_ms"] * threshold, min_ms)
+        if stats["p50_ms"] > limit:
+            regressions.append(
+                f"{name}: p50 {stats['p50_ms']:.2f}ms > {previous['p50_ms']:.2f}ms "
+                f"(+{stats['p50_ms'] / previous['p50_ms'] - 1:.0%})"
+            )
+    return regressions
+
+
+def run(
+    symbols: int,
+    candles: int,
+    regime: str = "normal",
+    repeat: int = 10,
+    seed: int = 0,
+    route: bool = True,
+) -> Dict[str, Any]:
+    records = synthetic_records(symbols, candles, regime, seed)
+    results = {case.name: measure(case, repeat) for case in build_cases(records, route)}
+    return {
+        "config": {"symbols": symbols, "candles": candles, "regime": regime, "seed": seed},
+        "results": results,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    config = report["config"]
+    lines = [
+        f"{config['symbols']} symbols x {config['candles']} candles ({config['regime']})",
+        f"{'case':<42}{'p50 ms':>10}{'p99 ms':>10}{'symbols/s':>14}{'peak KiB':>12}",
+    ]
+    for name, stats in report["results"].items():
+        lines.append(
+            f"{name:<42}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+            f"{stats['throughput']:>14.0f}{stats['peak_kb']:>12.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the screener on a synthetic universe")
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--candles", type=int, default=120)
+    parser.add_argument("--regime", choices=[*REGIMES, "mixed"], default="normal")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-route", action="store_true", help="skip the HTTP route benchmark")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed p50 slowdown over the baseline, as a fraction (default 0.2)",
+    )
+    parser.add_argument(
+        "--min-ms",
+        type=float,
+        default=1.0,
+        help="ignore p50 slowdowns smaller than this many milliseconds (default 1)",
+    )
+    args = parser.parse_args()
+
+    report = run(args.symbols, args.candles, args.regime, args.repeat, args.seed, not args.no_route)
+    print(format_report(report))
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("Warning: baseline was recorded with a different configuration", file=sys.stderr)
+        regressions = compare(
+            report["results"], baseline["results"], args.threshold, args.min_ms
+        )
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
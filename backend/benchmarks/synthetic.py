@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Daily log-return volatility of each regime.
+REGIMES: Dict[str, float] = {"calm": 0.005, "normal": 0.02, "volatile": 0.05}
+
+
+def synthetic_records(
+    symbols: int, candles: int, regime: str = "normal", seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Seed-format records (see ``seed/symbols_seed.json``) for a random universe.
+
+    Closes follow a geometric random walk with the regime's volatility, or a
+    per-symbol mix of all regimes for ``"mixed"``. Volumes are log-normal, with
+    occasional spikes so the volume filters have something to find.
+    """
+    if regime != "mixed" and regime not in REGIMES:
+        raise ValueError(f"Unknown regime {regime!r}; expected one of {sorted(REGIMES)} or 'mixed'")
+    rng = np.random.default_rng(seed)
+    if regime == "mixed":
+        sigma = rng.choice(list(REGIMES.values()), size=(symbols, 1))
+    else:
+        sigma = np.full((symbols, 1), REGIMES[regime])
+    returns = rng.normal(0.0, 1.0, (symbols, candles)) * sigma
+    closes = rng.uniform(1_000, 50_000, (symbols, 1)) * np.exp(np.cumsum(returns, axis=1))
+    volumes = rng.lognormal(12.0, 0.5, (symbols, candles))
+    volumes *= np.where(rng.random((symbols, candles)) < 0.05, 3.0, 1.0)
+    volumes = np.round(volumes)
+
+    end = datetime(2025, 1, 1)
+    dates = [(end - timedelta(days=candles - 1 - t)).isoformat() for t in range(candles)]
+    records = []
+    for i in range(symbols):
+        close = closes[i].round(2).tolist()
+        volume = volumes[i].tolist()
+        previous = close[-2] if candles > 1 else close[-1]
+        records.append(
+            {
+                "symbol": f"SYN{i:05d}",
+                "company_name": f"Synthetic {i}",
+                "last_price": close[-1],
+                "volume": volume[-1],
+                "trade_value": close[-1] * volume[-1],
+                "percent_change": round((close[-1] / previous - 1) * 100, 2),
+                "last_updated": end.isoformat(),
+                "history": [
+                    {"date": d, "close": c, "volume": v}
+                    for d, c, v in zip(dates, close, volume)
+                ],
+            }
+        )
+    return records
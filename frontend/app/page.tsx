@@ -7,6 +7,9 @@ interface FilterParameter {
   type: string;
   description: string;
   default?: any;
+  choices?: any[] | null;
+  minimum?: number | null;
+  maximum?: number | null;
 }
 
 interface FilterDefinition {
@@ -28,6 +31,23 @@ interface ScreenerResult {
   score?: number | null;
 }
 
+// `format=columns` responses: one array per field instead of one object per row.
+interface ColumnarResponse {
+  count: number;
+  columns: Record<string, any[]>;
+}
+
+function fromColumns<T>(data: ColumnarResponse): T[] {
+  const names = Object.keys(data.columns);
+  return Array.from({ length: data.count }, (_, i) => {
+    const row: Record<string, any> = {};
+    for (const name of names) {
+      row[name] = data.columns[name][i];
+    }
+    return row as T;
+  });
+}
+
 interface SelectedFilter {
   id: string;
   params: Record<string, any>;
@@ -118,7 +138,7 @@ export default function HomePage() {
         filters: selectedFilters,
       };
 
-      const res = await fetch(`/api/screener/run`, {
+      const res = await fetch(`/api/screener/run?format=columns`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(payload),
@@ -128,8 +148,8 @@ export default function HomePage() {
         throw new Error('خطا در اجرای فیلتر');
       }
 
-      const data: ScreenerResult[] = await res.json();
-      setResults(data);
+      const data: ColumnarResponse = await res.json();
+      setResults(fromColumns<ScreenerResult>(data));
     } catch (e) {
       setError('اجرای فیلتر با مشکل مواجه شد');
     } finally {
@@ -188,20 +208,38 @@ export default function HomePage() {
                             <span className="text-slate-600">
                               {param.description}
                             </span>
-                            <input
-                              type="number"
-                              defaultValue={param.default as any}
-                              onChange={(e) =>
-                                handleParamChange(
-                                  filter.id,
-                                  param.name,
-                                  param.type === 'int'
-                                    ? parseInt(e.target.value, 10)
-                                    : parseFloat(e.target.value)
-                                )
-                              }
-                              className="border rounded px-2 py-1 text-sm"
-                            />
+                            {param.choices ? (
+                              <select
+                                defaultValue={param.default as any}
+                                onChange={(e) =>
+                                  handleParamChange(filter.id, param.name, e.target.value)
+                                }
+                                className="border rounded px-2 py-1 text-sm"
+                              >
+                                {param.choices.map((choice) => (
+                                  <option key={String(choice)} value={choice}>
+                                    {String(choice)}
+                                  </option>
+                                ))}
+                              </select>
+                            ) : (
+                              <input
+                                type="number"
+                                min={param.minimum ?? undefined}
+                                max={param.maximum ?? undefined}
+                                defaultValue={param.default as any}
+                                onChange={(e) =>
+                                  handleParamChange(
+                                    filter.id,
+                                    param.name,
+                                    param.type === 'int'
+                                      ? parseInt(e.target.value, 10)
+                                      : parseFloat(e.target.value)
+                                  )
+                                }
+                                className="border rounded px-2 py-1 text-sm"
+                              />
+                            )}
                           </label>
                         ))}
                       </div>